@@ -6,9 +6,16 @@ import pandas as pd
 from utils.supabase import (
     register_user, login_user, logout_user, 
     save_user_profile, save_ikigai_data, 
-    save_project_selection, save_progress, save_project_milestone, update_milestone_status
+    save_project_selection, save_progress, save_project_milestone, update_milestone_statuses,
+    get_milestone_window, get_milestone_counts, set_auth_session, AuthSession, PAGE_SIZE
 )
-# from utils.ai_services import generate_social_media_post, generate_daily_post, analyze_delta4, get_company_insights
+from utils.ai_services import (
+    stream_domain_suggestion, generate_social_media_post, stream_daily_post,
+    stream_delta4_analysis, iter_company_insight_events,
+    prefetch_company_insights, get_prefetched_company_insights, discard_prefetched_company_insights
+)
+from utils import supabase_async
+from utils.json_stream import apply_event
 
 # Load environment variables
 load_dotenv(override=True)
@@ -36,13 +43,8 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Initialize session state variables if they don't exist
-if "user_logged_in" not in st.session_state:
-    st.session_state.user_logged_in = False
-if "user_info" not in st.session_state:
-    st.session_state.user_info = None
-if "user_data" not in st.session_state:
-    st.session_state.user_data = {
+def default_user_data():
+    return {
         "profile_type": None,
         "skill_level": None,
         "immediate_goals": None,
@@ -54,8 +56,21 @@ if "user_data" not in st.session_state:
             "final_domain": ""
         }
     }
+
+# Initialize session state variables if they don't exist
+if "user_logged_in" not in st.session_state:
+    st.session_state.user_logged_in = False
+if "user_info" not in st.session_state:
+    st.session_state.user_info = None
+if "user_data" not in st.session_state:
+    st.session_state.user_data = default_user_data()
 if "projects" not in st.session_state:
     st.session_state.projects = []
+if "auth_session" not in st.session_state:
+    st.session_state.auth_session = None
+
+# Database calls in this run act as the logged-in user (pooled clients hold no session)
+set_auth_session(st.session_state.auth_session)
 
 # Authentication functions
 def show_login_form():
@@ -68,11 +83,96 @@ def show_login_form():
             response = login_user(email, password)
             st.session_state.user_logged_in = True
             st.session_state.user_info = response.user
+            # Keeps the refresh token too, so the login outlives the access token's one-hour expiry
+            st.session_state.auth_session = AuthSession.from_session(response.session)
+            set_auth_session(st.session_state.auth_session)
+            with st.spinner("Loading your saved work..."):
+                hydrate_session(get_user_property(response.user, "id"))
             st.success("Logged in successfully!")
             st.rerun()
         except Exception as e:
             st.error(f"Login failed: {str(e)}")
 
+def _from_json(value, default):
+    # JSON columns may come back as strings (saved with json.dumps) or already decoded
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return default
+    return value if value is not None else default
+
+# Per-user widget and page state, dropped on login so it is rebuilt for the new user
+USER_STATE_KEYS = ("milestone_edits", "milestones_shown", "target_firms", "firm_insights", "insights_refresh",
+                   "regenerate_posts", "daily_post_inputs", "delta4_inputs", "user_skills", "domain_choice",
+                   "domain_notes")
+USER_WIDGET_PREFIXES = ("task_", "status_")
+
+def reset_user_state():
+    st.session_state.user_data = default_user_data()
+    st.session_state.projects = []
+    st.session_state.milestones = {}
+    for key in list(st.session_state):
+        if key in USER_STATE_KEYS or str(key).startswith(USER_WIDGET_PREFIXES):
+            del st.session_state[key]
+
+def hydrate_session(user_id):
+    """
+    Restore a returning user's saved work into session state in one pass.
+    
+    Whatever the session held before (e.g. a guest's work) is reset first.
+    The profile, ikigai logs, projects, and the latest progress and milestone
+    counts per project are loaded concurrently; anything that fails to load
+    is simply left empty, as for a new user. The counts land in the read
+    cache the progress page reads them from; milestones themselves are
+    fetched a page at a time by the page that shows them.
+    
+    Args:
+        user_id (str): The logged-in user's ID
+    """
+    reset_user_state()
+    try:
+        data = supabase_async.hydrate_user_session(user_id)
+    except Exception as e:
+        st.warning(f"Could not load your saved data: {str(e)}")
+        return
+    
+    user_data = st.session_state.user_data
+    profile = data["profile"]
+    if profile:
+        user_data["profile_type"] = profile.get("profile_type")
+        user_data["skill_level"] = profile.get("skill_level")
+        user_data["immediate_goals"] = _from_json(profile.get("immediate_goals"), None)
+    
+    # Suggestions and domain choices are logged as separate entries; take the newest value of each field
+    for field in ("passion", "strengths", "ai_suggestion", "final_domain"):
+        value = next((log[field] for log in data["ikigai_logs"] if log.get(field)), None)
+        if value:
+            user_data["ikigai"][field] = value
+    domain = next((log["domain_selected"] for log in data["ikigai_logs"] if log.get("domain_selected")), None)
+    if domain:
+        user_data["domain_selected"] = domain
+    
+    # Oldest first, one per title, so project_{i} IDs line up with how progress and milestones were saved
+    projects = []
+    for row in data["projects"]:
+        if row.get("title") and not any(p["title"] == row["title"] for p in projects):
+            projects.append({
+                "title": row["title"],
+                "description": row.get("description", ""),
+                "difficulty": row.get("difficulty", ""),
+                "time_estimate": row.get("time_estimate", ""),
+                "tasks": _from_json(row.get("tasks"), [])
+            })
+    st.session_state.projects = projects
+    
+    # Tick the tasks completed as of each project's latest saved progress
+    for i, project in enumerate(projects):
+        latest = data["progress"].get(f"project_{i}")
+        if latest:
+            for j, task in enumerate(project["tasks"]):
+                st.session_state[f"task_{i}_{j}"] = task in latest["completed_tasks"]
+
 def show_signup_form():
     st.subheader("Create an Account")
     email = st.text_input("Email", key="signup_email")
@@ -133,6 +233,8 @@ def main():
                     logout_user()
                 st.session_state.user_logged_in = False
                 st.session_state.user_info = None
+                st.session_state.auth_session = None
+                reset_user_state()
                 st.rerun()
         
         st.caption("© 2025 CareerAI")
@@ -281,32 +383,32 @@ def show_ikigai_page():
             st.session_state.user_data["ikigai"]["passion"] = passion
             st.session_state.user_data["ikigai"]["strengths"] = strengths
             
-            # Get AI suggestion
-            with st.spinner("Analyzing your responses..."):
-                try:
-                    ai_suggestion = generate_domain_suggestion(passion, strengths)
-                    st.session_state.user_data["ikigai"]["ai_suggestion"] = ai_suggestion
-                    st.markdown(f"**AI Suggestion:**\n{ai_suggestion}")
-                    
-                    # Save to database if logged in (not as guest)
-                    if st.session_state.user_logged_in and not is_guest_user(st.session_state.user_info):
-                        try:
-                            save_ikigai_data(
-                                get_user_property(st.session_state.user_info, "id"),
-                                {
-                                    "passion": passion,
-                                    "strengths": strengths,
-                                    "ai_suggestion": ai_suggestion
-                                }
-                            )
-                        except Exception as e:
-                            st.warning(f"Could not save ikigai data to database: {str(e)}")
+            # Get AI suggestion, rendering it as it streams in
+            try:
+                st.markdown("**AI Suggestion:**")
+                ai_suggestion = st.write_stream(stream_domain_suggestion(passion, strengths))
+                st.session_state.user_data["ikigai"]["ai_suggestion"] = ai_suggestion
+                
+                # Save to database if logged in (not as guest)
+                if st.session_state.user_logged_in and not is_guest_user(st.session_state.user_info):
+                    try:
+                        save_ikigai_data(
+                            get_user_property(st.session_state.user_info, "id"),
+                            {
+                                "passion": passion,
+                                "strengths": strengths,
+                                "ai_suggestion": ai_suggestion
+                            },
+                            dedup_key="suggestion"
+                        )
+                    except Exception as e:
+                        st.warning(f"Could not save ikigai data to database: {str(e)}")
+                
+                # Guide to next tab
+                st.success("Ikigai information saved! Please proceed to the Domain Selection tab.")
                     
-                    # Guide to next tab
-                    st.success("Ikigai information saved! Please proceed to the Domain Selection tab.")
-                        
-                except Exception as e:
-                    st.error(f"Error generating domain suggestion: {str(e)}")
+            except Exception as e:
+                st.error(f"Error generating domain suggestion: {str(e)}")
         else:
             st.info("Please reflect on the questions to receive an AI-powered domain suggestion.")
 
@@ -336,26 +438,39 @@ def show_domain_page():
                 "Other"
             ]
             
+            # Start from the saved choice, e.g. one restored on login, rather than the first option
+            saved_domain = st.session_state.user_data["domain_selected"]
+            if "domain_choice" not in st.session_state:
+                st.session_state.domain_choice = saved_domain if saved_domain in domain_options else domain_options[0]
+            if "domain_notes" not in st.session_state:
+                saved_final = st.session_state.user_data["ikigai"]["final_domain"] or ""
+                prefix = f"{saved_domain}: "
+                st.session_state.domain_notes = saved_final[len(prefix):] if saved_final.startswith(prefix) else ""
+            
             selected_domain = st.selectbox(
                 "Select your preferred domain:",
                 domain_options,
-                index=0,
+                key="domain_choice",
                 placeholder="Choose a domain"
             )
             
             domain_notes = st.text_area(
                 "Add any specific areas or applications you're interested in:",
+                key="domain_notes",
                 placeholder="E.g., I want to focus on building conversational agents for customer service"
             )
         
         # Save domain selection
         if selected_domain:
             final_domain = f"{selected_domain}: {domain_notes}" if domain_notes else selected_domain
+            changed = (selected_domain, final_domain) != (
+                st.session_state.user_data["domain_selected"], st.session_state.user_data["ikigai"]["final_domain"]
+            )
             st.session_state.user_data["domain_selected"] = selected_domain
             st.session_state.user_data["ikigai"]["final_domain"] = final_domain
             
-            # Save to database if logged in (not as guest)
-            if st.session_state.user_logged_in and not is_guest_user(st.session_state.user_info):
+            # Save to database if logged in (not as guest) and the choice changed
+            if changed and st.session_state.user_logged_in and not is_guest_user(st.session_state.user_info):
                 try:
                     # Save ikigai final domain to ikigai_logs table
                     save_ikigai_data(
@@ -363,7 +478,8 @@ def show_domain_page():
                         {
                             "final_domain": final_domain,
                             "domain_selected": selected_domain
-                        }
+                        },
+                        dedup_key="domain"
                     )
                 except Exception as e:
                     st.warning(f"Could not save domain selection to database: {str(e)}")
@@ -449,11 +565,36 @@ def show_progress_page():
         st.info("Please go to the Project Selection tab first to select a project.")
         return
     
+    # Load saved progress and milestone counts for every project concurrently (logged-in users only)
+    saved_progress, milestone_counts = {}, {}
+    if st.session_state.user_logged_in and not is_guest_user(st.session_state.user_info):
+        user_id = get_user_property(st.session_state.user_info, "id")
+        project_ids = [f"project_{i}" for i in range(len(st.session_state.projects))]
+        try:
+            counts_result, progress_result = supabase_async.run_all(
+                supabase_async.get_user_milestone_counts(user_id),
+                supabase_async.get_progress_states(user_id, project_ids)
+            )
+            if not isinstance(progress_result, Exception):
+                saved_progress = progress_result
+            if not isinstance(counts_result, Exception):
+                milestone_counts = counts_result
+        except Exception as e:
+            st.warning(f"Could not load saved progress: {str(e)}")
+    
     # Display all selected projects
     for i, project in enumerate(st.session_state.projects):
         with st.expander(f"Project: {project['title']}", expanded=True):
             st.write(project["description"])
             
+            # Last saved state from the database
+            latest = saved_progress.get(f"project_{i}")
+            if latest:
+                st.caption(f"Last saved: {latest['progress_percentage']}% on {str(latest['timestamp'] or '')[:10]}")
+            by_status = milestone_counts.get(f"project_{i}", {})
+            if sum(by_status.values()):
+                st.caption(f"Milestones: {by_status.get('completed', 0)}/{sum(by_status.values())} completed")
+            
             # Calculate progress
             task_count = len(project["tasks"])
             completed_tasks = sum(1 for j in range(task_count) if st.session_state.get(f"task_{i}_{j}", False))
@@ -511,14 +652,17 @@ def show_progress_page():
                                       if st.session_state.get(f"task_{i}_{j}", False)]
                 completed_tasks_str = "\n".join([f"- {task}" for task in completed_task_list[:3]])
                 
-                # Generate social media post
+                # Generate social media post (a regenerate request skips the cached one)
+                regenerate_posts = st.session_state.get("regenerate_posts", set())
                 try:
                     post_text = generate_social_media_post(
                         project["title"],
                         st.session_state.user_data["domain_selected"],
                         completed_tasks_str,
-                        int(progress * 100)
+                        int(progress * 100),
+                        refresh=i in regenerate_posts
                     )
+                    regenerate_posts.discard(i)
                 except Exception as e:
                     # Fallback to simple post generation
                     milestone = "just started" if progress < 0.3 else "making good progress on" if progress < 0.6 else "nearly finished with" if progress < 1 else "just completed"
@@ -533,11 +677,16 @@ Key accomplishments:
                 
                 st.text_area("Share your progress on social media:", value=post_text, height=150, key=f"post_text_{i}")
                 
-                col1, col2 = st.columns(2)
+                col1, col2, col3 = st.columns(3)
                 with col1:
                     st.button("Copy for LinkedIn", key=f"linkedin_{i}")
                 with col2:
                     st.button("Copy for Twitter", key=f"twitter_{i}")
+                with col3:
+                    if st.button("Regenerate Post", key=f"regenerate_post_{i}"):
+                        st.session_state.setdefault("regenerate_posts", set()).add(i)
+                        st.session_state.pop(f"post_text_{i}", None)
+                        st.rerun()
             else:
                 st.info("Complete some tasks to generate a social media post.")
 
@@ -584,7 +733,7 @@ def show_daily_post_page():
         for i, firm in enumerate(st.session_state.target_firms):
             col1, col2 = st.columns([0.9, 0.1])
             with col1:
-                st.text(firm)
+                st.text(firm_label(firm, domain))
             with col2:
                 if st.button("❌", key=f"remove_{i}"):
                     st.session_state.target_firms.pop(i)
@@ -594,31 +743,41 @@ def show_daily_post_page():
         new_firm = st.text_input("Add a target company:", placeholder="e.g., Google, OpenAI, NVIDIA", key="add_company_firm_alerts_3")
         if st.button("Add Company", key="add_company_firm_alerts_2") and new_firm:
             st.session_state.target_firms.append(new_firm)
+            # Start researching the firm now so the Target Firm Alerts tab is ready sooner
+            prefetch_company_insights(new_firm, domain, st.session_state.get("user_skills", []))
             st.rerun()
     
     # Generate post button
     if st.button("Generate Post", type="primary") and project_title and goals_for_today and learnings:
-        with st.spinner("Generating your daily post..."):
-            post = generate_daily_post(
+        # Clicking again with the same inputs asks for a new post rather than the cached one
+        inputs = (project_title, domain, day_number, goals_for_today, learnings, tuple(st.session_state.target_firms))
+        refresh = st.session_state.get("daily_post_inputs") == inputs
+        st.session_state.daily_post_inputs = inputs
+        
+        # Stream the post as it is generated, then swap in an editable text area
+        post_placeholder = st.empty()
+        with post_placeholder.container():
+            post = st.write_stream(stream_daily_post(
                 project_title, 
                 domain, 
                 day_number, 
                 goals_for_today, 
                 learnings, 
-                st.session_state.target_firms if st.session_state.target_firms else None
-            )
-            st.text_area("Your daily build-in-public post:", value=post, height=300)
-            
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                if st.button("Copy for LinkedIn"):
-                    st.success("Copied to clipboard!")
-            with col2:
-                if st.button("Copy for Twitter"):
-                    st.success("Copied to clipboard!")
-            with col3:
-                if st.button("Schedule Post"):
-                    st.info("Post scheduling feature coming soon!")
+                st.session_state.target_firms if st.session_state.target_firms else None,
+                refresh=refresh
+            ))
+        post_placeholder.text_area("Your daily build-in-public post:", value=post, height=300)
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            if st.button("Copy for LinkedIn"):
+                st.success("Copied to clipboard!")
+        with col2:
+            if st.button("Copy for Twitter"):
+                st.success("Copied to clipboard!")
+        with col3:
+            if st.button("Schedule Post"):
+                st.info("Post scheduling feature coming soon!")
     
     st.divider()
     
@@ -670,16 +829,19 @@ def show_milestone_page():
     # Initialize milestones for this project if not exist
     if project_id not in st.session_state.milestones:
         st.session_state.milestones[project_id] = []
-        
-        # If user is logged in (not guest), fetch milestones from database
-        if st.session_state.user_logged_in and not is_guest_user(st.session_state.user_info):
-            try:
-                user_id = get_user_property(st.session_state.user_info, "id")
-                milestone_data = get_project_milestones(user_id, project_id)
-                if milestone_data and hasattr(milestone_data, "data"):
-                    st.session_state.milestones[project_id] = milestone_data.data
-            except Exception as e:
-                st.warning(f"Could not load milestones: {str(e)}")
+    shown = st.session_state.setdefault("milestones_shown", {}).setdefault(project_id, PAGE_SIZE)
+    status_counts, has_more = None, False
+    
+    # If user is logged in (not guest), load the milestones on screen from the database on every run.
+    # Reads are cached and invalidated by our own saves, so this stays cheap and never stale;
+    # only the first `shown` milestones are fetched, and the status counts read only the status column.
+    if st.session_state.user_logged_in and not is_guest_user(st.session_state.user_info):
+        try:
+            user_id = get_user_property(st.session_state.user_info, "id")
+            st.session_state.milestones[project_id], has_more = get_milestone_window(user_id, project_id, shown)
+            status_counts = get_milestone_counts(user_id, project_id)
+        except Exception as e:
+            st.warning(f"Could not load milestones: {str(e)}")
     
     # Display project info
     st.subheader(f"Project: {selected_project['title']}")
@@ -713,6 +875,11 @@ def show_milestone_page():
                     "created_at": pd.Timestamp.now().isoformat()
                 }
                 
+                # Assign the ID up front: the insert is written in the background,
+                # and status updates must reference the same row
+                import uuid
+                new_milestone["id"] = str(uuid.uuid4())
+                
                 # Save to database if logged in
                 if st.session_state.user_logged_in and not is_guest_user(st.session_state.user_info):
                     try:
@@ -726,10 +893,6 @@ def show_milestone_page():
                         st.warning(f"Could not save milestone to database: {str(e)}")
                 
                 # Add to session state
-                if "id" not in new_milestone:
-                    import uuid
-                    new_milestone["id"] = str(uuid.uuid4())
-                
                 st.session_state.milestones[project_id].append(new_milestone)
                 st.rerun()
     
@@ -739,17 +902,35 @@ def show_milestone_page():
     else:
         st.subheader("Project Milestones")
         
+        # Status changes are collected here and saved together
+        pending = st.session_state.setdefault("milestone_edits", {}).setdefault(project_id, {})
+        if pending:
+            st.info(f"{len(pending)} unsaved status change{'s' if len(pending) != 1 else ''}")
+            col_save, col_discard = st.columns(2)
+            with col_save:
+                if st.button("Save Changes", key=f"save_milestone_edits_{project_id}"):
+                    save_milestone_edits(project_id, pending)
+            with col_discard:
+                if st.button("Discard Changes", key=f"discard_milestone_edits_{project_id}"):
+                    pending.clear()
+                    reset_status_widgets(project_id)
+                    st.rerun()
+        
         # Group milestones by status
         milestones_by_status = {}
         for status in status_options:
             milestones_by_status[status] = [m for m in st.session_state.milestones[project_id] if m["status"] == status]
         
+        # Counts cover every milestone, including those not loaded yet
+        if status_counts is None:
+            status_counts = {status: len(milestones) for status, milestones in milestones_by_status.items()}
+        
         # Create tabs for different status views
         all_tab, not_started_tab, in_progress_tab, completed_tab = st.tabs([
             "All Milestones", 
-            f"Not Started ({len(milestones_by_status['not_started'])})",
-            f"In Progress ({len(milestones_by_status['in_progress'])})",
-            f"Completed ({len(milestones_by_status['completed'])})"
+            f"Not Started ({status_counts.get('not_started', 0)})",
+            f"In Progress ({status_counts.get('in_progress', 0)})",
+            f"Completed ({status_counts.get('completed', 0)})"
         ])
         
         # Display milestones in each tab
@@ -774,9 +955,13 @@ def show_milestone_page():
             else:
                 st.info("No milestones in this category.")
         
+        if has_more and st.button("Show More Milestones", key=f"show_more_milestones_{project_id}"):
+            st.session_state.milestones_shown[project_id] = shown + PAGE_SIZE
+            st.rerun()
+        
         # Calculate overall project progress
-        total_milestones = len(st.session_state.milestones[project_id])
-        completed_milestones = len(milestones_by_status["completed"])
+        total_milestones = sum(status_counts.values())
+        completed_milestones = status_counts.get("completed", 0)
         progress = completed_milestones / total_milestones if total_milestones > 0 else 0
         
         st.subheader("Overall Milestone Progress")
@@ -808,8 +993,10 @@ def display_milestones(milestones, project_id, status_options, tab_name):
                     st.info(f"Due in {days_remaining} days ({due_date})")
             
             with col2:
-                current_status = milestone.get('status', 'not_started')
+                saved_status = milestone.get('status', 'not_started')
                 milestone_id = milestone.get('id', str(i))
+                pending = st.session_state.milestone_edits[project_id]
+                current_status = pending.get(milestone_id, saved_status)
                 
                 # Create a unique key using all available unique identifiers including tab_name
                 status_key = f"status_{project_id}_{milestone_id}_{tab_name}_{i}"
@@ -822,20 +1009,68 @@ def display_milestones(milestones, project_id, status_options, tab_name):
                     key=status_key
                 )
                 
-                # If status changed, update it
+                if current_status != saved_status:
+                    st.caption(f"Unsaved (was {status_options[saved_status]})")
+                
+                # If status changed, record it as a pending edit
                 if new_status != current_status:
-                    milestone['status'] = new_status
+                    if new_status == saved_status:
+                        pending.pop(milestone_id, None)
+                    else:
+                        pending[milestone_id] = new_status
                     
-                    # Update in database if logged in
-                    if st.session_state.user_logged_in and not is_guest_user(st.session_state.user_info) and 'id' in milestone:
-                        try:
-                            update_milestone_status(milestone['id'], new_status)
-                            st.success("Status updated in database!")
-                        except Exception as e:
-                            st.warning(f"Could not update status in database: {str(e)}")
+                    # The same milestone has a status box in several tabs; reset the others
+                    # so they pick up the new status instead of reverting it
+                    reset_status_widgets(project_id, milestone_id, keep=status_key)
+                    st.rerun()
             
             st.divider()
 
+def reset_status_widgets(project_id, milestone_id=None, keep=None):
+    prefix = f"status_{project_id}_{milestone_id}_" if milestone_id is not None else f"status_{project_id}_"
+    for key in [k for k in st.session_state if str(k).startswith(prefix) and k != keep]:
+        del st.session_state[key]
+
+def save_milestone_edits(project_id, pending):
+    """
+    Apply pending status changes for a project's milestones in one batch.
+    
+    Logged-in users' changes only touch the status column, one request per
+    distinct status, so a title or due date edited elsewhere in the meantime
+    is kept and a deleted milestone is not brought back. Changes that fail
+    stay pending so they can be retried.
+    
+    Args:
+        project_id (str): The project ID
+        pending (dict): Milestone ID to new status; saved entries are removed
+    """
+    milestones = st.session_state.milestones[project_id]
+    edited = {m["id"]: pending[m["id"]] for m in milestones if m.get("id") in pending}
+    
+    if st.session_state.user_logged_in and not is_guest_user(st.session_state.user_info):
+        try:
+            user_id = get_user_property(st.session_state.user_info, "id")
+            results = update_milestone_statuses(user_id, edited)
+        except Exception as e:
+            st.warning(f"Could not save milestone changes to database: {str(e)}")
+            return
+        saved = {r["id"] for r in results if r["ok"]}
+        failed = [r for r in results if not r["ok"]]
+    else:
+        saved, failed = set(pending), []
+    
+    for milestone in milestones:
+        if milestone.get("id") in saved:
+            milestone["status"] = pending.pop(milestone["id"])
+    reset_status_widgets(project_id)
+    
+    if failed:
+        # The tabs haven't rendered yet this run, so carry on and keep the warning on screen
+        st.warning(f"Could not save {len(failed)} of {len(failed) + len(saved)} changes: {failed[0]['error']}")
+        return
+    st.toast(f"Saved {len(saved)} milestone change{'s' if len(saved) != 1 else ''}!")
+    st.rerun()
+
 def show_friction_points_page():
     st.title("Friction & Delight Points Analyzer 🔍")
     
@@ -896,60 +1131,75 @@ def show_friction_points_page():
     
     # If form is submitted, perform analysis
     if analyze_button and project_description and current_status and challenges and goals:
-        with st.spinner("Analyzing your project with Delta 4 framework..."):
-            try:
-                analysis = analyze_delta4(
-                    project_description,
-                    current_status,
-                    challenges,
-                    goals
-                )
-                
-                # Display analysis results
-                st.subheader("Delta 4 Analysis Results")
-                
-                # Summary
-                st.info(analysis.get("summary", "Analysis complete."))
-                
-                # Create tabs for each dimension
-                tech_tab, culture_tab, process_tab, expectation_tab = st.tabs([
-                    "Technical", 
-                    "Cultural", 
-                    "Process", 
-                    "Expectation"
-                ])
-                
-                # Technical dimension
-                with tech_tab:
-                    display_dimension_analysis(analysis, "technical")
-                
-                # Cultural dimension
-                with culture_tab:
-                    display_dimension_analysis(analysis, "cultural")
+        # Analyzing the same inputs again asks for a new analysis rather than the cached one
+        inputs = (project_description, current_status, challenges, goals)
+        refresh = st.session_state.get("delta4_inputs") == inputs
+        st.session_state.delta4_inputs = inputs
+        
+        try:
+            # Display analysis results, filling each section in as it streams
+            st.subheader("Delta 4 Analysis Results")
+            
+            # Summary
+            summary_placeholder = st.empty()
+            summary_placeholder.info("Analyzing your project with Delta 4 framework...")
+            
+            # Create tabs for each dimension
+            tech_tab, culture_tab, process_tab, expectation_tab = st.tabs([
+                "Technical", 
+                "Cultural", 
+                "Process", 
+                "Expectation"
+            ])
+            
+            dimension_placeholders = {}
+            for dimension, tab in [("technical", tech_tab), ("cultural", culture_tab), ("process", process_tab), ("expectation", expectation_tab)]:
+                with tab:
+                    dimension_placeholders[dimension] = st.empty()
+                    dimension_placeholders[dimension].caption("Waiting for analysis...")
+            
+            analysis = {}
+            for path, value in stream_delta4_analysis(
+                project_description,
+                current_status,
+                challenges,
+                goals,
+                refresh=refresh
+            ):
+                analysis = apply_event(analysis, path, value)
                 
-                # Process dimension
-                with process_tab:
-                    display_dimension_analysis(analysis, "process")
+                # Re-render only the dimension that changed (all of them once the full document lands)
+                if not path:
+                    updated_dimensions = list(dimension_placeholders)
+                elif path[0] in dimension_placeholders:
+                    updated_dimensions = [path[0]]
+                else:
+                    updated_dimensions = []
                 
-                # Expectation dimension
-                with expectation_tab:
-                    display_dimension_analysis(analysis, "expectation")
+                for dimension in updated_dimensions:
+                    with dimension_placeholders[dimension].container():
+                        display_dimension_analysis(analysis, dimension, partial=bool(path))
                 
-                # Save analysis button
-                if st.button("Save Analysis to Project", key="save_analysis_button"):
-                    # Logic to save analysis to project data
-                    st.success("Analysis saved to project!")
-                    
-                # Option to download as report
-                st.download_button(
-                    label="Download Analysis Report",
-                    data=generate_delta4_report(selected_project["title"], analysis),
-                    file_name=f"delta4_analysis_{selected_project['title'].lower().replace(' ', '_')}.txt",
-                    mime="text/plain"
-                )
+                if isinstance(analysis.get("summary"), str):
+                    summary_placeholder.info(analysis["summary"])
+            
+            summary_placeholder.info(analysis.get("summary", "Analysis complete."))
+            
+            # Save analysis button
+            if st.button("Save Analysis to Project", key="save_analysis_button"):
+                # Logic to save analysis to project data
+                st.success("Analysis saved to project!")
                 
-            except Exception as e:
-                st.error(f"Error analyzing project: {str(e)}")
+            # Option to download as report
+            st.download_button(
+                label="Download Analysis Report",
+                data=generate_delta4_report(selected_project["title"], analysis),
+                file_name=f"delta4_analysis_{selected_project['title'].lower().replace(' ', '_')}.txt",
+                mime="text/plain"
+            )
+            
+        except Exception as e:
+            st.error(f"Error analyzing project: {str(e)}")
     
     # Display Delta 4 framework information
     with st.expander("Learn More About the Delta 4 Framework"):
@@ -978,7 +1228,8 @@ def show_friction_points_page():
         """)
 
 # Helper function for the Delta 4 analysis display
-def display_dimension_analysis(analysis, dimension):
+# While streaming (partial=True), sections that haven't arrived yet are shown as pending
+def display_dimension_analysis(analysis, dimension, partial=False):
     dimension_data = analysis.get(dimension, {})
     
     # Display friction points
@@ -986,6 +1237,8 @@ def display_dimension_analysis(analysis, dimension):
     if dimension_data.get("friction"):
         for point in dimension_data["friction"]:
             st.markdown(f"- {point}")
+    elif partial and "friction" not in dimension_data:
+        st.caption("Analyzing...")
     else:
         st.write("No friction points identified.")
     
@@ -994,6 +1247,8 @@ def display_dimension_analysis(analysis, dimension):
     if dimension_data.get("delight"):
         for point in dimension_data["delight"]:
             st.markdown(f"- {point}")
+    elif partial and "delight" not in dimension_data:
+        st.caption("Analyzing...")
     else:
         st.write("No delight points identified.")
     
@@ -1002,6 +1257,8 @@ def display_dimension_analysis(analysis, dimension):
     if dimension_data.get("recommendations"):
         for rec in dimension_data["recommendations"]:
             st.markdown(f"- {rec}")
+    elif partial and "recommendations" not in dimension_data:
+        st.caption("Analyzing...")
     else:
         st.write("No recommendations available.")
 
@@ -1078,6 +1335,8 @@ def show_firm_alerts_page():
     if "user_skills" not in st.session_state:
         st.session_state.user_skills = []
     
+    domain = st.session_state.user_data.get("domain_selected", "")
+    
     # Add target company and skills
     col1, col2 = st.columns([2, 1])
     
@@ -1087,7 +1346,7 @@ def show_firm_alerts_page():
             for i, firm in enumerate(st.session_state.target_firms):
                 col_a, col_b = st.columns([0.9, 0.1])
                 with col_a:
-                    st.text(firm)
+                    st.text(firm_label(firm, domain))
                 with col_b:
                     if st.button("❌", key=f"remove_firm_{i}"):
                         st.session_state.target_firms.pop(i)
@@ -1100,6 +1359,7 @@ def show_firm_alerts_page():
             new_firm = st.text_input("Add a target company:", placeholder="e.g., Google, OpenAI, NVIDIA", key="add_company_firm_alerts_1")
             if st.button("Add Company", key="add_company_firm_alerts") and new_firm:
                 st.session_state.target_firms.append(new_firm)
+                prefetch_company_insights(new_firm, domain, st.session_state.user_skills)
                 st.rerun()
     
     with col2:
@@ -1125,127 +1385,184 @@ def show_firm_alerts_page():
         st.warning("Add target companies above to receive insights and alerts.")
         return
     
-    # Display domain information
-    domain = st.session_state.user_data.get("domain_selected", "")
+    # Pick up insights that finished fetching in the background
+    for company in st.session_state.target_firms:
+        if company not in st.session_state.firm_insights:
+            job = get_prefetched_company_insights(company, domain, st.session_state.user_skills)
+            if job and job["status"] == "done":
+                st.session_state.firm_insights[company] = job["result"]
     
     # Tabs for each target firm
     tabs = st.tabs(st.session_state.target_firms)
+    tab_by_company = dict(zip(st.session_state.target_firms, tabs))
+    pending = [company for company in st.session_state.target_firms if company not in st.session_state.firm_insights]
+    
+    # Firms still being fetched in the background are polled instead of fetched again
+    prefetching = []
+    for company in pending:
+        job = get_prefetched_company_insights(company, domain, st.session_state.user_skills)
+        if job and job["status"] in ("queued", "running"):
+            prefetching.append(company)
+            with tab_by_company[company]:
+                show_prefetch_status(company, domain, st.session_state.user_skills)
+    pending = [company for company in pending if company not in prefetching]
+    
+    # Reserve a placeholder in each tab that still needs insights
+    placeholders = {}
+    for company in pending:
+        with tab_by_company[company]:
+            placeholders[company] = st.empty()
+            placeholders[company].info(f"Gathering insights for {company}...")
     
-    for i, tab in enumerate(tabs):
-        company = st.session_state.target_firms[i]
+    # Render the tabs we already have insights for
+    for company, tab in tab_by_company.items():
+        if company in st.session_state.firm_insights:
+            with tab:
+                display_company_insights(company, st.session_state.firm_insights[company], domain)
+    
+    # Fetch the missing companies concurrently, filling each tab in section by section as results stream in
+    partial_insights = {company: {} for company in pending}
+    # Companies whose insights were refreshed skip the cache instead of replaying the old answer
+    refresh = st.session_state.get("insights_refresh", set())
+    for company, path, value, error in iter_company_insight_events(pending, domain=domain,
+                                                                   skills=st.session_state.user_skills,
+                                                                   refresh=refresh & set(pending)):
+        partial_insights[company] = apply_event(partial_insights[company], path, value)
         
-        with tab:
-            # Check if we already have insights for this company
-            if company not in st.session_state.firm_insights:
-                with st.spinner(f"Gathering insights for {company}..."):
-                    try:
-                        insights = get_company_insights(
-                            company,
-                            domain=domain,
-                            skills=st.session_state.user_skills
-                        )
-                        st.session_state.firm_insights[company] = insights
-                    except Exception as e:
-                        st.error(f"Error retrieving insights: {str(e)}")
-                        continue
-            
-            insights = st.session_state.firm_insights[company]
-            
-            # Company overview
-            st.subheader("Company Overview")
-            st.write(insights.get("company_overview", f"No overview available for {company}."))
-            
-            # Recent developments
-            st.subheader("Recent Developments")
-            developments = insights.get("recent_developments", [])
-            if developments:
-                for dev in developments:
-                    with st.container():
-                        st.write(f"**{dev.get('title', 'News item')}**")
-                        st.write(dev.get('description', 'No description available.'))
-                        st.info(f"**Relevance:** {dev.get('relevance', 'No relevance information available.')}")
-                        st.divider()
-            else:
-                st.write("No recent developments found.")
-            
-            # Job trends
-            st.subheader("Job Trends")
-            job_trends = insights.get("job_trends", [])
-            if job_trends:
-                for job in job_trends:
-                    with st.container():
-                        st.write(f"**{job.get('role_type', 'Role')}**")
-                        st.write(f"**Skills sought:** {', '.join(job.get('skills_sought', ['No skills listed']))}")
-                        st.write(f"**Requirements:** {job.get('typical_requirements', 'No requirements listed')}")
-                        st.divider()
-            else:
-                st.write("No job trend information available.")
-            
-            # Skill alignment
-            st.subheader("Your Skill Alignment")
-            skill_alignment = insights.get("skill_alignment", {})
-            if skill_alignment:
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    st.write("**Aligned Skills** ✅")
-                    for skill in skill_alignment.get("aligned_skills", ["None"]):
-                        st.markdown(f"- {skill}")
+        if path:
+            with placeholders[company].container():
+                display_company_insights(company, partial_insights[company], domain, preview=True)
+        else:
+            # Complete: swap the preview for the full, interactive view. Fallback content is
+            # shown but not kept, so the next visit asks the model again
+            placeholders[company].empty()
+            with tab_by_company[company]:
+                if error is None:
+                    st.session_state.firm_insights[company] = value
+                    refresh.discard(company)
+                else:
+                    st.warning(f"Live insights for {company} are unavailable right now; showing general guidance instead.")
+                display_company_insights(company, value, domain)
+
+# Helper function to label a target firm with the status of its background fetch
+def firm_label(firm, domain):
+    if firm in st.session_state.get("firm_insights", {}):
+        return f"{firm} (ready)"
+    job = get_prefetched_company_insights(firm, domain, st.session_state.get("user_skills", []))
+    return f"{firm} ({job['status']})" if job else firm
+
+# Polls a background fetch without blocking the page; reruns the app once it has finished
+@st.experimental_fragment(run_every=2)
+def show_prefetch_status(company, domain, skills):
+    job = get_prefetched_company_insights(company, domain, skills)
+    if job and job["status"] in ("queued", "running"):
+        st.info(f"Gathering insights for {company} in the background ({job['status']})...")
+    else:
+        st.rerun()
+
+# Helper function to display the insights for a single target company
+# (preview=True renders the sections received so far, without any widgets)
+def display_company_insights(company, insights, domain, preview=False):
+    # Company overview
+    st.subheader("Company Overview")
+    st.write(insights.get("company_overview", f"No overview available for {company}."))
+    
+    # Recent developments
+    st.subheader("Recent Developments")
+    developments = insights.get("recent_developments", [])
+    if developments:
+        for dev in developments:
+            with st.container():
+                st.write(f"**{dev.get('title', 'News item')}**")
+                st.write(dev.get('description', 'No description available.'))
+                st.info(f"**Relevance:** {dev.get('relevance', 'No relevance information available.')}")
+                st.divider()
+    else:
+        st.write("No recent developments found.")
+    
+    # Job trends
+    st.subheader("Job Trends")
+    job_trends = insights.get("job_trends", [])
+    if job_trends:
+        for job in job_trends:
+            with st.container():
+                st.write(f"**{job.get('role_type', 'Role')}**")
+                st.write(f"**Skills sought:** {', '.join(job.get('skills_sought', ['No skills listed']))}")
+                st.write(f"**Requirements:** {job.get('typical_requirements', 'No requirements listed')}")
+                st.divider()
+    else:
+        st.write("No job trend information available.")
+    
+    # Skill alignment
+    st.subheader("Your Skill Alignment")
+    skill_alignment = insights.get("skill_alignment", {})
+    if skill_alignment:
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.write("**Aligned Skills** ✅")
+            for skill in skill_alignment.get("aligned_skills", ["None"]):
+                st.markdown(f"- {skill}")
+        
+        with col2:
+            st.write("**Skill Gaps** 🔍")
+            for skill in skill_alignment.get("skill_gaps", ["None"]):
+                st.markdown(f"- {skill}")
+        
+        st.write("**Recommendations**")
+        for rec in skill_alignment.get("recommendations", ["No recommendations available."]):
+            st.markdown(f"- {rec}")
+    else:
+        st.write("No skill alignment information available.")
+    
+    # Project ideas
+    st.subheader("Projects to Showcase")
+    projects = insights.get("projects_to_showcase", [])
+    if projects:
+        for project in projects:
+            with st.container():
+                st.write(f"**{project.get('project_idea', 'Project idea')}**")
+                st.write(f"**Why effective:** {project.get('why_effective', 'No information available.')}")
                 
-                with col2:
-                    st.write("**Skill Gaps** 🔍")
-                    for skill in skill_alignment.get("skill_gaps", ["None"]):
-                        st.markdown(f"- {skill}")
+                # Add to projects button
+                if not preview and st.button(f"Create This Project", key=f"create_project_{company}_{projects.index(project)}"):
+                    if "projects" not in st.session_state:
+                        st.session_state.projects = []
+                    
+                    new_project = {
+                        "title": project.get('project_idea', 'New Project'),
+                        "description": f"Project to showcase skills for {company}: {project.get('why_effective', '')}",
+                        "difficulty": "Intermediate",
+                        "time_estimate": "3-5 weeks",
+                        "tasks": ["Plan project scope", "Set up development environment", "Implement core features", "Test and validate", "Document and present"],
+                        "domain": domain
+                    }
+                    
+                    st.session_state.projects.append(new_project)
+                    st.success(f"Project '{project.get('project_idea')}' added to your projects!")
                 
-                st.write("**Recommendations**")
-                for rec in skill_alignment.get("recommendations", ["No recommendations available."]):
-                    st.markdown(f"- {rec}")
-            else:
-                st.write("No skill alignment information available.")
-            
-            # Project ideas
-            st.subheader("Projects to Showcase")
-            projects = insights.get("projects_to_showcase", [])
-            if projects:
-                for project in projects:
-                    with st.container():
-                        st.write(f"**{project.get('project_idea', 'Project idea')}**")
-                        st.write(f"**Why effective:** {project.get('why_effective', 'No information available.')}")
-                        
-                        # Add to projects button
-                        if st.button(f"Create This Project", key=f"create_project_{company}_{projects.index(project)}"):
-                            if "projects" not in st.session_state:
-                                st.session_state.projects = []
-                            
-                            new_project = {
-                                "title": project.get('project_idea', 'New Project'),
-                                "description": f"Project to showcase skills for {company}: {project.get('why_effective', '')}",
-                                "difficulty": "Intermediate",
-                                "time_estimate": "3-5 weeks",
-                                "tasks": ["Plan project scope", "Set up development environment", "Implement core features", "Test and validate", "Document and present"],
-                                "domain": domain
-                            }
-                            
-                            st.session_state.projects.append(new_project)
-                            st.success(f"Project '{project.get('project_idea')}' added to your projects!")
-                        
-                        st.divider()
-            else:
-                st.write("No project ideas available.")
-            
-            # Refresh data button
-            if st.button("Refresh Insights", key=f"refresh_{company}"):
-                if company in st.session_state.firm_insights:
-                    del st.session_state.firm_insights[company]
-                st.rerun()
-            
-            # Set reminder
-            st.download_button(
-                "Export Insights as PDF",
-                data=generate_company_report(company, insights),
-                file_name=f"{company.lower().replace(' ', '_')}_insights.txt",
-                mime="text/plain"
-            )
+                st.divider()
+    else:
+        st.write("No project ideas available.")
+    
+    if preview:
+        return
+    
+    # Refresh data button
+    if st.button("Refresh Insights", key=f"refresh_{company}"):
+        if company in st.session_state.firm_insights:
+            del st.session_state.firm_insights[company]
+        discard_prefetched_company_insights(company, domain, st.session_state.get("user_skills", []))
+        st.session_state.setdefault("insights_refresh", set()).add(company)
+        st.rerun()
+    
+    # Set reminder
+    st.download_button(
+        "Export Insights as PDF",
+        data=generate_company_report(company, insights),
+        file_name=f"{company.lower().replace(' ', '_')}_insights.txt",
+        mime="text/plain"
+    )
 
 # Helper function to generate a company report
 def generate_company_report(company_name, insights):
@@ -0,0 +1,14 @@
+import time
+
+import pytest
+
+
+@pytest.fixture
+def wait_until():
+    """Poll `predicate` until it is true, failing the test after `timeout` seconds."""
+    def wait(predicate, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while not predicate():
+            assert time.monotonic() < deadline, "timed out"
+            time.sleep(0.001)
+    return wait
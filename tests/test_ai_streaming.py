@@ -0,0 +1,112 @@
+import os
+import tempfile
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("groq")
+
+# Set before the module creates its client and keep the completion cache out of the working tree
+os.environ.setdefault("GROQ_API_KEY", "test")
+os.environ.setdefault("CAREERAI_CACHE_PATH", os.path.join(tempfile.mkdtemp(), "completions.sqlite3"))
+
+from utils import ai_services
+
+
+def test_identical_streams_share_one_request(monkeypatch, wait_until):
+    gate = threading.Event()
+    requests = []
+
+    def fake_stream_request(function_name, request, messages, key, parse):
+        requests.append(request)
+        gate.wait(5)
+        yield "Hello "
+        yield "world"
+
+    monkeypatch.setattr(ai_services, "_stream_request", fake_stream_request)
+    messages = [{"role": "user", "content": "same prompt"}]
+    results = []
+
+    def read():
+        results.append("".join(ai_services._stream_chat_completion(
+            "generate_daily_post", messages, temperature=0.7, refresh=True
+        )))
+
+    before = ai_services.get_coalescing_stats()
+    threads = [threading.Thread(target=read) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    wait_until(lambda: ai_services.get_coalescing_stats()["coalesced"] - before["coalesced"] == 3)
+    gate.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(requests) == 1
+    assert results == ["Hello world"] * 4
+
+
+def test_closing_insight_events_does_not_wait_for_queued_companies(monkeypatch):
+    closed = []
+
+    def fake_company_stream(company, domain=None, skills=None, refresh=False):
+        try:
+            for section in range(50):
+                time.sleep(0.02)
+                yield ("company_overview",), f"{company} {section}"
+        finally:
+            closed.append(company)
+
+    monkeypatch.setattr(ai_services, "_stream_company_insights", fake_company_stream)
+    companies = [f"Firm {i}" for i in range(8)]
+
+    events = ai_services.iter_company_insight_events(companies, max_workers=2)
+    assert next(events)[0] in companies
+    started = time.monotonic()
+    events.close()
+
+    # Draining the batch would take 8 companies x 1s / 2 workers
+    assert time.monotonic() - started < 0.5
+    time.sleep(0.1)
+    # The two running companies were stopped and closed; the queued ones never started
+    assert len(closed) == 2
+
+
+def test_closing_delta4_dimensions_does_not_wait_for_running_ones(monkeypatch):
+    def fake_dimension(dimension, inputs, refresh=False):
+        if dimension != "technical":
+            time.sleep(1)
+        return {"friction_points": [dimension], "delight_points": []}
+
+    monkeypatch.setattr(ai_services, "_analyze_delta4_dimension", fake_dimension)
+
+    events = ai_services.iter_delta4_dimensions("project", "status", "challenges", "goals")
+    assert next(events)[0] == ("technical",)
+    started = time.monotonic()
+    events.close()
+
+    # Leaving the executor block would wait out the three slow dimensions
+    assert time.monotonic() - started < 0.5
+
+
+def test_closing_company_insights_drops_queued_companies(monkeypatch):
+    fetched = []
+
+    def fake_fetch(company, domain=None, skills=None, refresh=False):
+        fetched.append(company)
+        if len(fetched) > 1:
+            time.sleep(0.5)
+        return {"company_overview": company}
+
+    monkeypatch.setattr(ai_services, "_fetch_company_insights", fake_fetch)
+    companies = [f"Firm {i}" for i in range(8)]
+
+    results = ai_services.iter_company_insights(companies, max_workers=2)
+    assert next(results)[0] in companies
+    started = time.monotonic()
+    results.close()
+
+    assert time.monotonic() - started < 0.3
+    time.sleep(0.7)
+    # Only the companies already running were fetched
+    assert len(fetched) <= 3
@@ -0,0 +1,176 @@
+import pytest
+
+pytest.importorskip("supabase")
+
+from utils import supabase as db
+
+
+class FakeQuery:
+    """Just enough of the postgrest-py builder for the keyset readers."""
+
+    def __init__(self, rows, log):
+        self.rows = rows
+        self.log = log
+        self.predicates = []
+        self.negate = False
+        self.sort = []
+        self.limit_count = None
+        self.offset_count = 0
+
+    def select(self, columns):
+        return self
+
+    def _filter(self, predicate):
+        negate, self.negate = self.negate, False
+        self.predicates.append((lambda row: not predicate(row)) if negate else predicate)
+        return self
+
+    @property
+    def not_(self):
+        self.negate = True
+        return self
+
+    def eq(self, column, value):
+        return self._filter(lambda row: row.get(column) == value)
+
+    def is_(self, column, value):
+        return self._filter(lambda row: row.get(column) is None)
+
+    def gte(self, column, value):
+        return self._filter(lambda row: row[column] is not None and row[column] >= value)
+
+    def lte(self, column, value):
+        return self._filter(lambda row: row[column] is not None and row[column] <= value)
+
+    def gt(self, column, value):
+        return self._filter(lambda row: row[column] > value)
+
+    def lt(self, column, value):
+        return self._filter(lambda row: row[column] < value)
+
+    def order(self, spec):
+        self.sort = [(part.split(".")[0], part.endswith(".desc")) for part in spec.split(",")]
+        return self
+
+    def limit(self, count):
+        self.limit_count = count
+        return self
+
+    def offset(self, count):
+        self.offset_count = count
+        return self
+
+    def run(self):
+        rows = [row for row in self.rows if all(predicate(row) for predicate in self.predicates)]
+        for column, desc in reversed(self.sort):
+            rows.sort(key=lambda row: row[column], reverse=desc)
+        rows = rows[self.offset_count:self.offset_count + self.limit_count]
+        self.log.append(len(rows))
+        return rows
+
+
+class FakeClient:
+    def __init__(self, rows, log):
+        self.rows = rows
+        self.log = log
+
+    def table(self, name):
+        return FakeQuery(self.rows, self.log)
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+@pytest.fixture
+def pages(monkeypatch):
+    table, log = [], []
+    monkeypatch.setattr(db, "_query", lambda query: FakeResponse(query(FakeClient(table, log)).run()))
+    return table, log
+
+
+def milestones(due_dates, user_id="u1"):
+    return [
+        {"id": f"m{i:03d}", "user_id": user_id, "project_id": "project_0", "due_date": due}
+        for i, due in enumerate(due_dates)
+    ]
+
+
+def test_pages_in_order_with_ties_across_page_boundaries(pages):
+    table, log = pages
+    # Runs of equal due dates longer than a page, which an offset-free keyset must not skip or repeat
+    due_dates = ["2026-01-01"] * 7 + ["2026-01-02"] * 2 + ["2026-01-03"] * 5
+    table.extend(milestones(due_dates))
+
+    rows = list(db.iter_project_milestones("u1", page_size=3))
+
+    assert [row["id"] for row in rows] == [f"m{i:03d}" for i in range(len(due_dates))]
+    assert all(size <= 3 for size in log)
+
+
+def test_null_sort_keys_come_last_and_are_paged_by_id(pages):
+    table, _ = pages
+    table.extend(milestones([None, "2026-02-01", None, "2026-01-01", None, None]))
+
+    rows = list(db.iter_project_milestones("u1", page_size=2))
+
+    assert [row["id"] for row in rows] == ["m003", "m001", "m000", "m002", "m004", "m005"]
+
+
+def test_newest_first_pages_descending(pages):
+    table, _ = pages
+    table.extend(
+        {"id": f"p{i}", "user_id": "u1", "project_id": "project_0", "timestamp": timestamp}
+        for i, timestamp in enumerate(["2026-01-01", "2026-01-03", None, "2026-01-02", "2026-01-03"])
+    )
+
+    rows = list(db.iter_user_progress("u1", page_size=2))
+
+    assert [row["id"] for row in rows] == ["p4", "p1", "p3", "p0", "p2"]
+
+
+def test_only_the_requested_users_rows_are_read(pages):
+    table, _ = pages
+    table.extend(milestones(["2026-01-01", "2026-01-02"], user_id="u1"))
+    table.extend(milestones(["2026-01-01"], user_id="u2"))
+
+    assert len(list(db.iter_project_milestones("u2", page_size=1))) == 1
+
+
+def test_later_pages_are_only_fetched_when_reached(pages):
+    table, log = pages
+    table.extend(milestones([f"2026-01-{day:02d}" for day in range(1, 21)]))
+
+    reader = db.iter_project_milestones("u1", page_size=5)
+    next(reader)
+
+    assert log == [5]
+
+
+def test_milestone_counts_read_statuses_a_page_at_a_time(pages, monkeypatch):
+    table, log = pages
+    monkeypatch.setattr(db, "PAGE_SIZE", 4)
+    statuses = ["completed"] * 5 + ["in_progress"] * 3 + ["at_risk"] + [None]
+    for row, status in zip(milestones(["2026-01-01"] * len(statuses), user_id="u3"), statuses):
+        table.append({**row, "status": status})
+
+    counts = db.get_milestone_counts("u3", "project_0")
+
+    assert counts == {"not_started": 0, "in_progress": 3, "completed": 5, "delayed": 0, "at_risk": 1}
+    # Three pages of statuses plus the empty page of undated milestones, not one request per status
+    assert log == [4, 4, 2, 0]
+
+
+def test_user_milestone_counts_read_every_project_together(pages):
+    table, log = pages
+    for project_id, statuses in (("project_0", ["completed", "delayed"]), ("project_1", ["completed"] * 3)):
+        for row, status in zip(milestones(["2026-01-01"] * len(statuses), user_id="u4"), statuses):
+            table.append({**row, "id": f"{project_id}-{row['id']}", "project_id": project_id, "status": status})
+
+    counts = db.get_user_milestone_counts("u4")
+
+    assert counts["project_0"] == {"not_started": 0, "in_progress": 0, "completed": 1, "delayed": 1, "at_risk": 0}
+    assert counts["project_1"]["completed"] == 3
+    # One page of dated milestones and one of undated ones, not a request per project
+    assert len(log) == 2
@@ -0,0 +1,175 @@
+import pytest
+
+from utils import resilience
+from utils.resilience import CircuitBreaker, CircuitOpenError, RetryPolicy
+
+
+class Transient(Exception):
+    pass
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Replaces the module's reference to `time`, not the time module itself
+    clock = Clock()
+    monkeypatch.setattr(resilience, "time", clock)
+    return clock
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_lets_one_probe_through_and_closes_on_success(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.before_call()
+
+
+def test_failed_probe_reopens_the_breaker(clock):
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=30)
+    for _ in range(5):
+        breaker.record_failure()
+    clock.now += 30
+    breaker.before_call()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.stats()["times_opened"] == 2
+
+
+def test_is_open_only_until_a_probe_is_due(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    assert not breaker.is_open()
+    breaker.record_failure()
+    assert breaker.is_open()
+    # The router may offer the model again once a probe would be let through
+    clock.now += 30
+    assert not breaker.is_open()
+    assert breaker.stats()["rejected"] == 0
+
+
+def test_released_probe_lets_the_next_one_through(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+    breaker.before_call()
+    # e.g. the probe failed with a bad request, which says nothing about the dependency
+    breaker.release()
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+
+def test_retry_policy_retries_transient_errors_then_succeeds(clock):
+    policy = RetryPolicy(lambda e: isinstance(e, Transient), max_retries=2, base_delay=1, max_delay=8)
+    breaker = CircuitBreaker(failure_threshold=5)
+    outcomes = [Transient(), Transient(), "ok"]
+
+    def call():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert policy.call(call, breaker=breaker) == "ok"
+    assert policy.stats() == {"attempts": 3, "retries": 2, "exhausted": 0}
+    assert len(clock.slept) == 2
+    assert 0 <= clock.slept[0] <= 1 and 0 <= clock.slept[1] <= 2
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.consecutive_failures == 0
+
+
+def test_retry_policy_gives_up_after_max_retries(clock):
+    policy = RetryPolicy(lambda e: True, max_retries=2)
+    breaker = CircuitBreaker(failure_threshold=3)
+
+    def call():
+        raise Transient()
+
+    with pytest.raises(Transient):
+        policy.call(call, breaker=breaker)
+    assert policy.stats() == {"attempts": 3, "retries": 2, "exhausted": 1}
+    # Every failed attempt counted against the breaker, which is now open
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_retry_policy_raises_other_errors_at_once(clock):
+    policy = RetryPolicy(lambda e: isinstance(e, Transient), max_retries=3)
+    breaker = CircuitBreaker(failure_threshold=1)
+
+    def call():
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        policy.call(call, breaker=breaker)
+    assert policy.stats()["attempts"] == 1
+    assert clock.slept == []
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_retry_policy_honours_retry_after(clock):
+    policy = RetryPolicy(lambda e: True, max_retries=1, max_delay=8, retry_after=lambda e: 3.0)
+    outcomes = [Transient(), "ok"]
+
+    def call():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert policy.call(call) == "ok"
+    assert clock.slept == [3.0]
+
+
+def test_retry_policy_stops_when_the_breaker_opens(clock):
+    policy = RetryPolicy(lambda e: True, max_retries=5)
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=300)
+    attempts = []
+
+    def call():
+        attempts.append(1)
+        raise Transient()
+
+    with pytest.raises(CircuitOpenError):
+        policy.call(call, breaker=breaker)
+    assert len(attempts) == 2
@@ -0,0 +1,137 @@
+import threading
+
+import pytest
+
+from utils.single_flight import SingleFlight
+
+
+def test_do_coalesces_concurrent_calls(wait_until):
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return {"answer": 42}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("key", fetch))) for _ in range(4)]
+    threads[0].start()
+    wait_until(lambda: flight.stats()["in_flight"])
+    for thread in threads[1:]:
+        thread.start()
+    wait_until(lambda: flight.stats()["coalesced"] == 3)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert results == [{"answer": 42}] * 4
+    assert flight.stats() == {"executed": 1, "coalesced": 3, "in_flight": 0}
+
+
+def test_do_shares_the_error_and_forgets_the_key():
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        flight.do("key", fail)
+    # A finished call is not reused
+    assert flight.do("key", lambda: "again") == "again"
+    assert flight.stats()["executed"] == 2
+
+
+def test_stream_replays_buffered_items_to_a_late_reader():
+    flight = SingleFlight()
+    pulled = []
+
+    def source():
+        for item in ("a", "b", "c"):
+            pulled.append(item)
+            yield item
+
+    first = flight.stream("key", source)
+    assert next(first) == "a"
+    assert next(first) == "b"
+
+    second = flight.stream("key", source)
+    assert list(second) == ["a", "b", "c"]
+    assert list(first) == ["c"]
+    # The source was consumed once for both readers
+    assert pulled == ["a", "b", "c"]
+    assert flight.stats() == {"executed": 1, "coalesced": 1, "in_flight": 0}
+
+
+def test_stream_reader_leaving_early_does_not_stall_the_others():
+    flight = SingleFlight()
+    first = flight.stream("key", lambda: iter(range(5)))
+    second = flight.stream("key", lambda: iter(range(5)))
+
+    assert next(first) == 0
+    first.close()
+    assert list(second) == [0, 1, 2, 3, 4]
+
+
+def test_stream_closes_the_source_once_every_reader_has_left():
+    flight = SingleFlight()
+    closed = []
+
+    def source():
+        try:
+            yield from range(100)
+        finally:
+            closed.append(True)
+
+    first = flight.stream("key", source)
+    second = flight.stream("key", source)
+    next(first)
+    next(second)
+    first.close()
+    assert not closed
+    second.close()
+    assert closed == [True]
+    # The abandoned stream is forgotten, so the next reader starts a new one
+    assert list(flight.stream("key", lambda: iter(["fresh"]))) == ["fresh"]
+
+
+def test_stream_raises_the_error_in_every_reader_after_its_items():
+    flight = SingleFlight()
+
+    def source():
+        yield "partial"
+        raise RuntimeError("stream broke")
+
+    first = flight.stream("key", source)
+    second = flight.stream("key", source)
+    assert next(first) == "partial"
+    with pytest.raises(RuntimeError):
+        next(first)
+    assert next(second) == "partial"
+    with pytest.raises(RuntimeError):
+        next(second)
+
+
+def test_stream_coalesces_concurrent_readers(wait_until):
+    flight = SingleFlight()
+    gate = threading.Event()
+    started = []
+
+    def source():
+        started.append(1)
+        gate.wait(5)
+        yield from ("x", "y")
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(list(flight.stream("key", source)))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    wait_until(lambda: flight.stats()["executed"] + flight.stats()["coalesced"] == 4)
+    gate.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(started) == 1
+    assert results == [["x", "y"]] * 4
@@ -0,0 +1,134 @@
+import threading
+
+import pytest
+
+from utils.write_behind import WriteBehindBuffer
+
+
+class Recorder:
+    """write_batch stand-in that records batches and can fail or block on demand."""
+
+    def __init__(self):
+        self.batches = []
+        self.failures = 0
+        self.gate = None
+        self.entered = threading.Event()
+
+    def __call__(self, table, rows, context):
+        self.entered.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("insert failed")
+        self.batches.append((table, context, [row["n"] for row in rows]))
+
+
+@pytest.fixture
+def recorder():
+    return Recorder()
+
+
+@pytest.fixture
+def make_buffer(recorder):
+    buffers = []
+
+    def make(**kwargs):
+        # A long flush interval keeps the background thread idle unless a test wants it
+        kwargs.setdefault("flush_interval", 60)
+        kwargs.setdefault("retry_delay", 0)
+        buffer = WriteBehindBuffer(recorder, **kwargs)
+        buffers.append(buffer)
+        return buffer
+
+    yield make
+    for buffer in buffers:
+        buffer.close()
+
+
+def test_flush_writes_queued_rows_in_bulk(recorder, make_buffer):
+    buffer = make_buffer(max_batch=3)
+    for n in range(5):
+        buffer.add("ikigai_logs", {"user_id": "u1", "n": n}, "session-1")
+    assert recorder.batches == []
+
+    buffer.flush()
+
+    assert recorder.batches == [("ikigai_logs", "session-1", [0, 1, 2]), ("ikigai_logs", "session-1", [3, 4])]
+    assert buffer.stats()["pending_rows"] == 0
+    assert buffer.stats()["rows_written"] == 5
+
+
+def test_flush_can_be_narrowed_to_a_table_and_user(recorder, make_buffer):
+    buffer = make_buffer()
+    buffer.add("projects", {"user_id": "u1", "n": 1})
+    buffer.add("projects", {"user_id": "u2", "n": 2})
+    buffer.add("ikigai_logs", {"user_id": "u1", "n": 3})
+
+    buffer.flush("projects", "u1")
+
+    assert recorder.batches == [("projects", None, [1])]
+    assert buffer.stats()["pending_rows"] == 2
+
+
+def test_failed_flush_keeps_rows_queued_ahead_of_newer_ones(recorder, make_buffer):
+    buffer = make_buffer(max_retries=5)
+    buffer.add("projects", {"user_id": "u1", "n": 1})
+    recorder.failures = 1
+
+    buffer.flush()
+    # The failed batch is requeued rather than dropped, and flush returns without it
+    assert recorder.batches == []
+    assert buffer.stats()["pending_rows"] == 1
+    assert buffer.stats()["retries"] == 1
+
+    buffer.add("projects", {"user_id": "u1", "n": 2})
+    buffer.flush()
+    assert recorder.batches == [("projects", None, [1, 2])]
+
+
+def test_rows_are_dropped_after_max_retries(recorder, make_buffer):
+    buffer = make_buffer(max_retries=1)
+    buffer.add("projects", {"user_id": "u1", "n": 1})
+    recorder.failures = 2
+
+    buffer.flush()
+    buffer.flush()
+
+    assert recorder.batches == []
+    assert buffer.stats()["rows_failed"] == 1
+    assert buffer.stats()["pending_rows"] == 0
+
+
+def test_flush_waits_for_a_batch_the_background_thread_is_writing(recorder, make_buffer, wait_until):
+    recorder.gate = threading.Event()
+    buffer = make_buffer(flush_interval=0)
+    buffer.add("projects", {"user_id": "u1", "n": 1})
+    assert recorder.entered.wait(5)
+
+    flushed = threading.Event()
+    threading.Thread(target=lambda: (buffer.flush("projects", "u1"), flushed.set()), daemon=True).start()
+    wait_until(lambda: buffer.stats()["in_flight_batches"] == 1)
+    assert not flushed.wait(0.05)
+
+    recorder.gate.set()
+    assert flushed.wait(5)
+    assert recorder.batches == [("projects", None, [1])]
+
+
+def test_flush_does_not_wait_for_other_users_batches(recorder, make_buffer):
+    recorder.gate = threading.Event()
+    buffer = make_buffer(flush_interval=0)
+    buffer.add("projects", {"user_id": "u2", "n": 1})
+    assert recorder.entered.wait(5)
+
+    # u2's batch is stuck in flight; u1 has nothing queued, so this returns at once
+    buffer.flush("projects", "u1")
+    recorder.gate.set()
+
+
+def test_close_writes_everything_still_queued(recorder):
+    buffer = WriteBehindBuffer(recorder, flush_interval=60)
+    buffer.add("projects", {"user_id": "u1", "n": 1})
+    buffer.close()
+    assert recorder.batches == [("projects", None, [1])]
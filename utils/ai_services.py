@@ -1,14 +1,254 @@
 import os
+import json
 from dotenv import load_dotenv
-from groq import Groq
+from groq import Groq, APIConnectionError, APIStatusError, RateLimitError
 import re
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from utils.background_jobs import BackgroundJobs
+from utils.json_stream import JSONStreamParser
+from utils.llm_cache import CompletionCache, make_cache_key
+from utils.metrics import registry, start_http_server, start_snapshot_writer
+from utils.model_router import ModelRouter
+from utils.semantic_cache import SemanticCache
+from utils.single_flight import SingleFlight
+from utils.scheduler import RequestScheduler, INTERACTIVE, BACKGROUND
+from utils.resilience import CircuitBreaker, RetryPolicy
+from utils.token_usage import UsageTracker, estimate_tokens, truncate_to_tokens
 
 
 # Load environment variables
 load_dotenv(override=True)
 
-# Initialize Groq client
-client = Groq(api_key=os.environ.get("GROQ_API_KEY"))
+# Initialize Groq client; retries are handled by retry_policy below.
+# CAREERAI_LLM_BACKEND=stub points it at the offline server from utils/stub_server.py
+if os.environ.get("CAREERAI_LLM_BACKEND", "groq") == "stub":
+    client = Groq(
+        api_key=os.environ.get("GROQ_API_KEY") or "stub",
+        base_url=os.environ.get("CAREERAI_STUB_URL", "http://127.0.0.1:8787"),
+        max_retries=0
+    )
+else:
+    client = Groq(api_key=os.environ.get("GROQ_API_KEY"), max_retries=0)
+
+MODEL = "deepseek-r1-distill-llama-70b"
+FAST_MODEL = "llama-3.1-8b-instant"
+
+
+def _model_chain(name, default):
+    return [model.strip() for model in os.environ.get(name, default).split(",") if model.strip()]
+
+
+# Model tiers, each an ordered fallback chain. Short, low-stakes text goes to the
+# small model; reasoning-heavy tasks use the 70B model and drop to a faster one
+# only while it is slow or failing.
+MODEL_TIERS = {
+    "reasoning": _model_chain("CAREERAI_MODELS_REASONING", f"{MODEL},llama-3.3-70b-versatile,{FAST_MODEL}"),
+    "fast": _model_chain("CAREERAI_MODELS_FAST", f"{FAST_MODEL},{MODEL}")
+}
+FUNCTION_TIER = {
+    "generate_domain_suggestion": "reasoning",
+    "generate_social_media_post": "fast",
+    "generate_daily_post": "reasoning",
+    "analyze_delta4": "reasoning",
+    "analyze_delta4_dimension": "reasoning",
+    "summarize_delta4": "fast",
+    "get_company_profile": "reasoning",
+    "get_company_alignment": "fast"
+}
+model_router = ModelRouter(
+    FUNCTION_TIER,
+    MODEL_TIERS,
+    default_tier="reasoning",
+    p95_threshold=float(os.environ.get("CAREERAI_ROUTER_P95_SECONDS", 20)),
+    error_rate_threshold=float(os.environ.get("CAREERAI_ROUTER_ERROR_RATE", 0.5)),
+    window=float(os.environ.get("CAREERAI_ROUTER_WINDOW", 300))
+)
+
+# Persistent completion cache shared by every function in this module
+completion_cache = CompletionCache(
+    os.environ.get("CAREERAI_CACHE_PATH", os.path.join(".cache", "completions.sqlite3")),
+    max_age=int(os.environ.get("CAREERAI_CACHE_MAX_AGE", 7 * 24 * 3600)),
+    max_bytes=int(os.environ.get("CAREERAI_CACHE_MAX_BYTES", 50 * 1024 * 1024))
+)
+
+# Coalesces identical requests made concurrently across Streamlit sessions
+single_flight = SingleFlight()
+
+# Admission control shared by every Groq call in this process
+scheduler = RequestScheduler(
+    requests_per_minute=int(os.environ.get("CAREERAI_GROQ_RPM", 30)),
+    tokens_per_minute=int(os.environ.get("CAREERAI_GROQ_TPM", 15000))
+)
+
+# Every function serves a page the user is waiting on; only prefetches pass
+# priority=BACKGROUND, so they are admitted after (and shed before) on-screen requests
+FUNCTION_PRIORITY = {
+    "generate_domain_suggestion": INTERACTIVE,
+    "generate_social_media_post": INTERACTIVE,
+    "generate_daily_post": INTERACTIVE,
+    "analyze_delta4": INTERACTIVE,
+    "analyze_delta4_dimension": INTERACTIVE,
+    "summarize_delta4": INTERACTIVE,
+    "get_company_profile": INTERACTIVE,
+    "get_company_alignment": INTERACTIVE
+}
+
+# Per-call timeouts in seconds; functions not listed use REQUEST_TIMEOUT
+REQUEST_TIMEOUT = float(os.environ.get("CAREERAI_GROQ_TIMEOUT", 30))
+FUNCTION_TIMEOUT = {
+    "generate_social_media_post": 15.0,
+    "analyze_delta4": 60.0,
+    "analyze_delta4_dimension": 45.0,
+    "get_company_profile": 60.0
+}
+
+
+def _is_retryable(error):
+    # Timeouts, connection failures, rate limits and server errors are transient
+    if isinstance(error, (APIConnectionError, RateLimitError)):
+        return True
+    return isinstance(error, APIStatusError) and error.status_code >= 500
+
+
+def _retry_after(error):
+    # Honour the server's Retry-After header on 429/503 responses
+    if isinstance(error, APIStatusError):
+        try:
+            return float(error.response.headers.get("retry-after"))
+        except (TypeError, ValueError):
+            return None
+    return None
+
+
+# One breaker per model, shared by every session: once a model is down all sessions
+# skip it instantly, and the router moves on to the next model in the tier
+circuit_breakers = {}
+_circuit_breakers_lock = threading.Lock()
+
+
+def _circuit_breaker(model):
+    with _circuit_breakers_lock:
+        if model not in circuit_breakers:
+            circuit_breakers[model] = CircuitBreaker(
+                failure_threshold=int(os.environ.get("CAREERAI_BREAKER_THRESHOLD", 5)),
+                reset_timeout=float(os.environ.get("CAREERAI_BREAKER_RESET", 30))
+            )
+        return circuit_breakers[model]
+
+
+retry_policy = RetryPolicy(
+    _is_retryable,
+    max_retries=int(os.environ.get("CAREERAI_GROQ_RETRIES", 2)),
+    retry_after=_retry_after
+)
+
+# Completion tokens charged against the budget before the real usage is known
+EXPECTED_COMPLETION_TOKENS = 1024
+
+# Explicit max_tokens for the visible answer of each call
+MAX_COMPLETION_TOKENS = {
+    "generate_domain_suggestion": 2048,
+    "generate_social_media_post": 1024,
+    "generate_daily_post": 2048,
+    "analyze_delta4": 4096,
+    "analyze_delta4_dimension": 2048,
+    "summarize_delta4": 1024,
+    "get_company_profile": 3072,
+    "get_company_alignment": 1536
+}
+
+# Models that think in a <think> block before answering. That block counts against
+# max_tokens, so they get REASONING_TOKEN_BUDGET on top of the answer cap above
+REASONING_MODELS = set(_model_chain("CAREERAI_REASONING_MODELS", MODEL))
+REASONING_TOKEN_BUDGET = int(os.environ.get("CAREERAI_REASONING_TOKENS", 4096))
+
+
+class CompletionTruncated(Exception):
+    """
+    Raised when a completion hit max_tokens or has no answer outside its <think> block.
+
+    `visible` tells whether any answer text was already streamed to the caller.
+    """
+
+    def __init__(self, message, visible=False):
+        super().__init__(message)
+        self.visible = visible
+
+
+# Token budgets for user-supplied inputs; longer values are truncated before prompting
+INPUT_TOKEN_BUDGETS = {
+    "generate_domain_suggestion": {"passion": 400, "strengths": 400},
+    "generate_social_media_post": {"project_title": 50, "domain": 50, "tasks_completed": 200},
+    "generate_daily_post": {"project_title": 50, "domain": 50, "goals_for_today": 300, "learnings": 600},
+    "analyze_delta4": {"project_description": 400, "current_status": 400, "challenges": 500, "goals": 400},
+    "get_company_profile": {"company_name": 30},
+    "get_company_alignment": {"company_name": 30, "domain": 50}
+}
+
+# Token usage per function, priced per million tokens for the daily cost estimate
+usage_tracker = UsageTracker(
+    prompt_price_per_million=float(os.environ.get("CAREERAI_PROMPT_PRICE", 0.75)),
+    completion_price_per_million=float(os.environ.get("CAREERAI_COMPLETION_PRICE", 0.99))
+)
+
+# Run Delta 4 as one request per dimension plus a summary instead of one large request
+DELTA4_PARALLEL = os.environ.get("CAREERAI_DELTA4_PARALLEL", "1") != "0"
+
+# Maximum number of concurrent requests made by the batch company insights API
+INSIGHTS_CONCURRENCY = int(os.environ.get("CAREERAI_INSIGHTS_CONCURRENCY", 4))
+
+# Near-duplicate cache for ikigai answers, keyed on (passion, strengths)
+domain_suggestion_cache = SemanticCache(
+    fields=2,
+    threshold=float(os.environ.get("CAREERAI_SEMANTIC_THRESHOLD", 0.9)),
+    max_entries=int(os.environ.get("CAREERAI_SEMANTIC_MAX_ENTRIES", 512))
+)
+
+# Company profiles don't depend on the user, so they are shared by everyone but refreshed sooner
+COMPANY_PROFILE_TTL = int(os.environ.get("CAREERAI_COMPANY_PROFILE_TTL", 24 * 3600))
+
+# Cache lifetimes stricter than the cache-wide CAREERAI_CACHE_MAX_AGE
+CACHE_MAX_AGE = {
+    "get_company_profile": COMPANY_PROFILE_TTL
+}
+
+# Firm insights fetched in the background as soon as a firm is added, shared by all sessions
+insights_prefetcher = BackgroundJobs(
+    max_workers=int(os.environ.get("CAREERAI_PREFETCH_WORKERS", 2)),
+    result_ttl=COMPANY_PROFILE_TTL,
+    thread_name_prefix="insights-prefetch"
+)
+
+# Hot-path metrics for every Groq call, exported via CAREERAI_METRICS_PORT and/or CAREERAI_METRICS_SNAPSHOT
+metrics = registry
+metrics.describe("careerai_llm_requests_total", "counter", "Groq requests by function, model and outcome")
+metrics.describe("careerai_llm_request_duration_seconds", "histogram", "Time from sending a Groq request to its last token")
+metrics.describe("careerai_llm_time_to_first_token_seconds", "histogram", "Time from sending a streamed Groq request to its first token")
+metrics.describe("careerai_llm_tokens_total", "counter", "Prompt and completion tokens by function and model")
+metrics.describe("careerai_llm_reasoning_tokens_total", "counter", "Estimated <think> tokens in streamed completions by function and model")
+metrics.describe("careerai_llm_in_flight", "gauge", "Groq requests currently in flight")
+metrics.describe("careerai_llm_cache_lookups_total", "counter", "Completion and semantic cache lookups by result")
+metrics.describe("careerai_ai_fallbacks_total", "counter", "Calls answered with canned fallback content")
+
+if os.environ.get("CAREERAI_METRICS_PORT"):
+    try:
+        start_http_server(metrics, int(os.environ["CAREERAI_METRICS_PORT"]))
+    except OSError as e:
+        # Another process (e.g. a second Streamlit worker) already serves the port
+        print(f"Metrics endpoint not started: {e}")
+if os.environ.get("CAREERAI_METRICS_SNAPSHOT"):
+    start_snapshot_writer(
+        metrics,
+        os.environ["CAREERAI_METRICS_SNAPSHOT"],
+        interval=float(os.environ.get("CAREERAI_METRICS_INTERVAL", 15))
+    )
+
+# Functions that should always hit the API, e.g. CAREERAI_CACHE_OPT_OUT=generate_daily_post,get_company_alignment
+CACHE_OPT_OUT = {name.strip() for name in os.environ.get("CAREERAI_CACHE_OPT_OUT", "").split(",") if name.strip()}
 
 
 
@@ -22,14 +262,573 @@ def remove_think_tags(text: str) -> str:
     Returns:
         str: Cleaned string without the <think> blocks.
     """
-    return re.sub(r'<think>.*?</think>', '', text, flags=re.DOTALL).strip()
+    text = re.sub(r'<think>.*?</think>', '', text, flags=re.DOTALL)
+    # A block cut off by max_tokens never closes; everything after it is reasoning too
+    return re.sub(r'<think>.*', '', text, flags=re.DOTALL).strip()
+
 
+class ThinkTagFilter:
+    """
+    Incremental version of `remove_think_tags` for streamed responses.
+    
+    Feed raw chunks in arrival order; visible text is returned as soon as it
+    is known to lie outside a <think>...</think> block. Only a trailing
+    fragment that could be the start of a tag split across chunks is held
+    back until the next chunk arrives.
+    
+    Attributes:
+        reasoning_chars (int): Characters discarded inside <think> blocks
+        reasoning_tokens (int): Estimated tokens discarded inside <think> blocks
+    """
+    
+    OPEN_TAG = "<think>"
+    CLOSE_TAG = "</think>"
+    
+    def __init__(self):
+        self._reasoning = []
+        self._inside = False
+        self._buffer = ""
+        self._started = False
+    
+    @staticmethod
+    def _partial_tag_length(text, tag):
+        # Length of the longest suffix of text that is a proper prefix of tag
+        for length in range(min(len(tag) - 1, len(text)), 0, -1):
+            if text.endswith(tag[:length]):
+                return length
+        return 0
+    
+    @property
+    def reasoning_chars(self):
+        return sum(len(text) for text in self._reasoning)
+    
+    @property
+    def reasoning_tokens(self):
+        # Estimated over the whole text, since a chunk can end mid-word
+        return estimate_tokens("".join(self._reasoning))
+    
+    def feed(self, chunk):
+        """
+        Process one raw chunk.
+        
+        Args:
+            chunk (str): Raw text from the stream
+        
+        Returns:
+            str: Newly visible text (may be empty)
+        """
+        self._buffer += chunk
+        visible = []
+        
+        while self._buffer:
+            if self._inside:
+                end = self._buffer.find(self.CLOSE_TAG)
+                if end >= 0:
+                    self._reasoning.append(self._buffer[:end])
+                    self._buffer = self._buffer[end + len(self.CLOSE_TAG):]
+                    self._inside = False
+                    continue
+                keep = self._partial_tag_length(self._buffer, self.CLOSE_TAG)
+                self._reasoning.append(self._buffer[:len(self._buffer) - keep])
+                self._buffer = self._buffer[len(self._buffer) - keep:]
+                break
+            
+            start = self._buffer.find(self.OPEN_TAG)
+            if start >= 0:
+                visible.append(self._buffer[:start])
+                self._buffer = self._buffer[start + len(self.OPEN_TAG):]
+                self._inside = True
+                continue
+            keep = self._partial_tag_length(self._buffer, self.OPEN_TAG)
+            visible.append(self._buffer[:len(self._buffer) - keep])
+            self._buffer = self._buffer[len(self._buffer) - keep:]
+            break
+        
+        return self._emit("".join(visible))
+    
+    def flush(self):
+        """
+        Finish the stream and release any held-back text.
+        
+        An unterminated <think> block is discarded rather than shown.
+        
+        Returns:
+            str: Remaining visible text (may be empty)
+        """
+        remainder, self._buffer = self._buffer, ""
+        if self._inside:
+            self._reasoning.append(remainder)
+            return ""
+        return self._emit(remainder)
+    
+    def _emit(self, text):
+        # Match remove_think_tags, which strips leading whitespace left behind by the block
+        if not self._started:
+            text = text.lstrip()
+            self._started = bool(text)
+        return text
 
 
-def generate_domain_suggestion(passion, strengths):
+# Discarded reasoning per function, filled in by streaming calls
+reasoning_stats = {}
+
+
+def _record_reasoning(function_name, model, think_filter):
+    reasoning_tokens = think_filter.reasoning_tokens
+    stats = reasoning_stats.setdefault(
+        function_name,
+        {"calls": 0, "reasoning_tokens": 0, "reasoning_chars": 0, "last_reasoning_tokens": 0}
+    )
+    stats["calls"] += 1
+    stats["reasoning_tokens"] += reasoning_tokens
+    stats["reasoning_chars"] += think_filter.reasoning_chars
+    stats["last_reasoning_tokens"] = reasoning_tokens
+    metrics.inc("careerai_llm_reasoning_tokens_total", {"function": function_name, "model": model}, reasoning_tokens)
+
+
+def _build_request(function_name, messages, temperature, response_format=None):
+    model = model_router.choose(function_name, available=lambda name: not _circuit_breaker(name).is_open())
+    request = {"model": model, "messages": messages, "temperature": temperature}
+    if function_name in MAX_COMPLETION_TOKENS:
+        request["max_tokens"] = MAX_COMPLETION_TOKENS[function_name]
+        if model in REASONING_MODELS:
+            request["max_tokens"] += REASONING_TOKEN_BUDGET
+    if response_format:
+        request["response_format"] = response_format
+    return request
+
+
+def _with_larger_cap(request):
+    # One retry for a truncated answer, with twice the room
+    if "max_tokens" not in request:
+        return request
+    return {**request, "max_tokens": request["max_tokens"] * 2}
+
+
+def _check_complete(function_name, finish_reason, content, visible=False):
     """
-    Generate domain suggestions based on user's passion and strengths.
+    Reject a completion that was cut off or is all reasoning.
+
+    Args:
+        function_name (str): Name of the calling function, for the error message
+        finish_reason (str): The choice's finish_reason, None if unknown
+        content (str): Full raw response text
+        visible (bool): Whether answer text was already streamed to the caller
+
+    Raises:
+        CompletionTruncated: If the answer hit max_tokens or is empty once <think> is removed
     """
+    if finish_reason == "length":
+        raise CompletionTruncated(f"{function_name} response hit max_tokens", visible)
+    if not remove_think_tags(content or ""):
+        raise CompletionTruncated(f"{function_name} response has no answer outside <think>", visible)
+
+
+def _estimate_prompt_tokens(messages):
+    return sum(estimate_tokens(message["content"]) for message in messages)
+
+
+def _expected_tokens(function_name, messages):
+    # Prompt plus the completion we expect, used for admission before real usage is known
+    expected_completion = min(EXPECTED_COMPLETION_TOKENS, MAX_COMPLETION_TOKENS.get(function_name, EXPECTED_COMPLETION_TOKENS))
+    return _estimate_prompt_tokens(messages) + expected_completion
+
+
+def _enforce_input_budget(function_name, **fields):
+    """
+    Truncate user-supplied inputs that exceed the function's token budget.
+
+    Args:
+        function_name (str): Name of the calling function
+        **fields: Input values by parameter name
+
+    Returns:
+        tuple: The field values in the order given, with over-budget strings shortened
+    """
+    budgets = INPUT_TOKEN_BUDGETS.get(function_name, {})
+    return tuple(
+        truncate_to_tokens(value, budgets[name]) if isinstance(value, str) and name in budgets else value
+        for name, value in fields.items()
+    )
+
+
+def get_usage_report():
+    """
+    Get aggregate token usage per function for capacity planning.
+
+    Returns:
+        dict: Per function calls, token totals, averages, p95 sizes and cost of the last 24 hours
+    """
+    return usage_tracker.report()
+
+
+def _record_usage(function_name, model, prompt_tokens, completion_tokens, estimated=False):
+    usage_tracker.record(function_name, prompt_tokens, completion_tokens, model=model, estimated=estimated)
+    metrics.inc("careerai_llm_tokens_total", {"function": function_name, "model": model, "kind": "prompt"}, prompt_tokens)
+    metrics.inc("careerai_llm_tokens_total", {"function": function_name, "model": model, "kind": "completion"}, completion_tokens)
+
+
+def _record_cache_lookup(function_name, cache, hit):
+    metrics.inc("careerai_llm_cache_lookups_total", {"function": function_name, "cache": cache, "result": "hit" if hit else "miss"})
+
+
+def _record_fallback(function_name):
+    metrics.inc("careerai_ai_fallbacks_total", {"function": function_name})
+
+
+def _send_request(function_name, request, estimated_tokens, priority=None, **kwargs):
+    """
+    Send a request to Groq with admission control, a timeout, retries and the circuit breaker.
+
+    Args:
+        function_name (str): Name of the calling function, used for priority and timeout
+        request (dict): Completion parameters from `_build_request`
+        estimated_tokens (int): Tokens to charge against the scheduler budget
+        priority (int, optional): Scheduler priority, defaults to FUNCTION_PRIORITY
+        **kwargs: Extra arguments for `client.chat.completions.create` (e.g. stream=True)
+
+    Returns:
+        tuple: The Groq response (or stream), the tokens charged for the
+            successful attempt, to settle with `scheduler.record_usage`, and
+            the monotonic time that attempt was sent. Callers record the
+            model's latency with `model_router.record` once the response is
+            fully received; only failures are recorded here.
+    """
+    timeout = FUNCTION_TIMEOUT.get(function_name, REQUEST_TIMEOUT)
+    if priority is None:
+        priority = FUNCTION_PRIORITY.get(function_name, INTERACTIVE)
+
+    def attempt():
+        charged = scheduler.acquire(priority, estimated_tokens)
+        sent = time.monotonic()
+        try:
+            response = client.chat.completions.create(**request, timeout=timeout, **kwargs)
+        except Exception as e:
+            # A failed attempt used no tokens; each retry is charged afresh
+            scheduler.refund(charged)
+            if _is_retryable(e):
+                model_router.record(function_name, request["model"], time.monotonic() - sent, ok=False)
+            raise
+        return response, charged, sent
+
+    return retry_policy.call(attempt, breaker=_circuit_breaker(request["model"]))
+
+
+def get_coalescing_stats():
+    """
+    Get how many identical concurrent requests and streams were coalesced.
+
+    Returns:
+        dict: executed, coalesced and in_flight counts
+    """
+    return single_flight.stats()
+
+
+def get_scheduler_stats():
+    """
+    Get request scheduler queue and rate budget metrics.
+
+    Returns:
+        dict: queue depth, admitted/shed counts, wait times and remaining budgets
+    """
+    return scheduler.stats()
+
+
+def get_resilience_stats():
+    """
+    Get circuit breaker state and retry counters.
+
+    Returns:
+        dict: "circuit_breakers" per model and "retries" metrics
+    """
+    return {
+        "circuit_breakers": {model: breaker.stats() for model, breaker in list(circuit_breakers.items())},
+        "retries": retry_policy.stats()
+    }
+
+
+def get_metrics_text():
+    """
+    Get the app's metrics in the Prometheus text exposition format.
+
+    Returns:
+        str: Exposition text
+    """
+    return metrics.render_prometheus()
+
+
+def write_metrics_snapshot(path):
+    """
+    Write a JSON snapshot of the app's metrics.
+
+    Args:
+        path (str): Destination file
+    """
+    metrics.write_snapshot(path)
+
+
+def get_routing_stats():
+    """
+    Get per-model latency and error rates and which model served each function.
+
+    Returns:
+        dict: "models" health and "served" request counts per function
+    """
+    return model_router.stats()
+
+
+def _chat_completion(function_name, messages, temperature, response_format=None, parse=None, refresh=False,
+                     priority=None):
+    """
+    Run a chat completion through the persistent cache and single-flight layer.
+
+    The raw response is only cached once `parse` has accepted it, so a
+    malformed JSON body is never replayed from the cache. A response cut
+    off at max_tokens is retried once with a larger cap and never cached.
+
+    Args:
+        function_name (str): Name of the calling function, used for the cache opt-out
+        messages (list): Chat messages to send
+        temperature (float): Sampling temperature
+        response_format (dict, optional): Groq response_format parameter
+        parse (callable, optional): Converts the raw response text into the return value
+        refresh (bool): Skip the cache lookup and overwrite the entry with a new response
+        priority (int, optional): Scheduler priority, defaults to FUNCTION_PRIORITY
+
+    Returns:
+        The parsed response (raw text if no `parse` is given)
+    """
+    parse = parse or (lambda text: text)
+    request = _build_request(function_name, messages, temperature, response_format)
+    use_cache = function_name not in CACHE_OPT_OUT
+    key = make_cache_key(request)
+
+    if use_cache and not refresh:
+        cached = completion_cache.get(key, max_age=CACHE_MAX_AGE.get(function_name))
+        _record_cache_lookup(function_name, "completion", cached is not None)
+        if cached is not None:
+            try:
+                _check_complete(function_name, None, cached)
+                return parse(cached)
+            except Exception:
+                completion_cache.delete(key)
+
+    def send(request):
+        estimated_tokens = _expected_tokens(function_name, messages)
+        labels = {"function": function_name, "model": request["model"]}
+        metrics.inc("careerai_llm_in_flight", {"function": function_name})
+        try:
+            response, charged_tokens, sent = _send_request(function_name, request, estimated_tokens, priority)
+        except Exception:
+            metrics.inc("careerai_llm_requests_total", {**labels, "outcome": "error"})
+            raise
+        finally:
+            metrics.dec("careerai_llm_in_flight", {"function": function_name})
+        # Measured from the successful attempt, excluding scheduler wait and retries
+        latency = time.monotonic() - sent
+        model_router.record(function_name, request["model"], latency)
+        metrics.observe("careerai_llm_request_duration_seconds", latency, labels)
+        metrics.inc("careerai_llm_requests_total", {**labels, "outcome": "success"})
+        content = response.choices[0].message.content
+
+        usage = getattr(response, "usage", None)
+        if usage:
+            scheduler.record_usage(charged_tokens, usage.total_tokens)
+            _record_usage(function_name, response.model, usage.prompt_tokens, usage.completion_tokens)
+        else:
+            prompt_tokens, completion_tokens = _estimate_prompt_tokens(messages), estimate_tokens(content or "")
+            scheduler.record_usage(charged_tokens, prompt_tokens + completion_tokens)
+            _record_usage(function_name, request["model"], prompt_tokens, completion_tokens, estimated=True)
+        _check_complete(function_name, response.choices[0].finish_reason, content)
+        return content
+
+    def fetch():
+        try:
+            content = send(request)
+        except CompletionTruncated as e:
+            print(f"Retrying with a larger max_tokens: {e}")
+            content = send(_with_larger_cap(request))
+        parse(content)
+
+        # Stored under the original request, which is what later callers will look up
+        if use_cache:
+            completion_cache.set(key, content)
+
+        return content
+
+    # Identical requests already in flight (e.g. from another session) share one API call;
+    # each caller parses its own copy so results are never shared mutable objects.
+    # A refresh gets its own flight, so it never joins a call that started before it
+    return parse(single_flight.do(("refresh", key) if refresh else key, fetch))
+
+
+def _stream_chat_completion(function_name, messages, temperature, response_format=None, parse=None, refresh=False):
+    """
+    Stream a chat completion, yielding visible text chunks as they arrive.
+
+    A cached response is replayed as a single chunk. Concurrent identical
+    streams share one API call through `single_flight.stream`. A fully received
+    stream is written back to the cache so the blocking variant can reuse it.
+    A stream cut off at max_tokens is never cached; if it had not shown any
+    answer text yet it is retried once with a larger cap, otherwise
+    CompletionTruncated is raised after the partial answer.
+
+    Args:
+        function_name (str): Name of the calling function, used for the cache opt-out
+        messages (list): Chat messages to send
+        temperature (float): Sampling temperature
+        response_format (dict, optional): Groq response_format parameter
+        parse (callable, optional): Must accept the full raw response before it is cached
+        refresh (bool): Skip the cache lookup and overwrite the entry with a new response
+
+    Yields:
+        str: Visible response text with <think> blocks removed
+    """
+    request = _build_request(function_name, messages, temperature, response_format)
+    use_cache = function_name not in CACHE_OPT_OUT
+    key = make_cache_key(request)
+
+    if use_cache and not refresh:
+        cached = completion_cache.get(key, max_age=CACHE_MAX_AGE.get(function_name))
+        _record_cache_lookup(function_name, "completion", cached is not None)
+        if cached is not None and remove_think_tags(cached):
+            yield remove_think_tags(cached)
+            return
+
+    def stream():
+        try:
+            yield from _stream_request(function_name, request, messages, key if use_cache else None, parse)
+        except CompletionTruncated as e:
+            if e.visible:
+                raise
+            print(f"Retrying with a larger max_tokens: {e}")
+            yield from _stream_request(function_name, _with_larger_cap(request), messages, key if use_cache else None, parse)
+
+    # Identical streams already in flight share one API call: later readers replay the
+    # chunks received so far and then follow the live stream. Kept apart from the
+    # blocking flights, which return raw text rather than visible chunks
+    yield from single_flight.stream(("stream", "refresh", key) if refresh else ("stream", key), stream)
+
+
+def _stream_request(function_name, request, messages, key, parse):
+    # One streamed attempt of _stream_chat_completion; the response is cached under `key` unless it is None
+    estimated_tokens = _expected_tokens(function_name, messages)
+    labels = {"function": function_name, "model": request["model"]}
+    think_filter = ThinkTagFilter()
+    parts = []
+    visible_sent = False
+    finish_reason = None
+    ttft = None
+
+    def settle():
+        # Streamed chunks carry no usage block, so estimate it from what was received
+        _record_reasoning(function_name, request["model"], think_filter)
+        prompt_tokens = _estimate_prompt_tokens(messages)
+        completion_tokens = estimate_tokens("".join(parts))
+        scheduler.record_usage(charged_tokens, prompt_tokens + completion_tokens)
+        _record_usage(function_name, request["model"], prompt_tokens, completion_tokens, estimated=True)
+
+    stream = None
+    metrics.inc("careerai_llm_in_flight", {"function": function_name})
+    try:
+        stream, charged_tokens, sent = _send_request(function_name, request, estimated_tokens, stream=True)
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].finish_reason:
+                finish_reason = chunk.choices[0].finish_reason
+            text = chunk.choices[0].delta.content if chunk.choices else None
+            if not text:
+                continue
+            if not parts:
+                ttft = time.monotonic() - sent
+                metrics.observe("careerai_llm_time_to_first_token_seconds", ttft, labels)
+            parts.append(text)
+            visible = think_filter.feed(text)
+            if visible:
+                visible_sent = True
+                yield visible
+    except GeneratorExit:
+        # The consumer stopped reading (e.g. the Streamlit script was rerun);
+        # settle with what was received so far and release the connection
+        metrics.inc("careerai_llm_requests_total", {**labels, "outcome": "abandoned"})
+        think_filter.flush()
+        settle()
+        if hasattr(stream, "close"):
+            stream.close()
+        raise
+    except Exception as e:
+        metrics.inc("careerai_llm_requests_total", {**labels, "outcome": "error"})
+        if stream is not None:
+            # Settle the budget with what the broken stream actually used
+            settle()
+            # A stream that dies midway is not retried, but still counts against the breaker
+            if _is_retryable(e):
+                _circuit_breaker(request["model"]).record_failure()
+                model_router.record(function_name, request["model"], 0.0, ok=False)
+        raise
+    finally:
+        metrics.dec("careerai_llm_in_flight", {"function": function_name})
+    # Total latency, comparable with blocking calls; time to first token is kept alongside.
+    # Both are measured from when the successful attempt was sent
+    latency = time.monotonic() - sent
+    model_router.record(function_name, request["model"], latency, ttft=ttft)
+    metrics.observe("careerai_llm_request_duration_seconds", latency, labels)
+    metrics.inc("careerai_llm_requests_total", {**labels, "outcome": "success"})
+
+    tail = think_filter.flush()
+    settle()
+    if tail:
+        visible_sent = True
+        yield tail
+
+    content = "".join(parts)
+    _check_complete(function_name, finish_reason, content, visible_sent)
+    if key is not None:
+        try:
+            if parse:
+                parse(content)
+            completion_cache.set(key, content)
+        except Exception as e:
+            print(f"Not caching unparseable response for {function_name}: {e}")
+
+
+
+def _parse_json_response(text):
+    return json.loads(remove_think_tags(text))
+
+
+def _stream_json_completion(function_name, messages, temperature, max_depth=2, refresh=False):
+    """
+    Stream a JSON-mode completion, yielding values as soon as they are complete.
+
+    Args:
+        function_name (str): Name of the calling function
+        messages (list): Chat messages to send
+        temperature (float): Sampling temperature
+        max_depth (int): Deepest path reported before the final document
+        refresh (bool): Bypass the completion cache, see `_stream_chat_completion`
+
+    Yields:
+        tuple: (path, value) events from JSONStreamParser, ending with ((), document)
+    """
+    parser = JSONStreamParser(max_depth=max_depth)
+    for chunk in _stream_chat_completion(
+        function_name,
+        messages,
+        temperature,
+        response_format={"type": "json_object"},
+        parse=_parse_json_response,
+        refresh=refresh
+    ):
+        yield from parser.feed(chunk)
+
+    if not parser.done:
+        raise ValueError("Streamed response ended before the JSON document was complete")
+
+
+
+def _domain_suggestion_messages(passion, strengths):
+    passion, strengths = _enforce_input_budget("generate_domain_suggestion", passion=passion, strengths=strengths)
+    
     prompt = f"""
     Based on the following information about a person interested in AI/ML careers,
     suggest the most suitable domain specialization for them.
@@ -44,22 +843,14 @@ def generate_domain_suggestion(passion, strengths):
     3. A brief explanation of why this domain aligns with their interests and market demand
     """
     
-    try:
-        response = client.chat.completions.create(
-            model="deepseek-r1-distill-llama-70b",
-            messages=[
-                {"role": "system", "content": "You are a career advisor specializing in AI/ML career paths."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7
-        )
-        
-        return remove_think_tags(response.choices[0].message.content)
-    
-    except Exception as e:
-        print(f"Error generating domain suggestion: {e}")
-        # Fallback response in case of API issues
-        return f"""
+    return [
+        {"role": "system", "content": "You are a career advisor specializing in AI/ML career paths."},
+        {"role": "user", "content": prompt}
+    ]
+
+def _domain_suggestion_fallback():
+    # Fallback response in case of API issues
+    return f"""
         Based on your interests and strengths, Natural Language Processing (NLP) seems like an excellent domain match for you.
         
         Potential areas within NLP:
@@ -71,10 +862,86 @@ def generate_domain_suggestion(passion, strengths):
         This domain aligns well with current market demands, as companies increasingly seek to automate customer interactions and extract insights from text data.
         """
 
-def generate_social_media_post(project_title, domain, tasks_completed, progress_percentage):
+def generate_domain_suggestion(passion, strengths, refresh=False):
+    """
+    Generate domain suggestions based on user's passion and strengths.
+    
+    Pass refresh=True to generate a new suggestion instead of reusing a cached one.
+    """
+    use_cache = "generate_domain_suggestion" not in CACHE_OPT_OUT
+    if use_cache and not refresh:
+        similar = domain_suggestion_cache.get(passion, strengths)
+        _record_cache_lookup("generate_domain_suggestion", "semantic", similar is not None)
+        if similar is not None:
+            return similar
+    
+    try:
+        suggestion = _chat_completion(
+            "generate_domain_suggestion",
+            messages=_domain_suggestion_messages(passion, strengths),
+            temperature=0.7,
+            parse=remove_think_tags,
+            refresh=refresh
+        )
+    
+    except Exception as e:
+        print(f"Error generating domain suggestion: {e}")
+        _record_fallback("generate_domain_suggestion")
+        return _domain_suggestion_fallback()
+    
+    if use_cache:
+        domain_suggestion_cache.set(suggestion, passion, strengths)
+    return suggestion
+
+def stream_domain_suggestion(passion, strengths, refresh=False):
+    """
+    Streaming variant of `generate_domain_suggestion` for `st.write_stream`.
+    
+    Yields:
+        str: Visible text chunks as they arrive from the model
+    """
+    use_cache = "generate_domain_suggestion" not in CACHE_OPT_OUT
+    if use_cache and not refresh:
+        similar = domain_suggestion_cache.get(passion, strengths)
+        _record_cache_lookup("generate_domain_suggestion", "semantic", similar is not None)
+        if similar is not None:
+            yield similar
+            return
+    
+    chunks = []
+    try:
+        for chunk in _stream_chat_completion(
+            "generate_domain_suggestion",
+            messages=_domain_suggestion_messages(passion, strengths),
+            temperature=0.7,
+            refresh=refresh
+        ):
+            chunks.append(chunk)
+            yield chunk
+    
+    except Exception as e:
+        print(f"Error streaming domain suggestion: {e}")
+        # Only fall back if nothing was shown yet, otherwise keep the partial answer
+        if not chunks:
+            _record_fallback("generate_domain_suggestion")
+            yield _domain_suggestion_fallback()
+        return
+    
+    suggestion = "".join(chunks).strip()
+    if use_cache and suggestion:
+        domain_suggestion_cache.set(suggestion, passion, strengths)
+
+def generate_social_media_post(project_title, domain, tasks_completed, progress_percentage, refresh=False):
     """
     Generate social media posts for LinkedIn/Twitter based on project progress.
+    
+    Pass refresh=True to write a new post instead of reusing the cached one.
     """
+    project_title, domain, tasks_completed = _enforce_input_budget(
+        "generate_social_media_post",
+        project_title=project_title, domain=domain, tasks_completed=tasks_completed
+    )
+    
     prompt = f"""
     Generate a concise, engaging social media post about progress on an AI/ML project.
     
@@ -89,19 +956,21 @@ def generate_social_media_post(project_title, domain, tasks_completed, progress_
     """
     
     try:
-        response = client.chat.completions.create(
-            model="deepseek-r1-distill-llama-70b",
+        return _chat_completion(
+            "generate_social_media_post",
             messages=[
                 {"role": "system", "content": "You are a professional social media content creator who specializes in tech and AI."},
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.7
+            temperature=0.7,
+            # The fallback chain can end on a reasoning model, whose <think> block must not be posted
+            parse=remove_think_tags,
+            refresh=refresh
         )
-        
-        return response.choices[0].message.content
     
     except Exception as e:
         # Fallback response in case of API issues
+        _record_fallback("generate_social_media_post")
         milestone = "just started" if progress_percentage < 30 else "making good progress on" if progress_percentage < 60 else "nearly finished with" if progress_percentage < 100 else "just completed"
         
         return f"""I've {milestone} my {project_title} project! ({progress_percentage}% complete)
@@ -113,25 +982,11 @@ Key accomplishments:
 
 #buildinpublic #careerAI #100DaysOfCode""" 
 
-def generate_daily_post(project_title, domain, day_number, goals_for_today, learnings, target_firms=None):
-    """
-    Generate a daily build-in-public post for consistent sharing.
-    
-    Args:
-        project_title (str): The title of the project
-        domain (str): The domain of the project (e.g., NLP, Computer Vision)
-        day_number (int): The day number of the project (e.g., Day 5 of 100)
-        goals_for_today (str): What the user planned to accomplish today
-        learnings (str): What the user learned or accomplished
-        target_firms (list, optional): List of target companies to mention
-    
-    Returns:
-        str: A formatted social media post
-    """
-    firms_text = ""
-    if target_firms and len(target_firms) > 0:
-        firms_list = ", ".join(target_firms[:-1]) + f" and {target_firms[-1]}" if len(target_firms) > 1 else target_firms[0]
-        firms_text = f"\n\nBuilding skills relevant for roles at {firms_list}."
+def _daily_post_messages(project_title, domain, day_number, goals_for_today, learnings, target_firms=None):
+    project_title, domain, goals_for_today, learnings = _enforce_input_budget(
+        "generate_daily_post",
+        project_title=project_title, domain=domain, goals_for_today=goals_for_today, learnings=learnings
+    )
     
     prompt = f"""
     Generate a daily build-in-public post for an AI career journey.
@@ -152,55 +1007,97 @@ def generate_daily_post(project_title, domain, day_number, goals_for_today, lear
     5. Be optimized for LinkedIn's format (paragraphs, emojis ok)
     """
     
-    try:
-        response = client.chat.completions.create(
-            model="deepseek-r1-distill-llama-70b",
-            messages=[
-                {"role": "system", "content": "You are a professional content creator specializing in tech career development content."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7
-        )
-        
-        return remove_think_tags(response.choices[0].message.content)
+    return [
+        {"role": "system", "content": "You are a professional content creator specializing in tech career development content."},
+        {"role": "user", "content": prompt}
+    ]
+
+def _daily_post_fallback(domain, day_number, goals_for_today, learnings, target_firms=None):
+    firms_text = ""
+    if target_firms and len(target_firms) > 0:
+        firms_list = ", ".join(target_firms[:-1]) + f" and {target_firms[-1]}" if len(target_firms) > 1 else target_firms[0]
+        firms_text = f"\n\nBuilding skills relevant for roles at {firms_list}."
     
-    except Exception as e:
-        print(f"Error generating daily post: {e}")
-        # Fallback response in case of API issues
-        fallback_post = f"""#Day{day_number} of my #100DaysOfCode journey in {domain} 🚀
+    # Built outside the f-string, which can't hold a backslash before Python 3.12
+    learnings_list = learnings.replace('\n', '\n- ')
+    
+    # Fallback response in case of API issues
+    fallback_post = f"""#Day{day_number} of my #100DaysOfCode journey in {domain} 🚀
 
 Today I focused on: {goals_for_today}
 
 What I learned:
-- {learnings.replace('\n', '\n- ')}
+- {learnings_list}
 
 {firms_text}
 
 #buildinpublic #careerAI #{domain.replace(' ', '')}"""
-        
-        return fallback_post 
+    
+    return fallback_post
 
-def analyze_delta4(project_description, current_status, challenges, goals):
+def generate_daily_post(project_title, domain, day_number, goals_for_today, learnings, target_firms=None, refresh=False):
     """
-    Use the Delta 4 framework to analyze friction and delight points in a project.
-    
-    The Delta 4 framework examines:
-    - Technical Friction: Technical challenges and bottlenecks
-    - Cultural Friction: Team dynamics, communication issues
-    - Process Friction: Workflow and methodology problems
-    - Expectation Friction: Misalignment between expectations and reality
-    
-    As well as corresponding delight points in each area.
+    Generate a daily build-in-public post for consistent sharing.
     
     Args:
-        project_description (str): Brief description of the project
-        current_status (str): Current status and progress of the project
-        challenges (str): Current challenges and issues faced
-        goals (str): Goals and expectations for the project
+        project_title (str): The title of the project
+        domain (str): The domain of the project (e.g., NLP, Computer Vision)
+        day_number (int): The day number of the project (e.g., Day 5 of 100)
+        goals_for_today (str): What the user planned to accomplish today
+        learnings (str): What the user learned or accomplished
+        target_firms (list, optional): List of target companies to mention
+        refresh (bool): Write a new post instead of reusing the cached one
     
     Returns:
-        dict: Analysis results with friction and delight points categorized
+        str: A formatted social media post
+    """
+    try:
+        return _chat_completion(
+            "generate_daily_post",
+            messages=_daily_post_messages(project_title, domain, day_number, goals_for_today, learnings, target_firms),
+            temperature=0.7,
+            parse=remove_think_tags,
+            refresh=refresh
+        )
+    
+    except Exception as e:
+        print(f"Error generating daily post: {e}")
+        _record_fallback("generate_daily_post")
+        return _daily_post_fallback(domain, day_number, goals_for_today, learnings, target_firms)
+
+def stream_daily_post(project_title, domain, day_number, goals_for_today, learnings, target_firms=None, refresh=False):
     """
+    Streaming variant of `generate_daily_post` for `st.write_stream`.
+    
+    Takes the same arguments as `generate_daily_post`.
+    
+    Yields:
+        str: Visible text chunks of the post as they arrive from the model
+    """
+    emitted = False
+    try:
+        for chunk in _stream_chat_completion(
+            "generate_daily_post",
+            messages=_daily_post_messages(project_title, domain, day_number, goals_for_today, learnings, target_firms),
+            temperature=0.7,
+            refresh=refresh
+        ):
+            emitted = True
+            yield chunk
+    
+    except Exception as e:
+        print(f"Error streaming daily post: {e}")
+        # Only fall back if nothing was shown yet, otherwise keep the partial answer
+        if not emitted:
+            _record_fallback("generate_daily_post")
+            yield _daily_post_fallback(domain, day_number, goals_for_today, learnings, target_firms)
+
+def _delta4_messages(project_description, current_status, challenges, goals):
+    project_description, current_status, challenges, goals = _enforce_input_budget(
+        "analyze_delta4",
+        project_description=project_description, current_status=current_status, challenges=challenges, goals=goals
+    )
+    
     prompt = f"""
     Analyze the following project using the Delta 4 framework to identify friction and delight points:
     
@@ -243,68 +1140,326 @@ def analyze_delta4(project_description, current_status, challenges, goals):
     }}
     """
     
+    return [
+        {"role": "system", "content": "You are an expert project analyst specializing in identifying friction and delight points in technical projects."},
+        {"role": "user", "content": prompt}
+    ]
+
+def _delta4_fallback():
+    # Fallback response in case of API issues
+    return {
+        "technical": {
+            "friction": ["API integration challenges", "Performance bottlenecks"],
+            "delight": ["Core functionality works well"],
+            "recommendations": ["Review API documentation", "Implement caching"]
+        },
+        "cultural": {
+            "friction": ["Communication gaps"],
+            "delight": ["Team enthusiasm for the project"],
+            "recommendations": ["Regular check-ins", "Document decisions"]
+        },
+        "process": {
+            "friction": ["Unclear task priorities"],
+            "delight": ["Regular commits"],
+            "recommendations": ["Implement project board", "Define milestone criteria"]
+        },
+        "expectation": {
+            "friction": ["Timeline may be optimistic"],
+            "delight": ["Clear project vision"],
+            "recommendations": ["Revisit timeline", "Break down large tasks"]
+        },
+        "summary": "Project shows promise but faces some technical and process challenges. With better task prioritization and addressing technical bottlenecks, progress should improve."
+    }
+
+# Each dimension's prompt only includes the inputs it depends on, so its completion
+# cache entry survives edits to the others (e.g. changing only the goals re-runs
+# only the expectation dimension)
+DELTA4_DIMENSIONS = {
+    "technical": {
+        "title": "Technical",
+        "focus": "technical challenges, bottlenecks, tooling, code and infrastructure quality",
+        "inputs": ("project_description", "current_status", "challenges")
+    },
+    "cultural": {
+        "title": "Cultural",
+        "focus": "collaboration, communication, knowledge sharing and motivation",
+        "inputs": ("project_description", "challenges")
+    },
+    "process": {
+        "title": "Process",
+        "focus": "workflow, planning, prioritization and methodology",
+        "inputs": ("project_description", "current_status", "challenges")
+    },
+    "expectation": {
+        "title": "Expectation",
+        "focus": "alignment between goals, timelines, scope and what is realistic",
+        "inputs": ("project_description", "current_status", "goals")
+    }
+}
+
+_DELTA4_INPUT_LABELS = {
+    "project_description": "Project Description",
+    "current_status": "Current Status",
+    "challenges": "Challenges",
+    "goals": "Goals"
+}
+
+def _delta4_dimension_messages(dimension, inputs):
+    spec = DELTA4_DIMENSIONS[dimension]
+    context = "\n    ".join(f"{_DELTA4_INPUT_LABELS[name]}: {inputs[name]}" for name in spec["inputs"])
+    
+    prompt = f"""
+    Analyze the following project using the Delta 4 framework.
+    
+    Dimension: {spec["title"]}
+    Focus on {spec["focus"]}.
+    
+    {context}
+    
+    Identify:
+    
+    1. Friction Points: Issues, challenges, or bottlenecks
+    2. Delight Points: Successes, positive aspects, or opportunities
+    
+    Analyze deeply, providing specific, actionable insights rather than generic observations.
+    
+    Format your response as JSON with the following structure:
+    {{
+        "friction": ["point 1", "point 2", ...],
+        "delight": ["point 1", "point 2", ...],
+        "recommendations": ["recommendation 1", "recommendation 2", ...]
+    }}
+    """
+    
+    return [
+        {"role": "system", "content": f"You are an expert project analyst specializing in the {spec['title']} dimension of the Delta 4 framework."},
+        {"role": "user", "content": prompt}
+    ]
+
+def _parse_delta4_dimension(text):
+    result = _parse_json_response(text)
+    for key in ("friction", "delight", "recommendations"):
+        if not isinstance(result.get(key), list):
+            raise ValueError(f"Dimension analysis is missing '{key}'")
+    return {key: result[key] for key in ("friction", "delight", "recommendations")}
+
+def _analyze_delta4_dimension(dimension, inputs, refresh=False):
+    return _chat_completion(
+        "analyze_delta4_dimension",
+        messages=_delta4_dimension_messages(dimension, inputs),
+        temperature=0.3,
+        response_format={"type": "json_object"},
+        parse=_parse_delta4_dimension,
+        refresh=refresh
+    )
+
+def _summarize_delta4(project_description, dimensions, refresh=False):
+    prompt = f"""
+    Write a brief overall assessment of a project's health from its Delta 4 analysis.
+    
+    Project Description: {project_description}
+    
+    Analysis by dimension:
+    {json.dumps(dimensions, indent=2, sort_keys=True)}
+    
+    Format your response as JSON with the following structure:
+    {{
+        "summary": "Brief overall assessment of the project's health"
+    }}
+    """
+    
+    return _chat_completion(
+        "summarize_delta4",
+        messages=[
+            {"role": "system", "content": "You are an expert project analyst summarizing a Delta 4 analysis."},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.3,
+        response_format={"type": "json_object"},
+        parse=lambda text: str(_parse_json_response(text)["summary"]),
+        refresh=refresh
+    )
+
+def iter_delta4_dimensions(project_description, current_status, challenges, goals, refresh=False):
+    """
+    Run the four Delta 4 dimensions as concurrent requests, then summarize them.
+    
+    Dimensions whose inputs are unchanged since an earlier run are served from
+    the completion cache. A dimension that fails falls back on its own, without
+    affecting the others.
+    
+    Takes the same arguments as `analyze_delta4`.
+    
+    Yields:
+        tuple: (path, value) events in the format of `stream_delta4_analysis`:
+            ((dimension,), {...}) as each dimension completes, then
+            (("summary",), "..."), and finally ((), full_analysis)
+    """
+    project_description, current_status, challenges, goals = _enforce_input_budget(
+        "analyze_delta4",
+        project_description=project_description, current_status=current_status, challenges=challenges, goals=goals
+    )
+    inputs = {
+        "project_description": project_description,
+        "current_status": current_status,
+        "challenges": challenges,
+        "goals": goals
+    }
+    
+    analysis = {}
+    executor = ThreadPoolExecutor(max_workers=len(DELTA4_DIMENSIONS), thread_name_prefix="delta4")
     try:
-        response = client.chat.completions.create(
-            model="deepseek-r1-distill-llama-70b",
-            messages=[
-                {"role": "system", "content": "You are an expert project analyst specializing in identifying friction and delight points in technical projects."},
-                {"role": "user", "content": prompt}
-            ],
+        futures = {
+            executor.submit(_analyze_delta4_dimension, dimension, inputs, refresh): dimension
+            for dimension in DELTA4_DIMENSIONS
+        }
+        for future in as_completed(futures):
+            dimension = futures[future]
+            try:
+                analysis[dimension] = future.result()
+            except Exception as e:
+                print(f"Error analyzing {dimension} dimension: {e}")
+                _record_fallback("analyze_delta4_dimension")
+                analysis[dimension] = _delta4_fallback()[dimension]
+            yield (dimension,), analysis[dimension]
+    finally:
+        # Don't block a closed generator on dimensions nobody will read; requests
+        # already sent still finish in the background and land in the cache
+        executor.shutdown(wait=False, cancel_futures=True)
+    
+    try:
+        summary = _summarize_delta4(project_description, {d: analysis[d] for d in DELTA4_DIMENSIONS}, refresh)
+    except Exception as e:
+        print(f"Error summarizing project analysis: {e}")
+        _record_fallback("summarize_delta4")
+        summary = _delta4_fallback()["summary"]
+    yield ("summary",), summary
+    
+    # Same key order as the single-request response
+    analysis = {dimension: analysis[dimension] for dimension in DELTA4_DIMENSIONS}
+    analysis["summary"] = summary
+    yield (), analysis
+
+def analyze_delta4(project_description, current_status, challenges, goals, parallel=None, refresh=False):
+    """
+    Use the Delta 4 framework to analyze friction and delight points in a project.
+    
+    The Delta 4 framework examines:
+    - Technical Friction: Technical challenges and bottlenecks
+    - Cultural Friction: Team dynamics, communication issues
+    - Process Friction: Workflow and methodology problems
+    - Expectation Friction: Misalignment between expectations and reality
+    
+    As well as corresponding delight points in each area.
+    
+    Args:
+        project_description (str): Brief description of the project
+        current_status (str): Current status and progress of the project
+        challenges (str): Current challenges and issues faced
+        goals (str): Goals and expectations for the project
+        parallel (bool, optional): Analyze each dimension in its own request;
+            defaults to DELTA4_PARALLEL
+        refresh (bool): Analyze again instead of reusing cached results
+    
+    Returns:
+        dict: Analysis results with friction and delight points categorized
+    """
+    if DELTA4_PARALLEL if parallel is None else parallel:
+        analysis = None
+        for path, value in iter_delta4_dimensions(project_description, current_status, challenges, goals, refresh):
+            if not path:
+                analysis = value
+        return analysis
+    
+    try:
+        # Parse the JSON response
+        return _chat_completion(
+            "analyze_delta4",
+            messages=_delta4_messages(project_description, current_status, challenges, goals),
             temperature=0.3,
-            response_format={"type": "json_object"}
+            response_format={"type": "json_object"},
+            parse=_parse_json_response,
+            refresh=refresh
         )
-        
-        response_content = remove_think_tags(response.choices[0].message.content)
-        
-        # Parse the JSON response
-        import json
-        return json.loads(response_content)
     
     except Exception as e:
         print(f"Error analyzing project: {e}")
-        # Fallback response in case of API issues
-        return {
-            "technical": {
-                "friction": ["API integration challenges", "Performance bottlenecks"],
-                "delight": ["Core functionality works well"],
-                "recommendations": ["Review API documentation", "Implement caching"]
-            },
-            "cultural": {
-                "friction": ["Communication gaps"],
-                "delight": ["Team enthusiasm for the project"],
-                "recommendations": ["Regular check-ins", "Document decisions"]
-            },
-            "process": {
-                "friction": ["Unclear task priorities"],
-                "delight": ["Regular commits"],
-                "recommendations": ["Implement project board", "Define milestone criteria"]
-            },
-            "expectation": {
-                "friction": ["Timeline may be optimistic"],
-                "delight": ["Clear project vision"],
-                "recommendations": ["Revisit timeline", "Break down large tasks"]
-            },
-            "summary": "Project shows promise but faces some technical and process challenges. With better task prioritization and addressing technical bottlenecks, progress should improve."
-        } 
-
-def get_company_insights(company_name, domain=None, skills=None):
+        _record_fallback("analyze_delta4")
+        return _delta4_fallback()
+
+def stream_delta4_analysis(project_description, current_status, challenges, goals, parallel=None, refresh=False):
     """
-    Get recent news, job openings, and strategic insights for a target company.
+    Streaming variant of `analyze_delta4` that reports sections as they complete.
     
-    Args:
-        company_name (str): The name of the target company
-        domain (str, optional): The user's domain of interest (e.g., NLP, Computer Vision)
-        skills (list, optional): List of skills the user is developing
-        
-    Returns:
-        dict: Company insights including news, jobs, and alignment analysis
+    Takes the same arguments as `analyze_delta4`.
+    
+    Yields:
+        tuple: (path, value) events such as (("technical", "friction"), [...])
+            or (("summary",), "..."); the last event is ((), full_analysis)
     """
-    skills_str = ", ".join(skills) if skills else "AI/ML"
-    domain_str = domain if domain else "AI/ML"
+    if DELTA4_PARALLEL if parallel is None else parallel:
+        yield from iter_delta4_dimensions(project_description, current_status, challenges, goals, refresh)
+        return
+    
+    try:
+        yield from _stream_json_completion(
+            "analyze_delta4",
+            messages=_delta4_messages(project_description, current_status, challenges, goals),
+            temperature=0.3,
+            refresh=refresh
+        )
+    
+    except Exception as e:
+        print(f"Error streaming project analysis: {e}")
+        _record_fallback("analyze_delta4")
+        yield (), _delta4_fallback()
+
+def _company_insights_fallback(company_name):
+    # Fallback response
+    return {
+        "company_overview": f"{company_name} is known for its work in AI and machine learning technologies.",
+        "recent_developments": [
+            {
+                "title": f"{company_name} Expands AI Research Team",
+                "description": f"{company_name} has recently announced expansion of its AI research division.",
+                "relevance": "This indicates growth and investment in AI technologies, creating potential job opportunities."
+            }
+        ],
+        "job_trends": [
+            {
+                "role_type": "Machine Learning Engineer",
+                "skills_sought": ["Python", "TensorFlow/PyTorch", "Data processing"],
+                "typical_requirements": "Bachelor's or Master's in Computer Science or related field, 2+ years experience with ML frameworks."
+            }
+        ],
+        "skill_alignment": {
+            "aligned_skills": ["Python", "Machine Learning"],
+            "skill_gaps": ["Cloud deployment", "MLOps"],
+            "recommendations": ["Develop projects showcasing end-to-end ML pipelines", "Gain experience with cloud deployment of ML models"]
+        },
+        "projects_to_showcase": [
+            {
+                "project_idea": "End-to-end ML application with deployment",
+                "why_effective": "Demonstrates both technical ML knowledge and practical implementation skills"
+            }
+        ]
+    }
+
+# Sections that only depend on the company, generated once per company and shared by all users
+COMPANY_PROFILE_SECTIONS = ("company_overview", "recent_developments", "job_trends")
+# Sections tailored to the user's domain and skills
+COMPANY_ALIGNMENT_SECTIONS = ("skill_alignment", "projects_to_showcase")
+
+def _normalize_company_name(company_name):
+    # "  Google " and "Google" should share one profile
+    return " ".join(company_name.split())
+
+def _company_profile_messages(company_name):
+    (company_name,) = _enforce_input_budget("get_company_profile", company_name=_normalize_company_name(company_name))
     
     prompt = f"""
-    Research and provide insights on {company_name} as a target employer for someone 
-    specializing in {domain_str} with skills in {skills_str}.
+    Research and provide insights on {company_name} as a target employer for people 
+    working in AI and machine learning.
     
     Provide your response in JSON format with the following structure:
     {{
@@ -313,7 +1468,7 @@ def get_company_insights(company_name, domain=None, skills=None):
             {{
                 "title": "Title of news or development",
                 "description": "Brief description of the news item",
-                "relevance": "Why this matters for someone with the specified skills"
+                "relevance": "Why this matters for someone looking for an AI/ML role here"
             }},
             ...
         ],
@@ -324,7 +1479,44 @@ def get_company_insights(company_name, domain=None, skills=None):
                 "typical_requirements": "Brief description of typical requirements"
             }},
             ...
-        ],
+        ]
+    }}
+    
+    Focus on providing accurate, current information that would be useful for someone 
+    targeting this company for employment opportunities.
+    """
+    
+    return [
+        {"role": "system", "content": "You are a career research specialist with expertise in technology companies and hiring trends in AI and machine learning."},
+        {"role": "user", "content": prompt}
+    ]
+
+def _company_profile(result):
+    if not result.get("company_overview"):
+        raise ValueError("Company profile is missing 'company_overview'")
+    return {section: result.get(section, []) for section in COMPANY_PROFILE_SECTIONS}
+
+def _company_alignment_messages(company_name, profile, domain=None, skills=None):
+    company_name, domain = _enforce_input_budget(
+        "get_company_alignment", company_name=_normalize_company_name(company_name), domain=domain
+    )
+    
+    skills_str = ", ".join(skills) if skills else "AI/ML"
+    domain_str = domain if domain else "AI/ML"
+    # Only the hiring signal is needed to judge fit, which keeps this call small
+    roles = "\n    ".join(
+        f"- {trend.get('role_type', '')}: {', '.join(trend.get('skills_sought', []))}"
+        for trend in profile.get("job_trends", []) if isinstance(trend, dict)
+    )
+    
+    prompt = f"""
+    A candidate specializing in {domain_str} with skills in {skills_str} is targeting {company_name}.
+    
+    Roles {company_name} commonly hires for and the skills they seek:
+    {roles or "- Not known"}
+    
+    Provide your response in JSON format with the following structure:
+    {{
         "skill_alignment": {{
             "aligned_skills": ["skill that aligns with company needs", ...],
             "skill_gaps": ["skill that might be worth developing", ...],
@@ -338,56 +1530,283 @@ def get_company_insights(company_name, domain=None, skills=None):
             ...
         ]
     }}
+    """
     
-    Focus on providing accurate, current information that would be useful for someone 
-    targeting this company for employment opportunities.
+    return [
+        {"role": "system", "content": "You are a career coach who matches candidates' skills to a target company's hiring needs."},
+        {"role": "user", "content": prompt}
+    ]
+
+def _company_alignment(result):
+    if not isinstance(result.get("skill_alignment"), dict):
+        raise ValueError("Company alignment is missing 'skill_alignment'")
+    return {section: result.get(section, []) for section in COMPANY_ALIGNMENT_SECTIONS}
+
+def _merge_company_insights(profile, alignment):
+    # Same key order as the original single-request response
+    return {**profile, **alignment}
+
+def _fetch_company_insights(company_name, domain=None, skills=None, refresh=False, priority=None):
+    # Same as get_company_insights, but lets API and parsing errors propagate
+    profile = _chat_completion(
+        "get_company_profile",
+        messages=_company_profile_messages(company_name),
+        temperature=0.5,
+        response_format={"type": "json_object"},
+        parse=lambda text: _company_profile(_parse_json_response(text)),
+        refresh=refresh,
+        priority=priority
+    )
+    alignment = _chat_completion(
+        "get_company_alignment",
+        messages=_company_alignment_messages(company_name, profile, domain, skills),
+        temperature=0.5,
+        response_format={"type": "json_object"},
+        parse=lambda text: _company_alignment(_parse_json_response(text)),
+        refresh=refresh,
+        priority=priority
+    )
+    return _merge_company_insights(profile, alignment)
+
+def get_company_insights(company_name, domain=None, skills=None, refresh=False):
     """
+    Get recent news, job openings, and strategic insights for a target company.
     
-    try:
-        response = client.chat.completions.create(
-            model="deepseek-r1-distill-llama-70b",
-            messages=[
-                {"role": "system", "content": "You are a career research specialist with expertise in technology companies and hiring trends in AI and machine learning."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.5,
-            response_format={"type": "json_object"}
-        )
-        
-        response_content = remove_think_tags(response.choices[0].message.content)
+    The company-level sections (overview, developments, job trends) are
+    generated once per company and shared by all users for
+    COMPANY_PROFILE_TTL seconds; only the skill alignment and project ideas
+    are generated per user, in a smaller follow-up request.
+    
+    Args:
+        company_name (str): The name of the target company
+        domain (str, optional): The user's domain of interest (e.g., NLP, Computer Vision)
+        skills (list, optional): List of skills the user is developing
+        refresh (bool): Research the company again instead of reusing cached sections
         
-        # Parse the JSON response
-        import json
-        return json.loads(response_content)
+    Returns:
+        dict: Company insights including news, jobs, and alignment analysis
+    """
+    try:
+        return _fetch_company_insights(company_name, domain, skills, refresh)
     
     except Exception as e:
         print(f"Error retrieving company insights: {e}")
-        # Fallback response
-        return {
-            "company_overview": f"{company_name} is known for its work in AI and machine learning technologies.",
-            "recent_developments": [
-                {
-                    "title": f"{company_name} Expands AI Research Team",
-                    "description": f"{company_name} has recently announced expansion of its AI research division.",
-                    "relevance": "This indicates growth and investment in AI technologies, creating potential job opportunities."
-                }
-            ],
-            "job_trends": [
-                {
-                    "role_type": "Machine Learning Engineer",
-                    "skills_sought": ["Python", "TensorFlow/PyTorch", "Data processing"],
-                    "typical_requirements": "Bachelor's or Master's in Computer Science or related field, 2+ years experience with ML frameworks."
-                }
-            ],
-            "skill_alignment": {
-                "aligned_skills": ["Python", "Machine Learning"],
-                "skill_gaps": ["Cloud deployment", "MLOps"],
-                "recommendations": ["Develop projects showcasing end-to-end ML pipelines", "Gain experience with cloud deployment of ML models"]
-            },
-            "projects_to_showcase": [
-                {
-                    "project_idea": "End-to-end ML application with deployment",
-                    "why_effective": "Demonstrates both technical ML knowledge and practical implementation skills"
-                }
-            ]
-        } 
\ No newline at end of file
+        _record_fallback("get_company_insights")
+        return _company_insights_fallback(company_name)
+
+def iter_company_insights(companies, domain=None, skills=None, max_workers=None):
+    """
+    Fetch insights for several companies concurrently, yielding each result as it lands.
+    
+    Args:
+        companies (list): Company names to research
+        domain (str, optional): The user's domain of interest
+        skills (list, optional): List of skills the user is developing
+        max_workers (int, optional): Concurrency limit, defaults to INSIGHTS_CONCURRENCY
+    
+    Yields:
+        tuple: (company_name, insights, error) in completion order. On failure
+            `insights` holds the fallback content and `error` the exception.
+    """
+    companies = list(dict.fromkeys(companies))
+    if not companies:
+        return
+    
+    workers = max(1, min(max_workers or INSIGHTS_CONCURRENCY, len(companies)))
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="company-insights")
+    try:
+        futures = {
+            executor.submit(_fetch_company_insights, company, domain, skills): company
+            for company in companies
+        }
+        for future in as_completed(futures):
+            company = futures[future]
+            try:
+                yield company, future.result(), None
+            except Exception as e:
+                print(f"Error retrieving company insights for {company}: {e}")
+                _record_fallback("get_company_insights")
+                yield company, _company_insights_fallback(company), e
+    finally:
+        # Same as iter_company_insight_events: drop queued companies once the caller stops reading
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def _insights_job_key(company_name, domain=None, skills=None):
+    return _normalize_company_name(company_name), domain or "", tuple(skills or ())
+
+def prefetch_company_insights(company_name, domain=None, skills=None, refresh=False):
+    """
+    Start fetching insights for a company in the background.
+    
+    Safe to call repeatedly: a job that is already queued, running or done
+    for the same company, domain and skills is reused. Prefetches run at
+    BACKGROUND priority, behind anything a user is waiting on.
+    
+    Args:
+        company_name (str): The name of the target company
+        domain (str, optional): The user's domain of interest
+        skills (list, optional): List of skills the user is developing
+        refresh (bool): Research the company again instead of reusing cached
+            sections; discard the finished job first so a new one is started
+    
+    Returns:
+        str: Job status ("queued", "running", "done" or "failed")
+    """
+    return insights_prefetcher.submit(
+        _insights_job_key(company_name, domain, skills),
+        _fetch_company_insights, company_name, domain, list(skills or []), refresh, BACKGROUND
+    )
+
+def get_prefetched_company_insights(company_name, domain=None, skills=None):
+    """
+    Check on a background fetch started by `prefetch_company_insights`.
+    
+    Args:
+        company_name (str): The name of the target company
+        domain (str, optional): The user's domain of interest
+        skills (list, optional): List of skills the user is developing
+    
+    Returns:
+        dict or None: {"status", "result", "error", ...} or None if no fetch was started
+    """
+    return insights_prefetcher.get(_insights_job_key(company_name, domain, skills))
+
+def discard_prefetched_company_insights(company_name, domain=None, skills=None):
+    # Forget a finished background fetch so the next request fetches again
+    insights_prefetcher.discard(_insights_job_key(company_name, domain, skills))
+
+def get_company_insights_batch(companies, domain=None, skills=None, max_workers=None):
+    """
+    Fetch insights for several companies concurrently and wait for all of them.
+    
+    Args:
+        companies (list): Company names to research
+        domain (str, optional): The user's domain of interest
+        skills (list, optional): List of skills the user is developing
+        max_workers (int, optional): Concurrency limit, defaults to INSIGHTS_CONCURRENCY
+    
+    Returns:
+        dict: Maps each company to {"insights": dict, "error": Exception or None}
+    """
+    return {
+        company: {"insights": insights, "error": error}
+        for company, insights, error in iter_company_insights(companies, domain, skills, max_workers)
+    }
+
+def stream_company_insights(company_name, domain=None, skills=None, refresh=False):
+    """
+    Streaming variant of `get_company_insights` that reports sections as they complete.
+    
+    Takes the same arguments as `get_company_insights`.
+    
+    Yields:
+        tuple: (path, value) events such as (("company_overview",), "...") or
+            (("recent_developments", 0), {...}); the last event is ((), full_insights)
+    """
+    try:
+        yield from _stream_company_insights(company_name, domain, skills, refresh)
+    
+    except Exception as e:
+        print(f"Error streaming company insights: {e}")
+        _record_fallback("get_company_insights")
+        yield (), _company_insights_fallback(company_name)
+
+def _stream_company_insights(company_name, domain=None, skills=None, refresh=False):
+    # Same as stream_company_insights, but lets API and parsing errors propagate
+    profile = None
+    for path, value in _stream_json_completion(
+        "get_company_profile",
+        messages=_company_profile_messages(company_name),
+        temperature=0.5,
+        refresh=refresh
+    ):
+        if not path:
+            profile = _company_profile(value)
+        elif path[0] in COMPANY_PROFILE_SECTIONS:
+            yield path, value
+    
+    alignment = None
+    for path, value in _stream_json_completion(
+        "get_company_alignment",
+        messages=_company_alignment_messages(company_name, profile, domain, skills),
+        temperature=0.5,
+        refresh=refresh
+    ):
+        if not path:
+            alignment = _company_alignment(value)
+        elif path[0] in COMPANY_ALIGNMENT_SECTIONS:
+            yield path, value
+    
+    yield (), _merge_company_insights(profile, alignment)
+
+def iter_company_insight_events(companies, domain=None, skills=None, max_workers=None, refresh=()):
+    """
+    Stream insights for several companies concurrently.
+    
+    Worker threads consume `stream_company_insights` for each company and
+    hand events back to the calling thread, so Streamlit elements can be
+    updated from the script thread as sections arrive.
+    
+    Args:
+        companies (list): Company names to research
+        domain (str, optional): The user's domain of interest
+        skills (list, optional): List of skills the user is developing
+        max_workers (int, optional): Concurrency limit, defaults to INSIGHTS_CONCURRENCY
+        refresh (iterable, optional): Companies to research again instead of
+            reusing their cached sections
+    
+    Yields:
+        tuple: (company_name, path, value, error) events; each company finishes
+            with path (). If it failed, that last event holds the fallback
+            content and `error` the exception, so callers can show the
+            fallback without keeping it as the company's insights.
+    """
+    companies = list(dict.fromkeys(companies))
+    refresh = set(refresh)
+    if not companies:
+        return
+    
+    events = queue.Queue()
+    done = object()
+    # Set when the caller stops reading (e.g. a Streamlit rerun closes the generator)
+    stopped = threading.Event()
+    
+    def stream_one(company):
+        # Completion is signalled by the worker itself, not inferred from events,
+        # so a company is counted exactly once however its stream ends
+        if stopped.is_set():
+            return
+        stream = _stream_company_insights(company, domain, skills, refresh=company in refresh)
+        try:
+            for path, value in stream:
+                if stopped.is_set():
+                    return
+                events.put((company, path, value, None))
+        except Exception as e:
+            print(f"Error streaming insights for {company}: {e}")
+            if not stopped.is_set():
+                _record_fallback("get_company_insights")
+                events.put((company, (), _company_insights_fallback(company), e))
+        finally:
+            # Closing releases the upstream request of a company that is no longer wanted
+            stream.close()
+            if not stopped.is_set():
+                events.put(done)
+    
+    workers = max(1, min(max_workers or INSIGHTS_CONCURRENCY, len(companies)))
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="company-insights")
+    try:
+        for company in companies:
+            executor.submit(stream_one, company)
+        
+        remaining = len(companies)
+        while remaining:
+            event = events.get()
+            if event is done:
+                remaining -= 1
+                continue
+            yield event
+    finally:
+        # Don't wait for companies nobody will read: drop queued ones and let running ones stop
+        stopped.set()
+        executor.shutdown(wait=False, cancel_futures=True)
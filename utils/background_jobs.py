@@ -0,0 +1,104 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class BackgroundJobs:
+    """
+    Process-wide pool of keyed background jobs.
+
+    Submitting a key that is already queued, running or done is a no-op, so
+    every session asking for the same work shares one job. Failed jobs are
+    replaced by the next submission, and so are results older than
+    `result_ttl` seconds. At most `max_jobs` jobs are remembered; the oldest
+    finished ones are forgotten first.
+    """
+
+    def __init__(self, max_workers=4, max_jobs=256, result_ttl=None, thread_name_prefix="background-job"):
+        self.max_jobs = max_jobs
+        self.result_ttl = result_ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, key, fn, *args, **kwargs):
+        """
+        Run `fn(*args, **kwargs)` in the background unless a job for `key` already exists.
+
+        Args:
+            key: Hashable job identifier
+            fn (callable): Work to run on the pool
+
+        Returns:
+            str: The job's status after submission
+        """
+        with self._lock:
+            job = self._live_job(key)
+            if job is not None and job["status"] != FAILED:
+                return job["status"]
+
+            job = {"status": QUEUED, "result": None, "error": None, "submitted_at": time.time(), "finished_at": None}
+            self._jobs[key] = job
+            self._jobs.move_to_end(key)
+            self._trim()
+
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return QUEUED
+
+    def _run(self, job, fn, args, kwargs):
+        with self._lock:
+            job["status"] = RUNNING
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            print(f"Background job failed: {e}")
+            with self._lock:
+                job.update(status=FAILED, error=e, finished_at=time.time())
+            return
+        with self._lock:
+            job.update(status=DONE, result=result, finished_at=time.time())
+
+    def _live_job(self, key):
+        job = self._jobs.get(key)
+        if job is not None and job["status"] == DONE and self.result_ttl is not None \
+                and time.time() - job["finished_at"] > self.result_ttl:
+            del self._jobs[key]
+            return None
+        return job
+
+    def _trim(self):
+        finished = [key for key, job in self._jobs.items() if job["status"] in (DONE, FAILED)]
+        while len(self._jobs) > self.max_jobs and finished:
+            del self._jobs[finished.pop(0)]
+
+    def get(self, key):
+        """
+        Look up a job.
+
+        Args:
+            key: Job identifier passed to `submit`
+
+        Returns:
+            dict or None: Copy of the job with status, result, error and timestamps
+        """
+        with self._lock:
+            job = self._live_job(key)
+            return dict(job) if job is not None else None
+
+    def discard(self, key):
+        with self._lock:
+            self._jobs.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+            for job in self._jobs.values():
+                counts[job["status"]] += 1
+            return counts
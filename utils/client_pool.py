@@ -0,0 +1,110 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class PoolTimeout(Exception):
+    """Raised when no pooled client becomes free within the acquire timeout."""
+
+
+class ClientPool:
+    """
+    Thread-safe pool of reusable API clients.
+
+    Clients are created lazily by `factory`, at most `size` of them, and
+    handed out one caller at a time. Each keeps its own HTTP connection pool
+    alive between uses, so repeated calls skip client construction and
+    connection setup. Callers wait up to `acquire_timeout` seconds when all
+    clients are busy.
+    """
+
+    def __init__(self, factory, size=4, acquire_timeout=10.0):
+        self.factory = factory
+        self.size = size
+        self.acquire_timeout = acquire_timeout
+        self._idle = []
+        self._created = 0
+        self._in_use = 0
+        self._peak_in_use = 0
+        self._acquired = 0
+        self._waited = 0
+        self._wait_seconds = 0.0
+        self._timeouts = 0
+        self._condition = threading.Condition()
+
+    def _acquire(self):
+        started = time.monotonic()
+        with self._condition:
+            waited = False
+            while not self._idle and self._created >= self.size:
+                waited = True
+                remaining = self.acquire_timeout - (time.monotonic() - started)
+                if remaining <= 0 or not self._condition.wait(remaining):
+                    if not self._idle and self._created >= self.size:
+                        self._timeouts += 1
+                        raise PoolTimeout(f"No client free after {self.acquire_timeout}s (pool size {self.size})")
+
+            self._in_use += 1
+            self._acquired += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+            if waited:
+                self._waited += 1
+                self._wait_seconds += time.monotonic() - started
+            if self._idle:
+                return self._idle.pop()
+            # Reserve the slot now, build the client outside the lock
+            self._created += 1
+
+        try:
+            return self.factory()
+        except Exception:
+            with self._condition:
+                self._created -= 1
+                self._in_use -= 1
+                self._condition.notify()
+            raise
+
+    def _release(self, client):
+        with self._condition:
+            self._in_use -= 1
+            self._idle.append(client)
+            self._condition.notify()
+
+    @contextmanager
+    def client(self):
+        """
+        Borrow a client for the duration of a `with` block.
+
+        Yields:
+            A client built by the pool's factory
+
+        Raises:
+            PoolTimeout: If every client stays busy for `acquire_timeout` seconds
+        """
+        client = self._acquire()
+        try:
+            yield client
+        finally:
+            self._release(client)
+
+    def stats(self):
+        """
+        Get pool utilization counters.
+
+        Returns:
+            dict: size, created, in_use, idle, utilization, peak_in_use,
+                acquired, waited, avg_wait_seconds and timeouts
+        """
+        with self._condition:
+            return {
+                "size": self.size,
+                "created": self._created,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "utilization": self._in_use / self.size if self.size else 0.0,
+                "peak_in_use": self._peak_in_use,
+                "acquired": self._acquired,
+                "waited": self._waited,
+                "avg_wait_seconds": self._wait_seconds / self._waited if self._waited else 0.0,
+                "timeouts": self._timeouts
+            }
@@ -0,0 +1,167 @@
+import json
+
+
+class JSONStreamParser:
+    """
+    Incremental JSON parser that reports values as soon as they are complete.
+
+    Feed text chunks in order; each call returns `(path, value)` events for
+    every value that closed within the chunk and whose path is at most
+    `max_depth` long. Paths are tuples of object keys and array indices, so
+    `("technical", "friction")` or `("recent_developments", 0)`. The whole
+    document is reported last with the empty path `()`.
+
+    Text before the first "{" or "[" (e.g. stray prose) is ignored.
+    """
+
+    def __init__(self, max_depth=2):
+        self.max_depth = max_depth
+        self.result = None
+        self.done = False
+        self._text = ""
+        self._pos = 0
+        self._stack = []
+        self._in_string = False
+        self._escaped = False
+        self._string_start = None
+        self._scalar_start = None
+
+    def feed(self, chunk):
+        """
+        Process the next chunk of JSON text.
+
+        Args:
+            chunk (str): Text continuing the document
+
+        Returns:
+            list: (path, value) events completed by this chunk
+        """
+        self._text += chunk
+        events = []
+
+        while self._pos < len(self._text) and not self.done:
+            i = self._pos
+            c = self._text[i]
+            self._pos += 1
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif c == "\\":
+                    self._escaped = True
+                elif c == '"':
+                    self._in_string = False
+                    self._complete_string(i, events)
+                continue
+
+            if not self._stack:
+                # Skip anything before the root container starts
+                if c in "{[":
+                    self._open(c, i, ())
+                continue
+
+            frame = self._stack[-1]
+            if c in " \t\r\n":
+                self._complete_scalar(i, events)
+            elif c in "{[":
+                self._open(c, i, self._child_path(frame))
+            elif c in "}]":
+                self._complete_scalar(i, events)
+                self._close(i, events)
+            elif c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c == ":":
+                frame["expect_key"] = False
+            elif c == ",":
+                self._complete_scalar(i, events)
+                if frame["type"] == "object":
+                    frame["expect_key"] = True
+                else:
+                    frame["index"] += 1
+            elif self._scalar_start is None:
+                self._scalar_start = i
+
+        return events
+
+    def _child_path(self, frame):
+        if frame["type"] == "object":
+            return frame["path"] + (frame["key"],)
+        return frame["path"] + (frame["index"],)
+
+    def _open(self, c, i, path):
+        self._stack.append({
+            "type": "object" if c == "{" else "array",
+            "start": i,
+            "path": path,
+            "key": None,
+            "index": 0,
+            "expect_key": c == "{"
+        })
+
+    def _emit(self, path, value, events):
+        if len(path) <= self.max_depth:
+            events.append((path, value))
+
+    def _complete_string(self, i, events):
+        frame = self._stack[-1]
+        value = json.loads(self._text[self._string_start:i + 1])
+        if frame["type"] == "object" and frame["expect_key"]:
+            frame["key"] = value
+        else:
+            self._emit(self._child_path(frame), value, events)
+
+    def _complete_scalar(self, i, events):
+        if self._scalar_start is None:
+            return
+        frame = self._stack[-1]
+        value = json.loads(self._text[self._scalar_start:i])
+        self._scalar_start = None
+        self._emit(self._child_path(frame), value, events)
+
+    def _close(self, i, events):
+        frame = self._stack.pop()
+        value = json.loads(self._text[frame["start"]:i + 1])
+        self._emit(frame["path"], value, events)
+        if not self._stack:
+            self.result = value
+            self.done = True
+
+
+def apply_event(document, path, value):
+    """
+    Place a streamed value into a partially built document.
+
+    Missing intermediate objects and lists are created as needed, so
+    applying the events from `JSONStreamParser` in order rebuilds the
+    document progressively.
+
+    Args:
+        document (dict): Partial document to update in place
+        path (tuple): Key/index path of the value
+        value: The completed value
+
+    Returns:
+        The updated document (the value itself for the root path)
+    """
+    if not path:
+        return value
+
+    container = document
+    for key, next_key in zip(path[:-1], path[1:]):
+        empty = [] if isinstance(next_key, int) else {}
+        if isinstance(container, list):
+            while len(container) <= key:
+                container.append(None)
+            if container[key] is None:
+                container[key] = empty
+            container = container[key]
+        else:
+            container = container.setdefault(key, empty)
+
+    last = path[-1]
+    if isinstance(container, list):
+        while len(container) <= last:
+            container.append(None)
+    container[last] = value
+    return document
@@ -0,0 +1,163 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+def make_cache_key(request):
+    """
+    Build a content-addressed key for a chat completion request.
+
+    Args:
+        request (dict): Completion parameters (model, messages, temperature, response_format)
+
+    Returns:
+        str: SHA-256 hex digest of the canonical JSON encoding of the request
+    """
+    canonical = json.dumps(request, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    """
+    Disk-backed (SQLite) cache for chat completion responses.
+
+    Entries older than `max_age` seconds are treated as misses and removed.
+    When the stored payload grows beyond `max_bytes`, the least recently
+    used entries are evicted until it fits again.
+    """
+
+    def __init__(self, path, max_age=7 * 24 * 3600, max_bytes=50 * 1024 * 1024):
+        self.path = path
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS completions (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_completions_accessed ON completions (accessed_at)")
+        self._conn.commit()
+
+    def get(self, key, max_age=None):
+        """
+        Look up a cached response.
+
+        Args:
+            key (str): Cache key from `make_cache_key`
+            max_age (float, optional): Stricter age limit for this lookup, in seconds
+
+        Returns:
+            str or None: The cached response text, or None on a miss
+        """
+        now = time.time()
+        if max_age is None or (self.max_age is not None and self.max_age < max_age):
+            max_age = self.max_age
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            value, created_at = row
+            if max_age is not None and now - created_at > max_age:
+                self._conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+                self._conn.commit()
+                self.evictions += 1
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE completions SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """
+        Store a response and evict old entries if the cache is over budget.
+
+        Args:
+            key (str): Cache key from `make_cache_key`
+            value (str): Response text to store
+        """
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM completions")
+            self._conn.commit()
+
+    def _evict(self, now):
+        # Age-based eviction first, then trim least recently used entries to the size budget
+        if self.max_age is not None:
+            cursor = self._conn.execute("DELETE FROM completions WHERE created_at < ?", (now - self.max_age,))
+            self.evictions += max(cursor.rowcount, 0)
+
+        if self.max_bytes is None:
+            return
+
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        for key, size in self._conn.execute("SELECT key, size FROM completions ORDER BY accessed_at ASC").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+            total -= size
+            self.evictions += 1
+
+    def stats(self):
+        """
+        Get cache counters and current size.
+
+        Returns:
+            dict: hits, misses, hit_rate, evictions, entries and bytes
+        """
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM completions"
+            ).fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": entries,
+                "bytes": total
+            }
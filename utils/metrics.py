@@ -0,0 +1,213 @@
+import bisect
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# Seconds; covers cache-speed responses up to the longest AI call timeouts
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+
+def _label_key(labels):
+    return tuple(sorted((labels or {}).items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+class MetricsRegistry:
+    """
+    Thread-safe counters, gauges and histograms with Prometheus-style labels.
+
+    Metrics must be declared with `describe` before use. The registry can be
+    rendered in the Prometheus text exposition format or as a JSON snapshot.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name, kind, help_text, buckets=DEFAULT_BUCKETS):
+        """
+        Declare a metric.
+
+        Args:
+            name (str): Metric name, e.g. "careerai_llm_requests_total"
+            kind (str): "counter", "gauge" or "histogram"
+            help_text (str): One-line description
+            buckets (tuple): Upper bounds for histogram buckets
+        """
+        with self._lock:
+            self._metrics.setdefault(name, {
+                "kind": kind,
+                "help": help_text,
+                "buckets": tuple(buckets) if kind == "histogram" else None,
+                "series": {}
+            })
+
+    def inc(self, name, labels=None, value=1.0):
+        """Add `value` to a counter or gauge."""
+        with self._lock:
+            series = self._metrics[name]["series"]
+            key = _label_key(labels)
+            series[key] = series.get(key, 0.0) + value
+
+    def dec(self, name, labels=None, value=1.0):
+        """Subtract `value` from a gauge."""
+        self.inc(name, labels, -value)
+
+    def set(self, name, value, labels=None):
+        """Set a gauge."""
+        with self._lock:
+            self._metrics[name]["series"][_label_key(labels)] = float(value)
+
+    def observe(self, name, value, labels=None):
+        """Record one observation in a histogram."""
+        with self._lock:
+            metric = self._metrics[name]
+            key = _label_key(labels)
+            series = metric["series"].get(key)
+            if series is None:
+                series = {"buckets": [0] * len(metric["buckets"]), "sum": 0.0, "count": 0}
+                metric["series"][key] = series
+            index = bisect.bisect_left(metric["buckets"], value)
+            if index < len(metric["buckets"]):
+                series["buckets"][index] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def render_prometheus(self):
+        """
+        Render all metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: Exposition text
+        """
+        lines = []
+        with self._lock:
+            for name, metric in sorted(self._metrics.items()):
+                lines.append(f"# HELP {name} {metric['help']}")
+                lines.append(f"# TYPE {name} {metric['kind']}")
+                for key, value in sorted(metric["series"].items()):
+                    if metric["kind"] != "histogram":
+                        lines.append(f"{name}{_format_labels(key)} {value}")
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(metric["buckets"], value["buckets"]):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(key, [('le', bound)])} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(key, [('le', '+Inf')])} {value['count']}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {value['sum']}")
+                    lines.append(f"{name}_count{_format_labels(key)} {value['count']}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """
+        Get all metrics as plain data.
+
+        Returns:
+            dict: Per metric its kind, help text and a list of labelled series
+        """
+        with self._lock:
+            result = {"timestamp": time.time(), "metrics": {}}
+            for name, metric in self._metrics.items():
+                series = []
+                for key, value in metric["series"].items():
+                    entry = {"labels": dict(key)}
+                    if metric["kind"] == "histogram":
+                        entry.update(
+                            buckets=dict(zip(map(str, metric["buckets"]), value["buckets"])),
+                            sum=value["sum"],
+                            count=value["count"]
+                        )
+                    else:
+                        entry["value"] = value
+                    series.append(entry)
+                result["metrics"][name] = {"kind": metric["kind"], "help": metric["help"], "series": series}
+            return result
+
+    def write_snapshot(self, path):
+        """
+        Atomically write a JSON snapshot to `path`.
+
+        Args:
+            path (str): Destination file
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+        os.replace(tmp_path, path)
+
+
+# Process-wide registry shared by the AI and database layers, so one exporter serves both
+registry = MetricsRegistry()
+
+
+def start_snapshot_writer(registry, path, interval=15.0):
+    """
+    Write JSON snapshots of a registry every `interval` seconds from a daemon thread.
+
+    Args:
+        registry (MetricsRegistry): Metrics to export
+        path (str): Destination file
+        interval (float): Seconds between snapshots
+
+    Returns:
+        threading.Thread: The writer thread
+    """
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                registry.write_snapshot(path)
+            except OSError as e:
+                print(f"Error writing metrics snapshot: {e}")
+
+    thread = threading.Thread(target=run, name="metrics-snapshot", daemon=True)
+    thread.start()
+    return thread
+
+
+def start_http_server(registry, port, host="127.0.0.1"):
+    """
+    Serve the registry at /metrics in Prometheus text format from a daemon thread.
+
+    Args:
+        registry (MetricsRegistry): Metrics to export
+        port (int): Port to listen on
+        host (str): Interface to bind
+
+    Returns:
+        ThreadingHTTPServer: The running server
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
@@ -0,0 +1,124 @@
+import math
+import threading
+import time
+from collections import deque
+
+
+class ModelRouter:
+    """
+    Picks a model for each task from its tier's fallback chain.
+
+    Every task maps to a tier and every tier to an ordered list of models.
+    The first model whose recent p95 latency and error rate are both under
+    their thresholds is used; if none qualifies, the last model in the chain
+    is. Observations older than `window` seconds are forgotten, so a
+    degraded model is retried automatically once it has been idle.
+
+    Routing uses total latency (request sent to last byte received) for
+    blocking and streamed calls alike. Time to first token is recorded
+    separately for streams and only reported.
+    """
+
+    def __init__(self, task_tiers, tier_models, default_tier, p95_threshold=20.0, error_rate_threshold=0.5,
+                 window=300.0, min_samples=5):
+        self.task_tiers = task_tiers
+        self.tier_models = tier_models
+        self.default_tier = default_tier
+        self.p95_threshold = p95_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.window = window
+        self.min_samples = min_samples
+        self._observations = {}
+        self._served = {}
+        self._lock = threading.Lock()
+
+    def _recent(self, model, now):
+        observations = self._observations.setdefault(model, deque())
+        while observations and now - observations[0][0] > self.window:
+            observations.popleft()
+        return observations
+
+    @staticmethod
+    def _p95(values):
+        values = sorted(values)
+        return values[min(len(values) - 1, math.ceil(0.95 * len(values)) - 1)] if values else None
+
+    def _health(self, model, now):
+        observations = self._recent(model, now)
+        if not observations:
+            return None, 0.0, 0
+        p95 = self._p95(latency for _, latency, _, ok in observations if ok)
+        errors = sum(1 for _, _, _, ok in observations if not ok)
+        return p95, errors / len(observations), len(observations)
+
+    def _healthy(self, model, now):
+        p95, error_rate, samples = self._health(model, now)
+        if samples < self.min_samples:
+            return True
+        if error_rate > self.error_rate_threshold:
+            return False
+        return p95 is None or p95 <= self.p95_threshold
+
+    def choose(self, task, available=None):
+        """
+        Select the model to use for a task.
+
+        Args:
+            task (str): Task name, e.g. the calling function's name
+            available (callable, optional): Returns False for models that must be
+                skipped regardless of their latency, e.g. while their circuit breaker is open
+
+        Returns:
+            str: Model name
+        """
+        chain = self.tier_models[self.task_tiers.get(task, self.default_tier)]
+        now = time.monotonic()
+        with self._lock:
+            for model in chain[:-1]:
+                if (available is None or available(model)) and self._healthy(model, now):
+                    return model
+            return chain[-1]
+
+    def record(self, task, model, latency, ok=True, ttft=None):
+        """
+        Record the outcome of a request.
+
+        Args:
+            task (str): Task the request was made for
+            model (str): Model that served it
+            latency (float): Seconds from sending the request to receiving the whole response
+            ok (bool): False if the request failed
+            ttft (float, optional): Seconds to the first streamed token, None for blocking calls
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._recent(model, now).append((now, latency, ttft, ok))
+            if ok:
+                served = self._served.setdefault(task, {})
+                served[model] = served.get(model, 0) + 1
+
+    def stats(self):
+        """
+        Get per-model health and which models served each task.
+
+        Returns:
+            dict: "models" with p95 latency, p95 time to first token, error rate and
+                sample count, and "served" counts per task
+        """
+        now = time.monotonic()
+        with self._lock:
+            models = {}
+            for model in {m for chain in self.tier_models.values() for m in chain}:
+                p95, error_rate, samples = self._health(model, now)
+                ttfts = [ttft for _, _, ttft, ok in self._recent(model, now) if ok and ttft is not None]
+                models[model] = {
+                    "p95_latency": p95,
+                    "p95_ttft": self._p95(ttfts),
+                    "error_rate": error_rate,
+                    "samples": samples,
+                    "healthy": self._healthy(model, now)
+                }
+            return {
+                "models": models,
+                "served": {task: dict(counts) for task, counts in self._served.items()}
+            }
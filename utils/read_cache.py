@@ -0,0 +1,94 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+
+class ReadCache:
+    """
+    In-memory read-through cache for database queries, shared by all sessions.
+
+    Keys are tuples that start with the table and user, followed by the
+    query parameters, e.g. ("progress_entries", user_id, project_id).
+    Entries expire after `ttl` seconds, and `invalidate` drops every entry
+    whose key starts with a given prefix, so a write can clear exactly the
+    reads it affects. Callers get a deep copy, so mutating a result never
+    changes the cached value. At most `max_entries` results are kept; the
+    least recently used are evicted first.
+    """
+
+    def __init__(self, ttl=60.0, max_entries=1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key, load):
+        """
+        Return the cached result for `key`, calling `load()` on a miss.
+
+        Args:
+            key (tuple): Cache key, starting with table and user
+            load (callable): Runs the query; its result is cached
+
+        Returns:
+            A copy of the cached or freshly loaded result
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] <= self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(entry[1])
+            self.misses += 1
+            generation = self._generation
+
+        value = load()
+
+        with self._lock:
+            # Don't cache a result that an invalidation may have made stale while it loaded
+            if generation == self._generation and self.ttl > 0:
+                self._entries[key] = (time.monotonic(), copy.deepcopy(value))
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, *prefix):
+        """
+        Drop every entry whose key starts with `prefix`.
+
+        Args:
+            *prefix: Leading key parts, e.g. ("project_milestones", user_id)
+
+        Returns:
+            int: Number of entries dropped
+        """
+        with self._lock:
+            self._generation += 1
+            stale = [key for key in self._entries if key[:len(prefix)] == prefix]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+            return len(stale)
+
+    def stats(self):
+        """
+        Get cache counters.
+
+        Returns:
+            dict: entries, hits, misses, hit rate and invalidated entries
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations
+            }
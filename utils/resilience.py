@@ -0,0 +1,178 @@
+import random
+import threading
+import time
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the API while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Shared circuit breaker for an unreliable dependency.
+
+    After `failure_threshold` consecutive failures the breaker opens and
+    rejects calls immediately for `reset_timeout` seconds. It then lets a
+    single probe through (half-open): success closes it again, failure
+    re-opens it for another `reset_timeout`.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.times_opened = 0
+        self.rejected = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """
+        Check whether a call may proceed.
+
+        Raises:
+            CircuitOpenError: If the breaker is open (or a half-open probe is already running)
+        """
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+
+            self.rejected += 1
+            raise CircuitOpenError("Circuit breaker is open, skipping API call")
+
+    def is_open(self):
+        # True while calls would be rejected outright, i.e. open and not yet due for a probe
+        with self._lock:
+            return self.state == self.OPEN and time.monotonic() - self._opened_at < self.reset_timeout
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def release(self):
+        # The call ended without telling us anything about the dependency's health
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "times_opened": self.times_opened,
+                "rejected": self.rejected
+            }
+
+
+def backoff_delay(attempt, base_delay, max_delay):
+    """
+    Exponential backoff with full jitter.
+
+    Args:
+        attempt (int): Zero-based retry number
+        base_delay (float): Delay ceiling for the first retry in seconds
+        max_delay (float): Upper bound for the delay ceiling
+
+    Returns:
+        float: Seconds to sleep before the next attempt
+    """
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+class RetryPolicy:
+    """
+    Bounded retries with jittered exponential backoff, reporting to a circuit breaker.
+
+    Only errors accepted by `is_retryable` are retried and counted as
+    breaker failures; anything else (bad requests, parse errors) is raised
+    straight away.
+    """
+
+    def __init__(self, is_retryable, max_retries=2, base_delay=0.5, max_delay=8.0, retry_after=None):
+        self.is_retryable = is_retryable
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_after = retry_after or (lambda error: None)
+        self.attempts = 0
+        self.retries = 0
+        self.exhausted = 0
+        self._lock = threading.Lock()
+
+    def call(self, fn, breaker=None):
+        """
+        Call `fn`, retrying retryable failures.
+
+        Args:
+            fn (callable): Zero-argument function to call
+            breaker (CircuitBreaker, optional): Breaker consulted before and updated after each attempt
+
+        Returns:
+            The value returned by `fn`
+        """
+        attempt = 0
+        while True:
+            if breaker:
+                breaker.before_call()
+            with self._lock:
+                self.attempts += 1
+
+            try:
+                result = fn()
+            except Exception as e:
+                if not self.is_retryable(e):
+                    if breaker:
+                        breaker.release()
+                    raise
+                if breaker:
+                    breaker.record_failure()
+                if attempt >= self.max_retries:
+                    with self._lock:
+                        self.exhausted += 1
+                    raise
+
+                delay = self.retry_after(e)
+                if delay is None:
+                    delay = backoff_delay(attempt, self.base_delay, self.max_delay)
+                with self._lock:
+                    self.retries += 1
+                attempt += 1
+                time.sleep(min(delay, self.max_delay))
+                continue
+
+            if breaker:
+                breaker.record_success()
+            return result
+
+    def stats(self):
+        with self._lock:
+            return {
+                "attempts": self.attempts,
+                "retries": self.retries,
+                "exhausted": self.exhausted
+            }
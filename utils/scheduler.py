@@ -0,0 +1,181 @@
+import heapq
+import itertools
+import threading
+import time
+
+
+# Request priorities, lower values are admitted first
+INTERACTIVE = 0
+BACKGROUND = 1
+
+
+class RequestRejected(Exception):
+    """Raised when the scheduler sheds a request instead of letting it wait for budget."""
+
+
+class TokenBucket:
+    """
+    Budget that refills continuously up to `capacity` units per minute.
+    Not thread-safe on its own; RequestScheduler guards it with its lock.
+    """
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def time_until(self, amount):
+        # Seconds until `amount` units are available (0 if they already are)
+        missing = amount - self.level
+        return max(missing, 0.0) / self.rate if self.rate else float("inf")
+
+
+class RequestScheduler:
+    """
+    Admission control for API calls with requests- and tokens-per-minute budgets.
+
+    Callers queue by priority; the head of the queue is admitted once both
+    buckets can cover it. Background work must also leave `reserve` of each
+    budget untouched for interactive calls, and is shed rather than queued
+    when the queue is already deep or the expected wait exceeds its limit.
+    """
+
+    def __init__(self, requests_per_minute, tokens_per_minute, reserve=0.2, max_wait=None, max_background_queue=8):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.reserve = reserve
+        self.max_wait = max_wait or {INTERACTIVE: 30.0, BACKGROUND: 10.0}
+        self.max_background_queue = max_background_queue
+
+        self._cond = threading.Condition()
+        self._queue = []
+        self._counter = itertools.count()
+
+        self.admitted = 0
+        self.shed = 0
+        self.total_wait = 0.0
+        self.max_observed_wait = 0.0
+
+    def _headroom(self, priority):
+        # Fraction of each bucket that must stay free after admitting this priority
+        return self.reserve if priority > INTERACTIVE else 0.0
+
+    def _wait_needed(self, priority, tokens):
+        headroom = self._headroom(priority)
+        return max(
+            self.requests.time_until(1 + headroom * self.requests.capacity),
+            self.tokens.time_until(tokens + headroom * self.tokens.capacity)
+        )
+
+    def acquire(self, priority, tokens):
+        """
+        Block until the request may be sent.
+
+        Args:
+            priority (int): INTERACTIVE or BACKGROUND
+            tokens (int): Estimated prompt plus completion tokens
+
+        Returns:
+            float: Tokens actually charged, which is `tokens` capped to what the
+                budget can ever admit; pass it to `refund` or `record_usage`
+
+        Raises:
+            RequestRejected: If the request was shed
+        """
+        tokens = min(tokens, self.tokens.capacity * (1 - self._headroom(priority)))
+        max_wait = self.max_wait.get(priority, self.max_wait[BACKGROUND])
+        ticket = (priority, next(self._counter))
+        start = time.monotonic()
+
+        with self._cond:
+            if priority > INTERACTIVE and len(self._queue) >= self.max_background_queue:
+                self.shed += 1
+                raise RequestRejected("Request queue is full, deferring background request")
+
+            heapq.heappush(self._queue, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self.requests.refill(now)
+                    self.tokens.refill(now)
+                    waited = now - start
+
+                    if self._queue[0] == ticket:
+                        wait_needed = self._wait_needed(priority, tokens)
+                        if wait_needed <= 0:
+                            heapq.heappop(self._queue)
+                            self.requests.level -= 1
+                            self.tokens.level -= tokens
+                            self.admitted += 1
+                            self.total_wait += waited
+                            self.max_observed_wait = max(self.max_observed_wait, waited)
+                            self._cond.notify_all()
+                            return tokens
+                        if waited + wait_needed > max_wait:
+                            break
+                        self._cond.wait(wait_needed)
+                    else:
+                        if waited >= max_wait:
+                            break
+                        self._cond.wait(max_wait - waited)
+
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+                self.shed += 1
+                self._cond.notify_all()
+                raise RequestRejected(f"Rate limit budget exhausted, request would wait more than {max_wait:g}s")
+            except RequestRejected:
+                raise
+            except BaseException:
+                if ticket in self._queue:
+                    self._queue.remove(ticket)
+                    heapq.heapify(self._queue)
+                    self._cond.notify_all()
+                raise
+
+    def record_usage(self, charged_tokens, actual_tokens):
+        """
+        Correct the token bucket once the real usage of an admitted request is known.
+
+        Args:
+            charged_tokens (float): Tokens charged at admission, as returned by `acquire`
+            actual_tokens (int): Tokens reported by the API
+        """
+        with self._cond:
+            self.tokens.level = min(self.tokens.capacity, self.tokens.level + charged_tokens - actual_tokens)
+            self._cond.notify_all()
+
+    def refund(self, charged_tokens):
+        """
+        Return the budget of an admitted request that failed without using tokens.
+
+        Args:
+            charged_tokens (float): Tokens charged at admission, as returned by `acquire`
+        """
+        self.record_usage(charged_tokens, 0)
+
+    def stats(self):
+        """
+        Get queue and budget metrics.
+
+        Returns:
+            dict: queue depth, admitted/shed counts, wait times and remaining budgets
+        """
+        with self._cond:
+            now = time.monotonic()
+            self.requests.refill(now)
+            self.tokens.refill(now)
+            return {
+                "queue_depth": len(self._queue),
+                "admitted": self.admitted,
+                "shed": self.shed,
+                "avg_wait": self.total_wait / self.admitted if self.admitted else 0.0,
+                "max_wait": self.max_observed_wait,
+                "requests_available": self.requests.level,
+                "tokens_available": self.tokens.level
+            }
@@ -0,0 +1,126 @@
+import re
+import threading
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+
+def normalize_text(text):
+    """
+    Normalize free text so trivial variations compare equal.
+
+    Lowercases, spells out "&", drops punctuation and removes whitespace, so
+    "I love NLP & chat bots!" and "i love nlp and chatbots" normalize the same.
+    """
+    text = text.lower().replace("&", " and ")
+    text = re.sub(r"[^\w\s]", " ", text)
+    return re.sub(r"\s+", "", text)
+
+
+class SemanticCache:
+    """
+    In-memory near-duplicate cache for requests made of free-text fields.
+
+    Each field is embedded as a hashed bag of character n-grams and compared
+    by cosine similarity. A lookup hits when every field of some stored entry
+    is at least `threshold` similar to the query. The index holds at most
+    `max_entries` entries and evicts the least recently used one when full.
+    """
+
+    def __init__(self, fields, threshold=0.9, max_entries=512, dim=2048, ngram=3):
+        self.fields = fields
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.dim = dim
+        self.ngram = ngram
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._vectors = np.zeros((fields, max_entries, dim), dtype=np.float32)
+        self._values = OrderedDict()  # slot -> value, in LRU order
+        self._free_slots = list(range(max_entries - 1, -1, -1))
+        self._lock = threading.Lock()
+
+    def _embed(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        normalized = normalize_text(text)
+        if len(normalized) < self.ngram:
+            grams = [normalized] if normalized else []
+        else:
+            grams = [normalized[i:i + self.ngram] for i in range(len(normalized) - self.ngram + 1)]
+
+        for gram in grams:
+            vector[zlib.crc32(gram.encode("utf-8")) % self.dim] += 1.0
+
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _best_match(self, embedded):
+        slots = np.fromiter(self._values.keys(), dtype=np.int64, count=len(self._values))
+        if not len(slots):
+            return None, 0.0
+
+        # An entry is only as similar as its least similar field
+        similarity = np.min(
+            np.stack([self._vectors[i, slots] @ embedded[i] for i in range(self.fields)]),
+            axis=0
+        )
+        best = int(np.argmax(similarity))
+        return int(slots[best]), float(similarity[best])
+
+    def get(self, *texts):
+        """
+        Find a stored value for near-identical inputs.
+
+        Args:
+            *texts (str): One string per field, in the order used for `set`
+
+        Returns:
+            The stored value, or None if no entry is similar enough
+        """
+        embedded = [self._embed(text) for text in texts]
+        with self._lock:
+            slot, similarity = self._best_match(embedded)
+            if slot is None or similarity < self.threshold:
+                self.misses += 1
+                return None
+
+            self._values.move_to_end(slot)
+            self.hits += 1
+            return self._values[slot]
+
+    def set(self, value, *texts):
+        """
+        Store a value for the given inputs, evicting the least recently used entry if full.
+
+        Args:
+            value: Value to return for similar future inputs
+            *texts (str): One string per field
+        """
+        embedded = [self._embed(text) for text in texts]
+        with self._lock:
+            slot, similarity = self._best_match(embedded)
+            if slot is None or similarity < 1.0 - 1e-6:
+                if self._free_slots:
+                    slot = self._free_slots.pop()
+                else:
+                    slot, _ = self._values.popitem(last=False)
+                    self.evictions += 1
+
+            for i, vector in enumerate(embedded):
+                self._vectors[i, slot] = vector
+            self._values[slot] = value
+            self._values.move_to_end(slot)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._values)
+            }
@@ -0,0 +1,183 @@
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class _StreamCall:
+    def __init__(self, fn):
+        self.fn = fn
+        self.iterator = None
+        self.cond = threading.Condition()
+        self.chunks = []
+        self.readers = 0
+        self.pulling = False
+        self.finished = False
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    is still in flight wait for it and receive the same result (or the same
+    exception). Once the call finishes the key is forgotten, so later calls
+    run again - caching is left to the caller.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._streams = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        """
+        Run `fn` once for all concurrent callers with the same key.
+
+        Args:
+            key (str): Identifies identical requests, e.g. a cache key
+            fn (callable): Zero-argument function performing the request
+
+        Returns:
+            The value returned by `fn`
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stream(self, key, fn):
+        """
+        Consume the iterator returned by `fn` once for all concurrent readers with the same key.
+
+        Every reader gets every item from the start: items already received
+        are replayed from a buffer, later ones are handed out as they arrive.
+        Whichever reader runs out of buffered items pulls the next one, so a
+        reader that stops early does not stall the others. The iterator is
+        closed once the last reader stops before it is exhausted.
+
+        Args:
+            key (str): Identifies identical requests, e.g. a cache key
+            fn (callable): Zero-argument function returning an iterator, e.g. a generator function
+
+        Yields:
+            The items produced by the iterator; its exception, if any, is
+            raised in every reader after the items received before it
+        """
+        with self._lock:
+            call = self._streams.get(key)
+            if call is None:
+                call = _StreamCall(fn)
+                self._streams[key] = call
+                self.executed += 1
+            else:
+                self.coalesced += 1
+            call.readers += 1
+
+        index = 0
+        pulling = False
+        try:
+            while True:
+                with call.cond:
+                    while index >= len(call.chunks) and not call.finished and call.pulling:
+                        call.cond.wait()
+                    if index < len(call.chunks):
+                        item = call.chunks[index]
+                        index += 1
+                    elif call.finished:
+                        if call.error is not None:
+                            raise call.error
+                        return
+                    else:
+                        call.pulling = pulling = True
+
+                if pulling:
+                    try:
+                        if call.iterator is None:
+                            call.iterator = iter(call.fn())
+                        item = next(call.iterator)
+                    except StopIteration:
+                        self._finish(key, call, None)
+                    except Exception as e:
+                        self._finish(key, call, e)
+                    else:
+                        with call.cond:
+                            call.chunks.append(item)
+                            call.pulling = False
+                            call.cond.notify_all()
+                    pulling = False
+                    continue
+
+                yield item
+        finally:
+            if pulling:
+                # Interrupted by something other than an ordinary exception mid-pull
+                self._finish(key, call, RuntimeError("Coalesced stream was interrupted"))
+            self._leave(key, call)
+
+    def _finish(self, key, call, error):
+        with call.cond:
+            call.finished = True
+            call.error = error
+            call.pulling = False
+            call.cond.notify_all()
+        with self._lock:
+            if self._streams.get(key) is call:
+                del self._streams[key]
+
+    def _leave(self, key, call):
+        with self._lock:
+            call.readers -= 1
+            abandoned = call.readers == 0 and not call.finished
+            if abandoned and self._streams.get(key) is call:
+                del self._streams[key]
+        if abandoned:
+            # Nobody is reading any more: stop the upstream request instead of draining it
+            with call.cond:
+                call.finished = True
+            close = getattr(call.iterator, "close", None)
+            if close:
+                close()
+
+    def stats(self):
+        """
+        Get coalescing counters.
+
+        Returns:
+            dict: executed, coalesced and in_flight counts
+        """
+        with self._lock:
+            return {
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls) + len(self._streams)
+            }
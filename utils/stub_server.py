@@ -0,0 +1,352 @@
+"""
+Offline stand-in for the Groq chat completions API.
+
+Serves OpenAI/Groq-compatible `/openai/v1/chat/completions` responses with
+canned content for every prompt in `utils/ai_services.py`, so the app can be
+benchmarked and load-tested without network access or API quota.
+
+Run it with:
+
+    python -m utils.stub_server --port 8787 --ttft-ms 400 --tokens-per-second 250
+
+and start the app with CAREERAI_LLM_BACKEND=stub (or GROQ_BASE_URL pointing
+at the server). Every option can also be set through the matching
+CAREERAI_STUB_* environment variable, e.g. CAREERAI_STUB_RATE_LIMIT_RATE=0.1.
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+_REASONING = (
+    "Let me think about what this person is asking for. I should consider their background, "
+    "the current job market and which specialisation gives them the best leverage. "
+)
+
+
+def _domain_suggestion(prompt):
+    return (
+        "1. Recommended domain: Natural Language Processing (NLP)\n\n"
+        "2. Potential areas:\n"
+        "- Conversational AI and chatbots\n"
+        "- Retrieval-augmented generation\n"
+        "- Information extraction from documents\n"
+        "- Evaluation of large language models\n\n"
+        "3. Your interests and strengths line up well with NLP, which remains one of the "
+        "fastest-growing areas of AI hiring."
+    )
+
+
+def _social_media_post(prompt):
+    return "Shipped another milestone on my AI project today! Learning fast and building in public. #buildinpublic #AI #100DaysOfCode"
+
+
+def _daily_post(prompt):
+    day = re.search(r"Day: (\d+)", prompt)
+    day = day.group(1) if day else "1"
+    return (
+        f"#Day{day} of building in public 🚀\n\n"
+        "Today I pushed through a tricky bug and learned a lot about how the pieces fit together.\n\n"
+        "Key takeaway: small, consistent steps compound.\n\n"
+        "#buildinpublic #100DaysOfCode #AI"
+    )
+
+
+def _dimension(name):
+    return {
+        "friction": [f"{name} friction point one", f"{name} friction point two"],
+        "delight": [f"{name} delight point"],
+        "recommendations": [f"{name} recommendation one", f"{name} recommendation two"]
+    }
+
+
+def _delta4_analysis(prompt):
+    analysis = {name: _dimension(name.title()) for name in ("technical", "cultural", "process", "expectation")}
+    analysis["summary"] = "The project is healthy overall, with most friction in tooling and planning."
+    return json.dumps(analysis, indent=2)
+
+
+def _delta4_dimension(prompt):
+    dimension = re.search(r"Dimension: (\w+)", prompt)
+    return json.dumps(_dimension(dimension.group(1) if dimension else "Project"), indent=2)
+
+
+def _delta4_summary(prompt):
+    return json.dumps({"summary": "The project is healthy overall, with most friction in tooling and planning."})
+
+
+def _company_insights(prompt):
+    company = re.search(r"insights on (.+?) as a target employer", prompt)
+    company = company.group(1).strip() if company else "The company"
+    return json.dumps({
+        "company_overview": f"{company} invests heavily in applied AI and machine learning.",
+        "recent_developments": [
+            {
+                "title": f"{company} launches a new AI platform",
+                "description": "A new platform for building and deploying models was announced.",
+                "relevance": "Shows demand for engineers who can ship ML systems end to end."
+            },
+            {
+                "title": f"{company} expands its research team",
+                "description": "The company is hiring across research and applied science.",
+                "relevance": "More openings for candidates with strong fundamentals."
+            }
+        ],
+        "job_trends": [
+            {
+                "role_type": "Machine Learning Engineer",
+                "skills_sought": ["Python", "PyTorch", "MLOps"],
+                "typical_requirements": "2+ years building production ML systems."
+            }
+        ]
+    }, indent=2)
+
+
+def _company_alignment(prompt):
+    return json.dumps({
+        "skill_alignment": {
+            "aligned_skills": ["Python", "Machine Learning"],
+            "skill_gaps": ["Distributed training"],
+            "recommendations": ["Build a project that serves a model at scale"]
+        },
+        "projects_to_showcase": [
+            {
+                "project_idea": "End-to-end ML service with monitoring",
+                "why_effective": "Demonstrates production engineering alongside modelling."
+            }
+        ]
+    }, indent=2)
+
+
+# (system prompt marker, responder) pairs, matched in order against the request's system prompt
+RESPONDERS = [
+    ("career advisor", _domain_suggestion),
+    ("social media content creator", _social_media_post),
+    ("content creator specializing in tech career", _daily_post),
+    ("summarizing a delta 4 analysis", _delta4_summary),
+    ("dimension of the delta 4 framework", _delta4_dimension),
+    ("project analyst", _delta4_analysis),
+    ("career research specialist", _company_insights),
+    ("career coach", _company_alignment),
+]
+
+
+class StubConfig:
+    """Latency and failure settings, shared by all handler threads."""
+
+    def __init__(self, ttft_ms=300.0, ttft_jitter_ms=100.0, tokens_per_second=250.0, reasoning_tokens=60,
+                 rate_limit_rate=0.0, server_error_rate=0.0, timeout_rate=0.0, hang_seconds=120.0, seed=None):
+        self.ttft_ms = ttft_ms
+        self.ttft_jitter_ms = ttft_jitter_ms
+        self.tokens_per_second = tokens_per_second
+        self.reasoning_tokens = reasoning_tokens
+        self.rate_limit_rate = rate_limit_rate
+        self.server_error_rate = server_error_rate
+        self.timeout_rate = timeout_rate
+        self.hang_seconds = hang_seconds
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    def sample(self):
+        with self.lock:
+            self.requests += 1
+            return self.random.random(), max(0.0, self.random.gauss(self.ttft_ms, self.ttft_jitter_ms)) / 1000
+
+
+def _tokenize(text):
+    # Roughly one token per word piece, keeping whitespace attached so chunks rejoin exactly
+    return re.findall(r"\s*\S{1,4}|\s+", text)
+
+
+def build_content(messages, json_mode, config):
+    """
+    Produce the canned response for a request, including a <think> block.
+
+    Args:
+        messages (list): Chat messages from the request
+        json_mode (bool): True if response_format asked for a JSON object
+        config (StubConfig): Stub settings
+
+    Returns:
+        str: Raw assistant content as the model would send it
+    """
+    system = " ".join(m.get("content", "") for m in messages if m.get("role") == "system").lower()
+    prompt = "\n".join(m.get("content", "") for m in messages if m.get("role") == "user")
+
+    for marker, responder in RESPONDERS:
+        if marker in system:
+            answer = responder(prompt)
+            break
+    else:
+        answer = "{}" if json_mode else "This is a stub response."
+
+    reasoning = " ".join(_REASONING.split() * (config.reasoning_tokens // len(_REASONING.split()) + 1))
+    reasoning = " ".join(reasoning.split()[:config.reasoning_tokens])
+    return f"<think>\n{reasoning}\n</think>\n\n{answer}"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    config = StubConfig()
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        config = self.config
+        roll, ttft = config.sample()
+
+        # Failure injection, checked in a fixed order against one random roll
+        if roll < config.rate_limit_rate:
+            self._send_json(
+                429,
+                {"error": {"message": "Rate limit reached (stub)", "type": "rate_limit_exceeded"}},
+                headers={"retry-after": "1"}
+            )
+            return
+        roll -= config.rate_limit_rate
+        if roll < config.server_error_rate:
+            self._send_json(500, {"error": {"message": "Internal server error (stub)", "type": "internal_error"}})
+            return
+        roll -= config.server_error_rate
+        if roll < config.timeout_rate:
+            time.sleep(config.hang_seconds)
+            return
+
+        messages = request.get("messages", [])
+        json_mode = (request.get("response_format") or {}).get("type") == "json_object"
+        content = build_content(messages, json_mode, config)
+        tokens = _tokenize(content)
+        # Like the real API, a response cut off at max_tokens finishes with "length"
+        finish_reason = "stop"
+        if request.get("max_tokens") and len(tokens) > request["max_tokens"]:
+            tokens = tokens[:request["max_tokens"]]
+            content = "".join(tokens)
+            finish_reason = "length"
+
+        model = request.get("model", "stub-model")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        prompt_tokens = sum(len(_tokenize(m.get("content", ""))) for m in messages)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(tokens),
+            "total_tokens": prompt_tokens + len(tokens)
+        }
+        token_delay = 1.0 / config.tokens_per_second if config.tokens_per_second else 0.0
+
+        time.sleep(ttft)
+
+        if not request.get("stream"):
+            time.sleep(token_delay * len(tokens))
+            self._send_json(200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": finish_reason,
+                    "logprobs": None
+                }],
+                "usage": usage
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+
+        def send_event(payload):
+            self.wfile.write(f"data: {payload}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        for i, token in enumerate(tokens + [None]):
+            delta = {"role": "assistant", "content": token} if token is not None else {}
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": None if token is not None else finish_reason, "logprobs": None}]
+            }
+            if token is None:
+                chunk["x_groq"] = {"usage": usage}
+            send_event(json.dumps(chunk))
+            if token is not None and i:
+                time.sleep(token_delay)
+        send_event("[DONE]")
+        self.close_connection = True
+
+
+def _env(name, default, cast=float):
+    value = os.environ.get(f"CAREERAI_STUB_{name.upper()}")
+    return cast(value) if value is not None else default
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline Groq-compatible stub server for CareerAI")
+    parser.add_argument("--host", default=_env("host", "127.0.0.1", str))
+    parser.add_argument("--port", type=int, default=_env("port", 8787, int))
+    parser.add_argument("--ttft-ms", type=float, default=_env("ttft_ms", 300.0), help="Mean time to first token")
+    parser.add_argument("--ttft-jitter-ms", type=float, default=_env("ttft_jitter_ms", 100.0), help="Std deviation of time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=_env("tokens_per_second", 250.0), help="Generation speed (0 for instant)")
+    parser.add_argument("--reasoning-tokens", type=int, default=_env("reasoning_tokens", 60, int), help="Length of the <think> block")
+    parser.add_argument("--rate-limit-rate", type=float, default=_env("rate_limit_rate", 0.0), help="Fraction of requests answered with 429")
+    parser.add_argument("--server-error-rate", type=float, default=_env("server_error_rate", 0.0), help="Fraction of requests answered with 500")
+    parser.add_argument("--timeout-rate", type=float, default=_env("timeout_rate", 0.0), help="Fraction of requests that hang")
+    parser.add_argument("--hang-seconds", type=float, default=_env("hang_seconds", 120.0), help="How long hanging requests stall")
+    parser.add_argument("--seed", type=int, default=_env("seed", None, int))
+    args = parser.parse_args()
+
+    StubHandler.config = StubConfig(
+        ttft_ms=args.ttft_ms,
+        ttft_jitter_ms=args.ttft_jitter_ms,
+        tokens_per_second=args.tokens_per_second,
+        reasoning_tokens=args.reasoning_tokens,
+        rate_limit_rate=args.rate_limit_rate,
+        server_error_rate=args.server_error_rate,
+        timeout_rate=args.timeout_rate,
+        hang_seconds=args.hang_seconds,
+        seed=args.seed
+    )
+
+    server = ThreadingHTTPServer((args.host, args.port), StubHandler)
+    print(f"Stub Groq server listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
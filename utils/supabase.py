@@ -1,6 +1,21 @@
 import os
+import json
+import uuid
+import time
+import threading
+import contextvars
+from datetime import datetime, timezone
+from itertools import islice
 from dotenv import load_dotenv
+from postgrest import APIError
 from supabase import create_client
+from supabase.lib.client_options import ClientOptions
+
+from utils.background_jobs import BackgroundJobs
+from utils.client_pool import ClientPool
+from utils.read_cache import ReadCache
+from utils.write_behind import WriteBehindBuffer
+from utils.write_dedup import WriteDeduplicator
 
 # Load environment variables
 load_dotenv()
@@ -13,9 +28,296 @@ def get_supabase_client():
     if not supabase_url or not supabase_key:
         raise ValueError("Supabase URL and key must be set as environment variables")
     
-    return create_client(supabase_url, supabase_key)
+    return create_client(
+        supabase_url,
+        supabase_key,
+        options=ClientOptions(postgrest_client_timeout=float(os.environ.get("CAREERAI_SUPABASE_TIMEOUT", 10)))
+    )
+
+# Shared clients for table queries. Each keeps its HTTP connections alive between
+# calls; they never sign in, so no user session is ever stored on them.
+supabase_pool = ClientPool(
+    get_supabase_client,
+    size=int(os.environ.get("CAREERAI_SUPABASE_POOL_SIZE", 4)),
+    acquire_timeout=float(os.environ.get("CAREERAI_SUPABASE_POOL_TIMEOUT", 10))
+)
+
+# Access tokens are refreshed this many seconds before they expire
+TOKEN_REFRESH_MARGIN = float(os.environ.get("CAREERAI_TOKEN_REFRESH_MARGIN", 60))
+
+class AuthSession:
+    """
+    A logged-in user's tokens, kept current for as long as the user stays.
+    
+    Supabase access tokens expire after about an hour. `access_token()`
+    refreshes the session shortly before that, and `refresh()` does so after
+    a request was rejected with an expired token. One instance lives in the
+    user's Streamlit session state and is shared with the background threads
+    writing on their behalf, so queued inserts are sent with the token that
+    is current when they are written, not the one from when they were queued.
+    """
+    
+    def __init__(self, access_token, refresh_token=None, expires_at=None):
+        self._access_token = access_token
+        self.refresh_token = refresh_token
+        self.expires_at = expires_at
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_session(cls, session):
+        """
+        Build from the session of a login response.
+        
+        Args:
+            session: gotrue Session, or None
+        
+        Returns:
+            AuthSession or None: None if there is no session
+        """
+        if session is None:
+            return None
+        return cls(session.access_token, session.refresh_token, session.expires_at)
+    
+    def access_token(self):
+        """
+        Get the access token, refreshing it first if it is about to expire.
+        
+        Returns:
+            str: The user's JWT
+        """
+        with self._lock:
+            if self.expires_at is not None and time.time() >= self.expires_at - TOKEN_REFRESH_MARGIN:
+                self._refresh()
+            return self._access_token
+    
+    def refresh(self, rejected_token=None):
+        """
+        Refresh the session after a request was rejected.
+        
+        Args:
+            rejected_token (str, optional): The token the request was sent with;
+                if another thread has already replaced it, no refresh is needed
+        
+        Returns:
+            bool: True if a newer token is available
+        """
+        with self._lock:
+            if rejected_token is not None and rejected_token != self._access_token:
+                return True
+            return self._refresh()
+    
+    def _refresh(self):
+        if not self.refresh_token:
+            return False
+        try:
+            # A throwaway client, as for login: refreshing stores the new session on it
+            session = get_supabase_client().auth.refresh_session(self.refresh_token).session
+        except Exception as e:
+            print(f"Error refreshing session: {e}")
+            return False
+        if session is None:
+            return False
+        self._access_token = session.access_token
+        self.refresh_token = session.refresh_token
+        self.expires_at = session.expires_at
+        return True
+
+# Session of the user the current script run is acting for
+_auth_session = contextvars.ContextVar("supabase_auth_session", default=None)
+
+def set_auth_session(session):
+    """
+    Act as the given user for the database calls made from this thread.
+    
+    The access token is sent as a per-request Authorization header, so pooled
+    clients can be shared by every session without mixing up users.
+    
+    Args:
+        session (AuthSession or None): The user's session, or None to use the API key only
+    """
+    _auth_session.set(session)
+
+def _is_expired_token(error):
+    # PostgREST answers 401 with PGRST301 when the JWT has expired
+    return error.code == "PGRST301" or "JWT expired" in (error.message or "")
+
+def _execute(query, session=None):
+    session = session or _auth_session.get()
+    if session is None:
+        return query.execute()
+    access_token = session.access_token()
+    query.headers["Authorization"] = f"Bearer {access_token}"
+    try:
+        return query.execute()
+    except APIError as e:
+        # Expired despite the early refresh (e.g. a clock skew): refresh and retry once
+        if not _is_expired_token(e) or not session.refresh(access_token):
+            raise
+        query.headers["Authorization"] = f"Bearer {session.access_token()}"
+        return query.execute()
+
+def _insert_batch(table, rows, session):
+    with supabase_pool.client() as supabase:
+        return _execute(supabase.table(table).insert(rows), session)
+
+# Append-only inserts are queued and written in bulk from a background thread,
+# so the script thread doesn't wait on a round trip per row. Rows are written with
+# the token of the user who saved them, so row level security still checks every
+# row and a batch only ever holds one user's rows.
+# CAREERAI_WRITE_BEHIND=0 writes synchronously instead.
+WRITE_BEHIND = os.environ.get("CAREERAI_WRITE_BEHIND", "1") != "0"
+write_buffer = WriteBehindBuffer(
+    _insert_batch,
+    max_batch=int(os.environ.get("CAREERAI_WRITE_BATCH_SIZE", 50)),
+    flush_interval=float(os.environ.get("CAREERAI_WRITE_FLUSH_INTERVAL", 2)),
+    max_retries=int(os.environ.get("CAREERAI_WRITE_RETRIES", 3))
+) if WRITE_BEHIND else None
+
+def _insert(table, row):
+    # Returns the Supabase response, or None if the row was queued for a background write
+    if write_buffer is None:
+        return _insert_batch(table, row, None)
+    write_buffer.add(table, row, _auth_session.get())
+    return None
+
+# Last content written per (user, table, logical key), so saves that run on every
+# Streamlit rerun only reach the database when something actually changed.
+# CAREERAI_WRITE_DEDUP=0 writes every time.
+WRITE_DEDUP = os.environ.get("CAREERAI_WRITE_DEDUP", "1") != "0"
+write_dedup = WriteDeduplicator(max_keys=int(os.environ.get("CAREERAI_WRITE_DEDUP_MAX_KEYS", 10000)))
+
+def _write_once(user_id, table, logical_key, data, write):
+    # Returns write()'s result, or None if the same content was already written for this record
+    if not WRITE_DEDUP or logical_key is None:
+        return write()
+    if write_dedup.is_unchanged(user_id, table, logical_key, data):
+        return None
+    result = write()
+    write_dedup.remember(user_id, table, logical_key, data)
+    return result
+
+# Results of the per-user read helpers, shared by all sessions. Each save or
+# update drops the entries it affects, so users always read their own writes;
+# changes made by other processes show up within CAREERAI_READ_CACHE_TTL seconds.
+read_cache = ReadCache(
+    ttl=float(os.environ.get("CAREERAI_READ_CACHE_TTL", 60)),
+    max_entries=int(os.environ.get("CAREERAI_READ_CACHE_MAX_ENTRIES", 1024))
+)
+
+def _query(query):
+    with supabase_pool.client() as supabase:
+        return _execute(query(supabase))
+
+def _flush_for_read(table, user_id):
+    # Queued inserts have to land before a query can see them; only the reader's own need to
+    flush_writes(table, user_id)
+
+def _cached(key, load):
+    def load_fresh():
+        _flush_for_read(key[0], key[1])
+        return load()
+    return read_cache.get_or_load(key, load_fresh)
+
+def _cached_read(key, query):
+    return _cached(key, lambda: _query(query))
+
+# Rows per request for the streaming readers
+PAGE_SIZE = int(os.environ.get("CAREERAI_PAGE_SIZE", 50))
+
+def _iter_keyset(table, user_id, filters, order_column, columns="*", page_size=None, desc=False):
+    # Yield rows page by page, ordered by order_column then id, with NULLs last either
+    # way. Each page starts at the last order_column value seen, skipping the rows
+    # already yielded with that value, so pages stay cheap however deep the history
+    # goes. A range filter never matches NULL, so the NULL rows are paged separately,
+    # by id alone.
+    page_size = page_size or PAGE_SIZE
+    if columns != "*":
+        selected = columns.split(",")
+        columns = ",".join(selected + [c for c in (order_column, "id") if c not in selected])
+    direction = ".desc" if desc else ""
+    
+    _flush_for_read(table, user_id)
+    last_value, seen_at_last = None, 0
+    while True:
+        def page(supabase):
+            query = filters(supabase.table(table).select(columns)).not_.is_(order_column, "null")
+            if last_value is not None:
+                query = query.lte(order_column, last_value) if desc else query.gte(order_column, last_value)
+            # One order parameter for both keys; postgrest-py would send two
+            query = query.order(f"{order_column}{direction},id{direction}")
+            return query.limit(page_size).offset(seen_at_last)
+        rows = _query(page).data or []
+        yield from rows
+        if len(rows) < page_size:
+            break
+        
+        boundary = rows[-1][order_column]
+        at_boundary = sum(1 for row in rows if row[order_column] == boundary)
+        seen_at_last = seen_at_last + at_boundary if boundary == last_value else at_boundary
+        last_value = boundary
+    
+    last_id = None
+    while True:
+        def null_page(supabase):
+            query = filters(supabase.table(table).select(columns)).is_(order_column, "null")
+            if last_id is not None:
+                query = query.lt("id", last_id) if desc else query.gt("id", last_id)
+            return query.order(f"id{direction}").limit(page_size)
+        rows = _query(null_page).data or []
+        yield from rows
+        if len(rows) < page_size:
+            return
+        last_id = rows[-1]["id"]
+
+def flush_writes(table=None, user_id=None):
+    """
+    Write queued inserts now instead of waiting for the background thread.
+    
+    Args:
+        table (str, optional): Only write inserts for this table
+        user_id (str, optional): Only write this user's inserts
+    """
+    if write_buffer is not None:
+        write_buffer.flush(table, user_id)
+
+def get_write_stats():
+    """
+    Get write-behind queue counters.
+
+    Returns:
+        dict: Counters from WriteBehindBuffer.stats, or {} if writes are synchronous
+    """
+    return write_buffer.stats() if write_buffer is not None else {}
+
+def get_dedup_stats():
+    """
+    Get counters for writes skipped because their content was unchanged.
+
+    Returns:
+        dict: Counters from WriteDeduplicator.stats
+    """
+    return write_dedup.stats()
+
+def get_read_cache_stats():
+    """
+    Get hit, miss and invalidation counters for the read helpers' cache.
+
+    Returns:
+        dict: Counters from ReadCache.stats
+    """
+    return read_cache.stats()
+
+def get_pool_stats():
+    """
+    Get utilization of the pooled Supabase clients.
+    
+    Returns:
+        dict: Pool counters from ClientPool.stats
+    """
+    return supabase_pool.stats()
 
 # User authentication functions
+# These store the session on the client, so they use a dedicated client rather than a pooled one
 def register_user(email, password):
     supabase = get_supabase_client()
     return supabase.auth.sign_up({"email": email, "password": password})
@@ -30,36 +332,275 @@ def logout_user():
 
 # Database operations
 def save_user_profile(user_id, profile_data):
-    supabase = get_supabase_client()
-    return supabase.table("user_profiles").upsert(
-        {"user_id": user_id, **profile_data}
-    ).execute()
+    def write():
+        with supabase_pool.client() as supabase:
+            result = _execute(supabase.table("user_profiles").upsert(
+                {"user_id": user_id, **profile_data}
+            ))
+        read_cache.invalidate("user_profiles", user_id)
+        return result
+    # One profile row per user, so an unchanged profile never needs rewriting
+    return _write_once(user_id, "user_profiles", "profile", profile_data, write)
 
-def save_ikigai_data(user_id, ikigai_data):
-    supabase = get_supabase_client()
-    return supabase.table("ikigai_logs").insert(
-        {"user_id": user_id, **ikigai_data}
-    ).execute()
+def save_ikigai_data(user_id, ikigai_data, dedup_key=None):
+    """
+    Log an ikigai entry.
+    
+    Args:
+        user_id (str): The user ID
+        ikigai_data (dict): Ikigai fields to log
+        dedup_key (str, optional): Which of the user's entries this is, e.g. "suggestion" or "domain";
+            if given, the entry is skipped when it matches the last one logged under the same key
+    
+    Returns:
+        Response: Supabase response, or None if the insert was queued or skipped as unchanged
+    """
+    def write():
+        result = _insert("ikigai_logs", {"user_id": user_id, **ikigai_data})
+        read_cache.invalidate("ikigai_logs", user_id)
+        return result
+    return _write_once(user_id, "ikigai_logs", dedup_key, ikigai_data, write)
+
+def get_user_profile(user_id):
+    return _cached_read(
+        ("user_profiles", user_id),
+        lambda supabase: supabase.table("user_profiles").select("*").eq("user_id", user_id).limit(1)
+    )
+
+def get_ikigai_logs(user_id, limit=10):
+    """
+    Get a user's most recent ikigai log entries.
+    
+    Args:
+        user_id (str): The user ID
+        limit (int): Maximum number of entries
+    
+    Returns:
+        Response: Supabase response with entries, newest first
+    """
+    return _cached_read(
+        ("ikigai_logs", user_id, limit),
+        lambda supabase: supabase.table("ikigai_logs").select("*").eq("user_id", user_id).order("created_at", desc=True).limit(limit)
+    )
 
 def save_project_selection(user_id, project_data):
-    supabase = get_supabase_client()
-    return supabase.table("projects").insert(
-        {"user_id": user_id, **project_data}
-    ).execute()
+    result = _insert("projects", {"user_id": user_id, **project_data})
+    read_cache.invalidate("projects", user_id)
+    return result
 
 def save_progress(user_id, project_id, progress_data):
-    supabase = get_supabase_client()
-    return supabase.table("progress_entries").insert(
-        {"user_id": user_id, "project_id": project_id, **progress_data}
-    ).execute()
+    """
+    Record a project's progress as task toggle events.
+    
+    Only the tasks whose state changed since the last save are written, to
+    progress_events. A project's first save writes a full snapshot to
+    progress_entries instead, and once PROGRESS_SNAPSHOT_EVERY events have
+    built up after the latest snapshot, a background job compacts them into
+    a new one.
+    
+    Unlike other inserts these are never queued: the next save is diffed
+    against what the database holds, and replay orders events by the seq
+    assigned on insert, so an event still queued (or requeued after a
+    failed batch) would be missed by that diff and land out of order.
+    Each save is one bulk insert, written before this returns.
+    
+    Args:
+        user_id (str): The user ID
+        project_id (str): The project ID
+        progress_data (dict): project_title, completed_tasks (JSON list),
+            progress_percentage and timestamp
+    
+    Returns:
+        int: Number of rows written (events, or 1 for a first snapshot)
+    """
+    completed = set(_json_list(progress_data.get("completed_tasks")))
+    state = get_progress_at(user_id, project_id)
+    
+    if state is None:
+        _insert_batch("progress_entries", {"user_id": user_id, "project_id": project_id, **progress_data}, None)
+        written = 1
+    else:
+        changed = sorted(completed.symmetric_difference(state["completed_tasks"]))
+        if changed:
+            _insert_batch("progress_events", [
+                {
+                    "user_id": user_id,
+                    "project_id": project_id,
+                    "task": task,
+                    "completed": task in completed,
+                    "project_title": progress_data.get("project_title"),
+                    "progress_percentage": progress_data.get("progress_percentage"),
+                    "timestamp": progress_data.get("timestamp")
+                }
+                for task in changed
+            ], None)
+        written = len(changed)
+    
+    if written:
+        read_cache.invalidate("progress_entries", user_id, project_id)
+        read_cache.invalidate("progress_entries", user_id, None)
+    if state and written and state["events_since_snapshot"] + written >= PROGRESS_SNAPSHOT_EVERY:
+        progress_compactor.submit((user_id, project_id), compact_progress, user_id, project_id, _auth_session.get())
+    return written
 
 def get_user_projects(user_id):
-    supabase = get_supabase_client()
-    return supabase.table("projects").select("*").eq("user_id", user_id).execute()
+    return _cached_read(
+        ("projects", user_id),
+        lambda supabase: supabase.table("projects").select("*").eq("user_id", user_id).order("created_at")
+    )
 
-def get_user_progress(user_id, project_id):
-    supabase = get_supabase_client()
-    return supabase.table("progress_entries").select("*").eq("user_id", user_id).eq("project_id", project_id).execute()
+def iter_user_progress(user_id, project_id=None, columns="*", page_size=None, newest_first=True):
+    """
+    Stream a user's progress snapshots page by page.
+    
+    Args:
+        user_id (str): The user ID
+        project_id (str, optional): The project ID to filter by
+        columns (str): Comma-separated columns to select, e.g. "project_id,progress_percentage"
+        page_size (int, optional): Rows per request; defaults to PAGE_SIZE
+        newest_first (bool): Order by timestamp, newest first
+    
+    Yields:
+        dict: One progress entry at a time; later pages are only fetched when reached
+    """
+    def filters(query):
+        query = query.eq("user_id", user_id)
+        return query.eq("project_id", project_id) if project_id else query
+    return _iter_keyset("progress_entries", user_id, filters, "timestamp", columns, page_size, desc=newest_first)
+
+def get_all_progress(user_id):
+    """
+    Get the progress snapshots of all of a user's projects.
+    
+    Args:
+        user_id (str): The user ID
+    
+    Returns:
+        Response: Supabase response with entries, newest first
+    """
+    return _cached_read(
+        ("progress_entries", user_id, None),
+        lambda supabase: supabase.table("progress_entries").select(
+            "project_id,project_title,progress_percentage,completed_tasks,timestamp"
+        ).eq("user_id", user_id).order("timestamp", desc=True)
+    )
+
+# Progress history is an append-only log of task toggles in progress_events,
+# compacted every CAREERAI_PROGRESS_SNAPSHOT_EVERY events into a full snapshot
+# in progress_entries, so rebuilding a state never replays more than that many events.
+PROGRESS_SNAPSHOT_EVERY = int(os.environ.get("CAREERAI_PROGRESS_SNAPSHOT_EVERY", 50))
+progress_compactor = BackgroundJobs(max_workers=1, result_ttl=0, thread_name_prefix="progress-compaction")
+
+def _json_list(value):
+    # completed_tasks is stored as a JSON string, but may come back decoded
+    if isinstance(value, str):
+        return json.loads(value) if value else []
+    return list(value or [])
+
+def _replay(snapshot, events):
+    # Apply toggle events, oldest first, on top of a snapshot row (or nothing)
+    completed = set(_json_list(snapshot.get("completed_tasks"))) if snapshot else set()
+    latest = snapshot or {}
+    for event in events:
+        if event.get("completed"):
+            completed.add(event["task"])
+        else:
+            completed.discard(event["task"])
+        latest = event
+    return {
+        "completed_tasks": completed,
+        "progress_percentage": latest.get("progress_percentage", 0),
+        "project_title": latest.get("project_title"),
+        "timestamp": latest.get("timestamp"),
+        "last_event_seq": events[-1]["seq"] if events else (snapshot or {}).get("last_event_seq"),
+        "events_since_snapshot": len(events)
+    }
+
+def get_progress_at(user_id, project_id, at=None):
+    """
+    Rebuild a project's progress as it was at a point in time.
+    
+    Reads the nearest snapshot at or before `at`, then replays the toggle
+    events recorded after it, i.e. with a higher seq than the last event
+    the snapshot includes. Both are bounded, whatever the other projects'
+    history looks like.
+    
+    Args:
+        user_id (str): The user ID
+        project_id (str): The project ID
+        at (str, optional): ISO timestamp; defaults to now
+    
+    Returns:
+        dict or None: completed_tasks (set), progress_percentage, project_title,
+            timestamp of the last change, last_event_seq (seq of the last event
+            replayed, or None) and events_since_snapshot; None if nothing was
+            saved for the project by then
+    """
+    return _cached(("progress_entries", user_id, project_id, "state", at), lambda: _load_progress(user_id, project_id, at))
+
+def _load_progress(user_id, project_id, at=None):
+    def snapshot_query(supabase):
+        query = supabase.table("progress_entries").select(
+            "project_title,progress_percentage,completed_tasks,timestamp,last_event_seq"
+        ).eq("user_id", user_id).eq("project_id", project_id)
+        # The first save's snapshot includes no events, so it ranks below every compacted one
+        return _until(query, at).order("last_event_seq.desc.nullslast,timestamp.desc").limit(1)
+    snapshots = _query(snapshot_query).data or []
+    snapshot = snapshots[0] if snapshots else None
+    
+    def events_query(supabase):
+        query = supabase.table("progress_events").select(
+            "seq,task,completed,project_title,progress_percentage,timestamp"
+        ).eq("user_id", user_id).eq("project_id", project_id)
+        # Events of one save share a timestamp, so the boundary is the strictly increasing seq
+        if snapshot and snapshot.get("last_event_seq") is not None:
+            query = query.gt("seq", snapshot["last_event_seq"])
+        return _until(query, at).order("seq")
+    events = _query(events_query).data or []
+    
+    if snapshot is None and not events:
+        return None
+    return _replay(snapshot, events)
+
+def _until(query, at):
+    return query.lte("timestamp", at) if at else query
+
+def compact_progress(user_id, project_id, session=None):
+    """
+    Fold a project's toggle events into a new snapshot.
+    
+    The snapshot records the seq of the last event it includes, so events
+    written while it was built (even with the same timestamp) are replayed
+    on top of it, and carries that event's timestamp for point-in-time
+    reads. Runs on the progress_compactor pool.
+    
+    Args:
+        user_id (str): The user ID
+        project_id (str): The project ID
+        session (AuthSession, optional): The user's session, since background threads don't inherit it
+    
+    Returns:
+        bool: True if a snapshot was written
+    """
+    # Set even when None: pool threads are reused, and must not keep acting as the previous job's user
+    set_auth_session(session)
+    # Read around the cache, so the snapshot covers every event written so far
+    state = _load_progress(user_id, project_id)
+    if not state or not state["events_since_snapshot"]:
+        return False
+    
+    _insert_batch("progress_entries", {
+        "user_id": user_id,
+        "project_id": project_id,
+        "project_title": state["project_title"],
+        "completed_tasks": json.dumps(sorted(state["completed_tasks"])),
+        "progress_percentage": state["progress_percentage"],
+        "timestamp": state["timestamp"],
+        "last_event_seq": state["last_event_seq"]
+    }, session)
+    read_cache.invalidate("progress_entries", user_id, project_id)
+    read_cache.invalidate("progress_entries", user_id, None)
+    return True
 
 # Milestone tracking functions
 def save_project_milestone(user_id, project_id, milestone_data):
@@ -69,47 +610,226 @@ def save_project_milestone(user_id, project_id, milestone_data):
     Args:
         user_id (str): The user ID
         project_id (str): The project ID
-        milestone_data (dict): Milestone data including title, description, due_date, status
+        milestone_data (dict): Milestone data including title, description, due_date, status;
+            include an "id" to be able to update the milestone before the write lands
     
     Returns:
-        Response: Supabase response
+        Response: Supabase response, or None if the insert was queued for a background write
     """
-    supabase = get_supabase_client()
-    return supabase.table("project_milestones").insert(
-        {"user_id": user_id, "project_id": project_id, **milestone_data}
-    ).execute()
+    result = _insert("project_milestones", {"user_id": user_id, "project_id": project_id, **milestone_data})
+    _invalidate_milestones(user_id, project_id)
+    return result
+
+def _invalidate_milestones(user_id, project_id):
+    # Both the project's list and the user's unfiltered list include the milestone
+    read_cache.invalidate("project_milestones", user_id, project_id)
+    read_cache.invalidate("project_milestones", user_id, None)
+
+def _invalidate_updated_milestones(user_id, rows):
+    # The updated rows say which projects' lists to invalidate; without them, drop all of the user's
+    rows = [row for row in rows if "project_id" in row]
+    if not rows:
+        read_cache.invalidate("project_milestones", user_id)
+    for project_id in {row["project_id"] for row in rows}:
+        _invalidate_milestones(user_id, project_id)
+
+def upsert_project_milestones(user_id, project_id, milestones):
+    """
+    Insert or update many milestones of a project in one request.
+    
+    Milestones without an "id" get one assigned. Every row is stamped with
+    the same updated_at.
+    
+    Args:
+        user_id (str): The user ID
+        project_id (str): The project ID
+        milestones (list): Milestone dicts (title, description, due_date, status, optional id)
+    
+    Returns:
+        list: One result per milestone, in order: {"id", "ok", "error"}
+    """
+    if not milestones:
+        return []
+    # Queued inserts have to land first, or the upsert would race them
+    flush_writes("project_milestones", user_id)
+    
+    updated_at = datetime.now(timezone.utc).isoformat()
+    rows = [
+        {**milestone, "id": milestone.get("id") or str(uuid.uuid4()),
+         "user_id": user_id, "project_id": project_id, "updated_at": updated_at}
+        for milestone in milestones
+    ]
+    
+    # A bulk request needs every row to have the same columns, so differently shaped rows go separately
+    groups = {}
+    for row in rows:
+        groups.setdefault(tuple(sorted(row)), []).append(row)
+    
+    errors = {}
+    saved_ids = set()
+    for group in groups.values():
+        try:
+            with supabase_pool.client() as supabase:
+                result = _execute(supabase.table("project_milestones").upsert(group, on_conflict="id"))
+            saved_ids.update(str(row.get("id")) for row in result.data or [])
+        except Exception as e:
+            print(f"Error upserting milestones: {e}")
+            errors.update({row["id"]: str(e) for row in group})
+    
+    _invalidate_milestones(user_id, project_id)
+    return [
+        {"id": row["id"], "ok": row["id"] in saved_ids,
+         "error": errors.get(row["id"]) or (None if row["id"] in saved_ids else "Not saved")}
+        for row in rows
+    ]
 
-def update_milestone_status(milestone_id, status):
+def update_milestone_statuses(user_id, updates):
+    """
+    Update the status of many of a user's milestones.
+    
+    PostgREST applies one set of values per request, so milestones are
+    updated with one request per distinct status, all stamped with the
+    same updated_at.
+    
+    Args:
+        user_id (str): The user ID
+        updates (dict): Milestone ID to new status
+    
+    Returns:
+        list: One result per milestone, in the order given: {"id", "ok", "error"}
+    """
+    if not updates:
+        return []
+    # A milestone added moments ago may still be queued; it has to exist before it can be updated
+    flush_writes("project_milestones", user_id)
+    
+    updated_at = datetime.now(timezone.utc).isoformat()
+    by_status = {}
+    for milestone_id, status in updates.items():
+        by_status.setdefault(status, []).append(milestone_id)
+    
+    errors = {}
+    updated = []
+    for status, milestone_ids in by_status.items():
+        try:
+            with supabase_pool.client() as supabase:
+                result = _execute(supabase.table("project_milestones").update(
+                    {"status": status, "updated_at": updated_at}
+                ).eq("user_id", user_id).in_("id", milestone_ids))
+            updated.extend(result.data or [])
+        except Exception as e:
+            print(f"Error updating milestone statuses: {e}")
+            errors.update({milestone_id: str(e) for milestone_id in milestone_ids})
+    
+    _invalidate_updated_milestones(user_id, updated)
+    updated_ids = {str(row.get("id")) for row in updated}
+    return [
+        {"id": milestone_id, "ok": str(milestone_id) in updated_ids,
+         "error": errors.get(milestone_id) or (None if str(milestone_id) in updated_ids else "Not found")}
+        for milestone_id in updates
+    ]
+
+def update_milestone_status(user_id, milestone_id, status):
     """
     Update the status of a milestone.
     
     Args:
+        user_id (str): The user ID
         milestone_id (str): The milestone ID
         status (str): The new status (e.g., "not_started", "in_progress", "completed")
     
     Returns:
-        Response: Supabase response
+        dict: Result from update_milestone_statuses: {"id", "ok", "error"}
     """
-    supabase = get_supabase_client()
-    return supabase.table("project_milestones").update(
-        {"status": status, "updated_at": "now()"}
-    ).eq("id", milestone_id).execute()
+    return update_milestone_statuses(user_id, {milestone_id: status})[0]
 
-def get_project_milestones(user_id, project_id=None):
+def iter_project_milestones(user_id, project_id=None, columns="*", page_size=None):
     """
-    Get all milestones for a user, optionally filtered by project.
+    Stream a user's milestones page by page, by due date.
     
     Args:
         user_id (str): The user ID
         project_id (str, optional): The project ID to filter by
+        columns (str): Comma-separated columns to select, e.g. "id,status"
+        page_size (int, optional): Rows per request; defaults to PAGE_SIZE
+    
+    Yields:
+        dict: One milestone at a time; later pages are only fetched when reached
+    """
+    def filters(query):
+        query = query.eq("user_id", user_id)
+        return query.eq("project_id", project_id) if project_id else query
+    return _iter_keyset("project_milestones", user_id, filters, "due_date", columns, page_size)
+
+# Columns the milestone page displays and edits
+MILESTONE_COLUMNS = "id,project_id,title,description,due_date,status"
+
+def get_milestone_window(user_id, project_id, limit, columns=MILESTONE_COLUMNS):
+    """
+    Get the first milestones of a project by due date, for display.
+    
+    Args:
+        user_id (str): The user ID
+        project_id (str): The project ID
+        limit (int): Number of milestones to return
+        columns (str): Comma-separated columns to select
     
     Returns:
-        Response: Supabase response containing milestones
+        tuple: (list of milestones, bool whether more exist)
     """
-    supabase = get_supabase_client()
-    query = supabase.table("project_milestones").select("*").eq("user_id", user_id)
+    def load():
+        # One extra row tells whether there is more to show
+        rows = list(islice(iter_project_milestones(user_id, project_id, columns, page_size=limit + 1), limit + 1))
+        return rows[:limit], len(rows) > limit
+    return _cached(("project_milestones", user_id, project_id, "window", limit, columns), load)
+
+# Statuses a milestone can be set to from the milestone page
+MILESTONE_STATUSES = ("not_started", "in_progress", "completed", "delayed", "at_risk")
+
+def get_milestone_counts(user_id, project_id):
+    """
+    Count a project's milestones per status.
+    
+    Only the status column is read, page by page, and counted as it
+    arrives, so a project costs one request per PAGE_SIZE milestones
+    rather than one per status.
+    
+    Args:
+        user_id (str): The user ID
+        project_id (str): The project ID
+    
+    Returns:
+        dict: {status: count} for each of MILESTONE_STATUSES
+    """
+    def load():
+        counts = dict.fromkeys(MILESTONE_STATUSES, 0)
+        for row in iter_project_milestones(user_id, project_id, "status"):
+            if row.get("status") in counts:
+                counts[row["status"]] += 1
+        return counts
+    return _cached(("project_milestones", user_id, project_id, "counts"), load)
+
+def get_user_milestone_counts(user_id):
+    """
+    Count the milestones of all of a user's projects per status.
+    
+    Only the project and status columns are read, page by page, so every
+    project's counts together cost one request per PAGE_SIZE milestones,
+    however many projects the user has.
     
-    if project_id:
-        query = query.eq("project_id", project_id)
+    Args:
+        user_id (str): The user ID
     
-    return query.order("due_date").execute() 
\ No newline at end of file
+    Returns:
+        dict: Project ID to {status: count} for each of MILESTONE_STATUSES;
+            projects without milestones are left out
+    """
+    def load():
+        counts = {}
+        for row in iter_project_milestones(user_id, columns="project_id,status"):
+            by_status = counts.setdefault(row["project_id"], dict.fromkeys(MILESTONE_STATUSES, 0))
+            if row.get("status") in by_status:
+                by_status[row["status"]] += 1
+        return counts
+    # Under the user's unfiltered milestone key, so a change to any project invalidates it
+    return _cached(("project_milestones", user_id, None, "counts"), load)
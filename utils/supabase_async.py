@@ -0,0 +1,216 @@
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import supabase as db
+from utils.metrics import registry as metrics
+
+# supabase-py 2.0 only ships a blocking client, so each coroutine hands its
+# query to a worker thread holding a pooled client. The event loop lives on
+# its own thread, one per process, so the Streamlit script thread only
+# blocks once per batch of queries, for as long as the slowest one takes.
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("CAREERAI_SUPABASE_ASYNC_WORKERS", db.supabase_pool.size)),
+    thread_name_prefix="supabase-async"
+)
+_loop = None
+_loop_lock = threading.Lock()
+
+metrics.describe("careerai_session_hydration_seconds", "histogram", "Time to load a user's saved data on login, by outcome")
+
+
+def _get_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            _loop.set_default_executor(_executor)
+            threading.Thread(target=_loop.run_forever, name="supabase-loop", daemon=True).start()
+        return _loop
+
+
+def _to_async(fn):
+    # Run a blocking helper on the executor, keeping the caller's context (the auth session)
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(context.run, fn, *args, **kwargs)
+        )
+    return wrapper
+
+
+# Async versions of the data-access helpers
+save_user_profile = _to_async(db.save_user_profile)
+save_ikigai_data = _to_async(db.save_ikigai_data)
+save_project_selection = _to_async(db.save_project_selection)
+save_progress = _to_async(db.save_progress)
+get_user_projects = _to_async(db.get_user_projects)
+get_all_progress = _to_async(db.get_all_progress)
+get_progress_at = _to_async(db.get_progress_at)
+get_user_profile = _to_async(db.get_user_profile)
+get_ikigai_logs = _to_async(db.get_ikigai_logs)
+save_project_milestone = _to_async(db.save_project_milestone)
+update_milestone_status = _to_async(db.update_milestone_status)
+update_milestone_statuses = _to_async(db.update_milestone_statuses)
+upsert_project_milestones = _to_async(db.upsert_project_milestones)
+get_milestone_window = _to_async(db.get_milestone_window)
+get_milestone_counts = _to_async(db.get_milestone_counts)
+get_user_milestone_counts = _to_async(db.get_user_milestone_counts)
+
+
+def project_ids(projects):
+    """
+    Get the IDs the app saves progress and milestones under for the user's projects.
+
+    Projects are numbered project_0, project_1, ... in creation order, one per title.
+
+    Args:
+        projects (list): Rows from get_user_projects, oldest first
+
+    Returns:
+        list: Project IDs
+    """
+    titles = dict.fromkeys(row["title"] for row in projects if row.get("title"))
+    return [f"project_{i}" for i in range(len(titles))]
+
+
+async def get_progress_states(user_id, project_ids):
+    """
+    Get the current progress of several of a user's projects.
+
+    Each project is read with its own bounded queries (see get_progress_at),
+    all at once, so a project that is rarely saved doesn't widen the reads
+    of the others, and no query grows with the length of the history.
+
+    Args:
+        user_id (str): The user ID
+        project_ids (list): Project IDs, e.g. from `project_ids`
+
+    Returns:
+        dict: Project ID to state, as returned by get_progress_at; projects
+            without saved progress are left out
+    """
+    states = await asyncio.gather(*(get_progress_at(user_id, project_id) for project_id in project_ids))
+    return {project_id: state for project_id, state in zip(project_ids, states) if state is not None}
+
+
+def run(coro, timeout=None):
+    """
+    Run a coroutine on the shared event loop and wait for its result.
+
+    The coroutine acts as the calling thread's user: the session set with
+    `set_auth_session` is carried over to the loop.
+
+    Args:
+        coro: Coroutine to run
+        timeout (float, optional): Seconds to wait before raising TimeoutError
+
+    Returns:
+        The coroutine's result
+    """
+    session = db._auth_session.get()
+
+    async def as_caller():
+        # Tasks get their own context copy, so this doesn't leak to other callers
+        db.set_auth_session(session)
+        return await coro
+
+    return asyncio.run_coroutine_threadsafe(as_caller(), _get_loop()).result(timeout)
+
+
+def run_all(*coros, timeout=None):
+    """
+    Run coroutines concurrently and wait for all of them.
+
+    Args:
+        *coros: Coroutines to run
+        timeout (float, optional): Seconds to wait before raising TimeoutError
+
+    Returns:
+        list: One result per coroutine, in order; a failed coroutine's exception
+            is returned in its place instead of being raised
+    """
+    async def gather():
+        return await asyncio.gather(*coros, return_exceptions=True)
+
+    return run(gather(), timeout)
+
+
+async def load_user_session(user_id):
+    """
+    Fetch everything a returning user's session is built from, concurrently.
+
+    Milestone counts for all projects come from one read of the user's
+    milestones, loaded alongside progress, so the progress page's first
+    render reads them from the read cache.
+
+    Args:
+        user_id (str): The user ID
+
+    Returns:
+        dict: "profile" (dict or None), "ikigai_logs" (newest first), "projects"
+            (oldest first), "progress" (current state per project ID, see
+            get_progress_at), "milestone_counts" ({status: count} per project
+            ID, see get_user_milestone_counts) and "failed" (names of queries that
+            failed and came back empty)
+    """
+    names = ("profile", "ikigai_logs", "projects", "progress", "milestone_counts")
+    projects = asyncio.ensure_future(get_user_projects(user_id))
+
+    async def progress():
+        # Progress is read per project, so it starts as soon as the projects are known
+        return await get_progress_states(user_id, project_ids((await projects).data or []))
+
+    results = await asyncio.gather(
+        get_user_profile(user_id),
+        get_ikigai_logs(user_id),
+        projects,
+        progress(),
+        get_user_milestone_counts(user_id),
+        return_exceptions=True
+    )
+
+    rows, failed = {}, []
+    for name, result in zip(names, results):
+        if isinstance(result, Exception):
+            print(f"Error loading {name} for session: {result}")
+            failed.append(name)
+            rows[name] = {} if name in ("progress", "milestone_counts") else []
+        else:
+            rows[name] = result if name in ("progress", "milestone_counts") else result.data or []
+
+    return {
+        "profile": rows["profile"][0] if rows["profile"] else None,
+        "ikigai_logs": rows["ikigai_logs"],
+        "projects": rows["projects"],
+        "progress": rows["progress"],
+        "milestone_counts": rows["milestone_counts"],
+        "failed": failed
+    }
+
+
+def hydrate_user_session(user_id, timeout=None):
+    """
+    Blocking wrapper around `load_user_session` that records how long it took.
+
+    Args:
+        user_id (str): The user ID
+        timeout (float, optional): Seconds to wait before raising TimeoutError
+
+    Returns:
+        dict: See `load_user_session`
+    """
+    started = time.monotonic()
+    try:
+        data = run(load_user_session(user_id), timeout)
+    except Exception:
+        metrics.observe("careerai_session_hydration_seconds", time.monotonic() - started, {"outcome": "error"})
+        raise
+    outcome = "partial" if data["failed"] else "success"
+    metrics.observe("careerai_session_hydration_seconds", time.monotonic() - started, {"outcome": outcome})
+    return data
@@ -0,0 +1,142 @@
+import math
+import re
+import threading
+import time
+from collections import deque
+
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text):
+    """
+    Estimate the number of tokens in a piece of text without a tokenizer.
+
+    Words count as one token per ~4 characters and each punctuation mark or
+    symbol as one token, which tracks Llama-style BPE tokenizers closely
+    enough for budgeting.
+
+    Args:
+        text (str): Text to measure
+
+    Returns:
+        int: Estimated token count
+    """
+    if not text:
+        return 0
+    return sum(max(1, math.ceil(len(piece) / 4)) for piece in _TOKEN_PATTERN.findall(text))
+
+
+def truncate_to_tokens(text, max_tokens, marker=" [...] "):
+    """
+    Shorten text to roughly `max_tokens`, keeping its beginning and end.
+
+    The head gets two thirds of the budget and the tail one third, both cut
+    at word boundaries, since user notes tend to lead with context and end
+    with the most recent details.
+
+    Args:
+        text (str): Text to shorten
+        max_tokens (int): Token budget
+        marker (str): Inserted where text was removed
+
+    Returns:
+        str: The original text if it fits, otherwise a shortened version
+    """
+    if not text or estimate_tokens(text) <= max_tokens:
+        return text
+
+    words = text.split()
+    head_budget = max_tokens * 2 // 3
+    tail_budget = max_tokens - head_budget
+
+    head, used = [], 0
+    for word in words:
+        cost = estimate_tokens(word)
+        if used + cost > head_budget:
+            break
+        head.append(word)
+        used += cost
+
+    tail, used = [], 0
+    for word in reversed(words[len(head):]):
+        cost = estimate_tokens(word)
+        if used + cost > tail_budget:
+            break
+        tail.append(word)
+        used += cost
+
+    if not head and not tail:
+        # A single enormous "word" (e.g. pasted data without spaces): cut by characters
+        return text[:max_tokens * 4] + marker.rstrip()
+
+    return " ".join(head) + marker + " ".join(reversed(tail))
+
+
+def _percentile(values, percentile):
+    if not values:
+        return 0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(percentile / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class UsageTracker:
+    """
+    Records prompt and completion tokens per function for capacity planning.
+
+    Keeps the most recent `max_samples` calls per function. Costs use the
+    per-million-token prices passed in.
+    """
+
+    def __init__(self, prompt_price_per_million=0.0, completion_price_per_million=0.0, max_samples=10000):
+        self.prompt_price = prompt_price_per_million / 1_000_000
+        self.completion_price = completion_price_per_million / 1_000_000
+        self.max_samples = max_samples
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, function_name, prompt_tokens, completion_tokens, model=None, estimated=False):
+        """
+        Record the token usage of one API call.
+
+        Args:
+            function_name (str): Name of the calling function
+            prompt_tokens (int): Prompt tokens used
+            completion_tokens (int): Completion tokens used
+            model (str, optional): Model that served the request
+            estimated (bool): True if the numbers are local estimates rather than API usage
+        """
+        sample = (time.time(), prompt_tokens, completion_tokens, model, estimated)
+        with self._lock:
+            self._samples.setdefault(function_name, deque(maxlen=self.max_samples)).append(sample)
+
+    def report(self):
+        """
+        Aggregate usage per function.
+
+        Returns:
+            dict: Per function: calls, totals, averages and p95 of prompt and
+                completion tokens, and the cost of the last 24 hours
+        """
+        now = time.time()
+        report = {}
+        with self._lock:
+            for function_name, samples in self._samples.items():
+                prompt = [sample[1] for sample in samples]
+                completion = [sample[2] for sample in samples]
+                last_day = [sample for sample in samples if now - sample[0] <= 24 * 3600]
+                report[function_name] = {
+                    "calls": len(samples),
+                    "estimated_calls": sum(1 for sample in samples if sample[4]),
+                    "prompt_tokens": sum(prompt),
+                    "completion_tokens": sum(completion),
+                    "avg_prompt_tokens": sum(prompt) / len(prompt),
+                    "avg_completion_tokens": sum(completion) / len(completion),
+                    "p95_prompt_tokens": _percentile(prompt, 95),
+                    "p95_completion_tokens": _percentile(completion, 95),
+                    "cost_last_24h": sum(
+                        sample[1] * self.prompt_price + sample[2] * self.completion_price for sample in last_day
+                    )
+                }
+        return report
@@ -0,0 +1,218 @@
+import atexit
+import threading
+import time
+
+from utils.resilience import backoff_delay
+
+
+class WriteBehindBuffer:
+    """
+    Queues rows per table and writes them as bulk inserts from a background thread.
+
+    Rows are grouped by table, caller context (e.g. the user's auth session)
+    and column set, since a bulk insert needs every row to have the same
+    keys. A group is written once it holds `max_batch` rows or its oldest
+    row has waited `flush_interval` seconds. Failed batches are retried
+    with jittered backoff up to `max_retries` times, then dropped and
+    counted. Batches being written count as in flight until they land or
+    are requeued, so `flush` can wait for them; it can be narrowed to one
+    table and user (by the rows' "user_id" column), so a read only waits
+    for the writes it could see. Everything still queued is written when
+    the process exits.
+    """
+
+    def __init__(self, write_batch, max_batch=50, flush_interval=2.0, max_retries=3, retry_delay=1.0):
+        self.write_batch = write_batch
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.rows_queued = 0
+        self.rows_written = 0
+        self.batches_written = 0
+        self.retries = 0
+        self.rows_failed = 0
+        self._groups = {}
+        self._in_flight = {}
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def add(self, table, row, context=None):
+        """
+        Queue one row for insertion.
+
+        Args:
+            table (str): Destination table
+            row (dict): Column values
+            context: Passed through to `write_batch`, e.g. the user's auth session
+        """
+        key = (table, context, tuple(sorted(row)))
+        with self._condition:
+            group = self._groups.setdefault(key, {"rows": [], "first_at": time.monotonic(), "attempts": 0, "not_before": 0.0})
+            if not group["rows"]:
+                group["first_at"] = time.monotonic()
+            group["rows"].append(row)
+            self.rows_queued += 1
+            # Wake the writer to schedule a new group's deadline or write a full batch
+            if len(group["rows"]) in (1, self.max_batch):
+                self._condition.notify_all()
+
+    def _ready(self, now):
+        # Pop the groups due for writing, as (key, rows, attempts) batches; they stay in flight until _write settles them
+        batches = []
+        for key, group in list(self._groups.items()):
+            if not group["rows"]:
+                del self._groups[key]
+                continue
+            due = len(group["rows"]) >= self.max_batch or now - group["first_at"] >= self.flush_interval
+            if due and now >= group["not_before"]:
+                rows, group["rows"] = group["rows"][:self.max_batch], group["rows"][self.max_batch:]
+                group["first_at"] = now
+                batches.append(self._take(key, rows, group["attempts"]))
+        return batches
+
+    def _take(self, key, rows, attempts):
+        # Mark a popped batch in flight under each (table, user) it holds, until _write settles it
+        for owner in {(key[0], row.get("user_id")) for row in rows}:
+            self._in_flight[owner] = self._in_flight.get(owner, 0) + 1
+        return key, rows, attempts
+
+    def _drain(self, table=None, user_id=None):
+        # Pop every queued row of the table and user (any if None), split into batches of at most max_batch
+        batches = []
+        for key, group in list(self._groups.items()):
+            if table is not None and key[0] != table:
+                continue
+            if user_id is None:
+                rows, group["rows"] = group["rows"], []
+            else:
+                rows = [row for row in group["rows"] if row.get("user_id") == user_id]
+                group["rows"] = [row for row in group["rows"] if row.get("user_id") != user_id]
+            for start in range(0, len(rows), self.max_batch):
+                batches.append(self._take(key, rows[start:start + self.max_batch], group["attempts"]))
+        return batches
+
+    def _busy(self, table=None, user_id=None):
+        return any(
+            table in (None, owner[0]) and user_id in (None, owner[1])
+            for owner in self._in_flight
+        )
+
+    def _next_deadline(self, now):
+        deadlines = [
+            max(group["first_at"] + self.flush_interval, group["not_before"])
+            for group in self._groups.values() if group["rows"]
+        ]
+        return max(0.0, min(deadlines) - now) if deadlines else None
+
+    def _settle(self, key, rows):
+        # Called with the condition held once a popped batch has landed, been requeued or dropped
+        for owner in {(key[0], row.get("user_id")) for row in rows}:
+            self._in_flight[owner] -= 1
+            if not self._in_flight[owner]:
+                del self._in_flight[owner]
+        self._condition.notify_all()
+
+    def _write(self, key, rows, attempts, final=False):
+        # Returns True if the batch was written
+        table, context, _ = key
+        try:
+            self.write_batch(table, rows, context)
+        except Exception as e:
+            with self._condition:
+                self._settle(key, rows)
+                if final or attempts >= self.max_retries:
+                    print(f"Dropping {len(rows)} queued rows for {table} after {attempts + 1} attempts: {e}")
+                    self.rows_failed += len(rows)
+                    return False
+                self.retries += 1
+                group = self._groups.setdefault(key, {"rows": [], "first_at": time.monotonic(), "attempts": 0, "not_before": 0.0})
+                group["rows"] = rows + group["rows"]
+                group["attempts"] = attempts + 1
+                group["not_before"] = time.monotonic() + backoff_delay(attempts, self.retry_delay, 30.0)
+            return False
+
+        with self._condition:
+            self._settle(key, rows)
+            self.rows_written += len(rows)
+            self.batches_written += 1
+            group = self._groups.get(key)
+            if group is not None:
+                group["attempts"] = 0
+                group["not_before"] = 0.0
+        return True
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if self._closed:
+                    return
+                batches = self._ready(time.monotonic())
+                if not batches:
+                    self._condition.wait(self._next_deadline(time.monotonic()))
+                    continue
+            for key, rows, attempts in batches:
+                self._write(key, rows, attempts)
+
+    def flush(self, table=None, user_id=None):
+        """
+        Write everything queued now, from the calling thread.
+
+        Also waits for the batches the background thread is writing, so
+        every row added before the call has landed when it returns. Rows
+        are tried once more regardless of their retry backoff; if a write
+        still fails, its rows stay queued for the background thread and
+        flush returns without them.
+
+        Args:
+            table (str, optional): Only write rows for this table
+            user_id (str, optional): Only write rows whose "user_id" is this user
+        """
+        while True:
+            with self._condition:
+                batches = self._drain(table, user_id)
+                while not batches and self._busy(table, user_id):
+                    # A batch the writer fails is requeued, then picked up here
+                    self._condition.wait()
+                    batches = self._drain(table, user_id)
+                if not batches:
+                    return
+            written = [self._write(key, rows, attempts) for key, rows, attempts in batches]
+            if not all(written):
+                return
+
+    def close(self):
+        """Stop the background thread and write whatever is still queued."""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(timeout=5)
+
+        with self._condition:
+            batches = self._drain()
+        for key, rows, attempts in batches:
+            self._write(key, rows, attempts, final=True)
+
+    def stats(self):
+        """
+        Get queue and write counters.
+
+        Returns:
+            dict: pending rows, in-flight batches, rows queued/written/failed, batches, average batch size and retries
+        """
+        with self._condition:
+            return {
+                "pending_rows": sum(len(group["rows"]) for group in self._groups.values()),
+                "in_flight_batches": sum(self._in_flight.values()),
+                "rows_queued": self.rows_queued,
+                "rows_written": self.rows_written,
+                "rows_failed": self.rows_failed,
+                "batches_written": self.batches_written,
+                "avg_batch_size": self.rows_written / self.batches_written if self.batches_written else 0.0,
+                "retries": self.retries
+            }
@@ -0,0 +1,99 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+
+def content_hash(data):
+    """
+    Hash a row's content independently of key order.
+
+    Args:
+        data (dict): Column values
+
+    Returns:
+        str: SHA-256 hex digest of the canonical JSON encoding of the row
+    """
+    canonical = json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class WriteDeduplicator:
+    """
+    Remembers the last content written per (user, table, logical key).
+
+    Streamlit reruns the whole script on every widget interaction, so pages
+    that save as a side effect of rendering would write the same row again
+    and again. `is_unchanged` lets a save skip the write when the content
+    matches what was last written for the same logical record. At most
+    `max_keys` records are remembered; the least recently written are
+    forgotten first, which only costs one redundant write later.
+    """
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self.writes = 0
+        self.suppressed = 0
+        self._hashes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def is_unchanged(self, user_id, table, logical_key, data):
+        """
+        Check whether a write would repeat the last one for this record.
+
+        Args:
+            user_id (str): The user ID
+            table (str): Destination table
+            logical_key (str): Which record of the user's the row represents, e.g. "domain"
+            data (dict): Column values about to be written
+
+        Returns:
+            bool: True if the write can be skipped
+        """
+        key = (user_id, table, logical_key)
+        with self._lock:
+            if self._hashes.get(key) == content_hash(data):
+                self._hashes.move_to_end(key)
+                self.suppressed += 1
+                return True
+            return False
+
+    def remember(self, user_id, table, logical_key, data):
+        """
+        Record that a row was written for this record.
+
+        Call this only once the write has succeeded (or been queued), so a
+        failed write is retried on the next rerun.
+        """
+        key = (user_id, table, logical_key)
+        with self._lock:
+            self._hashes[key] = content_hash(data)
+            self._hashes.move_to_end(key)
+            self.writes += 1
+            while len(self._hashes) > self.max_keys:
+                self._hashes.popitem(last=False)
+
+    def forget(self, user_id, table=None, logical_key=None):
+        """
+        Forget remembered content for a user, optionally narrowed to a table and record.
+        """
+        with self._lock:
+            for key in list(self._hashes):
+                if key[0] == user_id and table in (None, key[1]) and logical_key in (None, key[2]):
+                    del self._hashes[key]
+
+    def stats(self):
+        """
+        Get dedup counters.
+
+        Returns:
+            dict: writes, suppressed writes, suppression rate and remembered records
+        """
+        with self._lock:
+            attempts = self.writes + self.suppressed
+            return {
+                "writes": self.writes,
+                "suppressed": self.suppressed,
+                "suppression_rate": self.suppressed / attempts if attempts else 0.0,
+                "tracked_records": len(self._hashes)
+            }